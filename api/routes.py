@@ -1,25 +1,187 @@
-from fastapi import FastAPI, Header, HTTPException
-from pydantic import BaseModel
-from typing import Optional, List, Dict, Any
 import time
 
-from utils.logger import get_logger, generate_request_id
+# Start of this module's imports, for the import time reported at startup
+_import_start = time.perf_counter()
+
+from fastapi import FastAPI, Header, HTTPException, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional, List, Dict, Any, Tuple
+import asyncio
+import json
+import os
+
+from utils.logger import configure_logging, get_logger, generate_request_id, logging_stats
 from config.loader import load_config
+from llm.answer_cache import SemanticAnswerCache
+from llm.client import LLMClient, NO_CONTEXT_ANSWER, format_citations, format_context
+from llm.providers import LLMError
+from retrieval.batching import MicroBatcher
+from retrieval.cache import cache_stats
+from retrieval.generations import GenerationManager, GenerationStore
+from retrieval.hybrid import HybridRetrieval
+from retrieval.jobs import TERMINAL_STATES, IndexJobs
+from utils.memory import process_memory
+from utils.metrics import REGISTRY, MetricsMiddleware
+from utils.tracing import Trace, record, span, trace, use_trace
+from validators.grounding import validate_answer, validate_citations
 
 logger = get_logger(__name__)
-app = FastAPI(title="Winter Garden Legal RAG API")
 
-# Load config
+# Load config, RAG_CONFIG points at an alternative file
 try:
-    config = load_config()
+    config = load_config(os.environ.get("RAG_CONFIG", "config/config.yaml"))
 except Exception as e:
     logger.error(f"Failed to load config: {e}")
     config = {}
 
+configure_logging(config)
+llm_client = LLMClient.from_config(config)
+answer_cache = SemanticAnswerCache.from_config(config, llm_client.cache_namespace)
+
+retrievers = GenerationManager(
+    GenerationStore(config.get("index_path", "./data/index/")),
+    lambda path: HybridRetrieval.from_config(config, path),
+    check_interval_s=config.get("index_reload_interval_s", 1.0)
+)
+
+index_jobs = IndexJobs.from_config(config)
+
+
+def _encode_batch(queries: List[str]):
+    """Embed a micro-batch of queries in one encoder call."""
+    with retrievers.acquire() as retriever:
+        return list(retriever.faiss.encode_queries(queries))
+
+
+# Progress of the startup warm-up, reported by /ready
+startup: Dict[str, Any] = {
+    "loading": True,
+    "import_s": None,
+    "load_s": None,
+    "warmup_s": None,
+    "generation": None,
+    "error": None,
+}
+
+
+def _load_and_warm_up():
+    """
+    Load the index generation and embedding model, then run the warm-up query.
+
+    The warm-up query goes through retrieval, context packing and the
+    grounding check without calling the LLM, so lazily loaded code paths
+    (FAISS search, token counting) are paid for before the first request.
+    """
+    start = time.perf_counter()
+    with retrievers.acquire() as retriever:
+        if retriever.faiss.is_loaded:
+            # Loads the encoder model
+            retriever.faiss.encode(["warm-up"])
+        startup["generation"] = retrievers.generation_id
+    startup["load_s"] = round(time.perf_counter() - start, 3)
+
+    query = config.get("warmup_query", "")
+    if query:
+        start = time.perf_counter()
+        with retrievers.acquire() as retriever:
+            chunks = retriever.retrieve(query, config.get("top_k", 5))
+        passages = llm_client.pack(chunks)
+        validate_answer(" ".join(p["text"] for p in passages[:1]), "", passages)
+        startup["warmup_s"] = round(time.perf_counter() - start, 3)
+
+
+async def warm_up():
+    """Run the startup loading off the event loop and record its timings."""
+    try:
+        await run_in_threadpool(_load_and_warm_up)
+        logger.info(
+            "Startup completed: imports %.3fs, index and model load %ss, warm-up query %ss",
+            startup["import_s"], startup["load_s"], startup["warmup_s"]
+        )
+    except Exception as e:
+        startup["error"] = f"{type(e).__name__}: {e}"
+        logger.exception("Startup loading failed")
+    finally:
+        startup["loading"] = False
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Load indexes and models in the background on startup; on shutdown
+    persist cached answers and close provider connections.
+
+    The server accepts requests (and answers /health) while loading;
+    /ready turns true once loading and the warm-up query are done.
+    """
+    loading = asyncio.create_task(warm_up())
+    yield
+    loading.cancel()
+    if answer_cache is not None:
+        await run_in_threadpool(answer_cache.save)
+    await llm_client.aclose()
+
+
+app = FastAPI(title="Winter Garden Legal RAG API", lifespan=lifespan)
+app.add_middleware(MetricsMiddleware)
+
+
+embedding_batcher: Optional[MicroBatcher] = None
+if config.get("embed_batching_enabled", True):
+    embedding_batcher = MicroBatcher(
+        _encode_batch,
+        max_batch_size=config.get("embed_batch_max_size", 32),
+        max_wait_ms=config.get("embed_batch_max_wait_ms", 5),
+        name="embedding"
+    )
+
+
+async def wait_for_generation():
+    """
+    Load the published generation, if needed, before a request acquires it.
+
+    Loading blocks, so it runs in a worker thread. While the startup
+    warm-up is still loading, requests are turned away with 503 instead
+    of queueing behind it.
+
+    Raises:
+        HTTPException: 503 while startup loading is in progress
+    """
+    if startup["loading"]:
+        raise HTTPException(
+            status_code=503, detail="Index generation is still loading", headers={"Retry-After": "1"}
+        )
+    await run_in_threadpool(retrievers.refresh)
+
+
+async def embed_query(retriever: HybridRetrieval, query: str):
+    """
+    Embed a single query through the micro-batcher.
+
+    Cached embeddings skip the batching window entirely.
+
+    Returns:
+        Query vector, or None when batching is disabled or no FAISS index
+        is loaded (the retriever then encodes inline)
+    """
+    if embedding_batcher is None or not retriever.faiss.is_loaded:
+        return None
+    cached = retriever.faiss.cached_embedding(query)
+    if cached is not None:
+        return cached
+    return await embedding_batcher.submit(query)
+
 
 class QueryRequest(BaseModel):
     """Request model for query endpoint."""
     query: str
+    top_k: Optional[int] = None
+    nprobe: Optional[int] = None
+    ef_search: Optional[int] = None
+    include_timings: bool = False
 
 
 class QueryResponse(BaseModel):
@@ -28,78 +190,539 @@ class QueryResponse(BaseModel):
     citations: List[Dict[str, Any]]
     request_id: str
     latency_ms: float
+    grounding: Optional[Dict[str, Any]] = None
+    timings: Optional[Dict[str, float]] = None
+
+
+class BatchQueryRequest(BaseModel):
+    """Request model for batch query endpoint."""
+    queries: List[str]
+    top_k: Optional[int] = None
+    nprobe: Optional[int] = None
+    ef_search: Optional[int] = None
+    include_timings: bool = False
+
+
+class BatchQueryItem(BaseModel):
+    """One answered query in a batch."""
+    request_id: str
+    query: str
+    answer: str
+    citations: List[Dict[str, Any]]
+    latency_ms: float
+    cached: bool = False
+
+
+class BatchQueryResponse(BaseModel):
+    """Response model for batch query endpoint."""
+    request_id: str
+    results: List[BatchQueryItem]
+    retrieval_ms: float
+    latency_ms: float
+    timings: Optional[Dict[str, float]] = None
 
 
 @app.get("/health")
 async def health():
-    """Health check endpoint."""
-    return {"status": "ok"}
+    """Health check endpoint, reports the index generation this worker serves."""
+    return {"status": "ok", "generation": retrievers.generation_id}
+
+
+def _indexes_loaded() -> bool:
+    """Whether the served generation has both indexes loaded."""
+    with retrievers.acquire() as retriever:
+        return retriever.bm25.is_loaded and retriever.faiss.is_loaded
+
+
+@app.get("/ready")
+async def ready(response: Response):
+    """
+    Readiness probe.
+
+    Unlike /health, reports ready only once the index generation and
+    embedding model are loaded and the warm-up query has run, with the
+    import, load and warm-up durations of this worker. Responds 503
+    until then, after a failed load, or while no index is available.
+    """
+    result = dict(startup)
+    result["ready"] = False
+    if not startup["loading"] and startup["error"] is None:
+        result["ready"] = await run_in_threadpool(_indexes_loaded)
+        if not result["ready"]:
+            result["error"] = "No index loaded"
+    if not result["ready"]:
+        response.status_code = 503
+    return result
+
+
+@app.get("/stats")
+async def stats():
+    """
+    Runtime stats of this worker, for sizing its caches and limits.
+
+    Returns:
+        Dict with caches, llm_transport, logging and memory (pid plus
+        process_memory()), and answer_cache and embedding_batcher when
+        those are enabled
+    """
+    result = {"caches": cache_stats(), "llm_transport": llm_client.stats(), "logging": logging_stats()}
+    result["memory"] = {"pid": os.getpid(), **process_memory()}
+    if answer_cache is not None:
+        result["answer_cache"] = answer_cache.stats()
+    if embedding_batcher is not None:
+        result["embedding_batcher"] = embedding_batcher.stats()
+    return result
+
+
+def _collect_counters():
+    """Cache, batcher, LLM transport, logging and memory counters as Prometheus families."""
+    caches = dict(cache_stats())
+    if answer_cache is not None:
+        caches["answer"] = answer_cache.stats()
+    for kind, key, help in (
+        ("gauge", "size", "Entries held by each cache"),
+        ("counter", "hits", "Cache hits"),
+        ("counter", "misses", "Cache misses"),
+        ("counter", "evictions", "Cache capacity evictions"),
+        ("counter", "expirations", "Cache TTL expirations"),
+    ):
+        name = f"rag_cache_{key}" if kind == "gauge" else f"rag_cache_{key}_total"
+        yield name, kind, help, [({"cache": cache}, stats[key]) for cache, stats in caches.items()]
+
+    if embedding_batcher is not None:
+        batcher = embedding_batcher.stats()
+        yield "rag_embedding_batches_total", "counter", "Encoder calls made by the micro-batcher", [({}, batcher["batches"])]
+        yield "rag_embedding_batch_items_total", "counter", "Queries embedded by the micro-batcher", [({}, batcher["items"])]
+
+    for key, value in llm_client.stats().items():
+        suffix = "_seconds_total" if key.endswith("_s") else "_total"
+        name = f"rag_llm_{key[:-2] if key.endswith('_s') else key}{suffix}"
+        yield name, "counter", f"LLM transport {key.replace('_', ' ')}", [({}, value)]
+
+    logging_counters = logging_stats()
+    yield "rag_log_records_dropped_total", "counter", "Log records dropped with a full log queue", [({}, logging_counters["dropped"])]
+    yield "rag_log_queue_depth", "gauge", "Log records waiting for the writer", [({}, logging_counters["queued"])]
+
+    memory = process_memory()
+    if memory:
+        yield "rag_process_memory_bytes", "gauge", "Resident memory of this worker; uss is its private share", [
+            ({"kind": kind}, memory[kind]) for kind in ("rss", "pss", "uss")
+        ]
+
+
+REGISTRY.add_collector(_collect_counters)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Prometheus metrics of this worker.
+
+    Latency histograms per HTTP route and per pipeline stage
+    (rag_stage_duration_seconds), request counters, and cache, batcher,
+    LLM transport, log queue and process memory counters and gauges.
+    """
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
+async def retrieve_chunks(request: QueryRequest, request_id: str) -> Tuple[List[Dict[str, Any]], str, Any]:
+    """
+    Retrieve chunks for one query from the latest index generation.
+
+    Returns:
+        Tuple of (chunks, index generation, query embedding or None)
+    """
+    await wait_for_generation()
+    # The generation stays open until this request is done with it
+    with retrievers.acquire() as retriever:
+        with span("embedding"):
+            query_vector = await embed_query(retriever, request.query)
+        with span("retrieval"):
+            chunks = await run_in_threadpool(
+                retriever.retrieve,
+                request.query,
+                request.top_k or config.get("top_k", 5),
+                request.nprobe,
+                request.ef_search,
+                query_vector
+            )
+        generation = retriever.generation
+        if query_vector is None:
+            # Encoded inline by the retriever, which cached it
+            query_vector = retriever.faiss.cached_embedding(request.query)
+    logger.info(
+        "Retrieval completed",
+        extra={
+            "request_id": request_id,
+            "retrieved_chunks": len(chunks)
+        }
+    )
+    return chunks, generation, query_vector
+
+
+async def generate_answer(
+    chunks: List[Dict[str, Any]],
+    query: str,
+    generation: str,
+    query_vector: Any
+) -> Tuple[Dict[str, Any], bool]:
+    """
+    Answer from the semantic answer cache, or generate and cache the answer.
+
+    Returns:
+        Tuple of (result with 'answer', 'citations' and 'ttft_ms', cache hit)
+    """
+    if answer_cache is not None and chunks:
+        with span("answer_cache"):
+            cached = answer_cache.get(query, chunks, generation, query_vector)
+        if cached is not None:
+            cached["ttft_ms"] = None
+            return cached, True
+    result = await llm_client.agenerate_with_citations(chunks, query)
+    if answer_cache is not None and chunks:
+        answer_cache.put(query, chunks, generation, result, query_vector)
+    return result, False
+
+
+def check_grounding(result: Dict[str, Any], chunks: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Grounding and citation check of a generated answer.
+
+    Returns:
+        validate_answer() result without the per-sentence details, plus
+        citations_valid; None when disabled or nothing was retrieved
+    """
+    if not config.get("grounding_check_enabled", True) or not chunks:
+        return None
+    passages = result.get("passages")
+    if passages is None:
+        # Answers from the cache carry no passages
+        with span("context"):
+            passages = llm_client.pack(chunks)
+    with span("grounding"):
+        grounding = validate_answer(result["answer"], "", passages)
+        grounding["citations_valid"] = validate_citations(result["citations"], passages)
+    del grounding["sentences"]
+    return grounding
+
+
+def sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Format one server-sent event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
 
 @app.post("/query", response_model=QueryResponse)
 async def query(
     request: QueryRequest,
+    response: Response,
     x_request_id: Optional[str] = Header(None, alias="X-Request-ID")
 ):
     """
     Main RAG query endpoint.
     
-    TODO: Integrate with retrieval and LLM modules.
+    Answers generated earlier from the same retrieved chunks for the same
+    or a paraphrased query are served from the answer cache; the
+    X-Answer-Cache response header is "hit" or "miss". With
+    include_timings, the response breaks latency down per pipeline stage.
     """
-    start_time = time.time()
     request_id = generate_request_id(x_request_id)
     
-    logger.info(
-        "Query received",
-        extra={
-            "request_id": request_id,
-            "query": request.query
+    with trace(request_id) as request_trace:
+        logger.info(
+            "Query received",
+            extra={
+                "request_id": request_id,
+                "query": request.query
+            }
+        )
+        
+        chunks, generation, query_vector = await retrieve_chunks(request, request_id)
+        
+        try:
+            result, cached = await generate_answer(chunks, request.query, generation, query_vector)
+        except LLMError as e:
+            logger.error(f"Generation failed: {e}", extra={"request_id": request_id})
+            raise HTTPException(status_code=502, detail=str(e))
+        response.headers["X-Answer-Cache"] = "hit" if cached else "miss"
+        
+        grounding = check_grounding(result, chunks)
+        
+        latency_ms = request_trace.elapsed_ms()
+        stages = request_trace.breakdown()
+        
+        logger.info(
+            "Query completed from answer cache" if cached else "Query completed",
+            extra={
+                "request_id": request_id,
+                "latency_ms": latency_ms,
+                "ttft_ms": result["ttft_ms"],
+                "stages": stages
+            }
+        )
+    
+    return QueryResponse(
+        answer=result["answer"],
+        citations=result["citations"],
+        request_id=request_id,
+        latency_ms=latency_ms,
+        grounding=grounding,
+        timings=stages if request.include_timings else None
+    )
+
+
+@app.post("/query/stream")
+async def query_stream(
+    request: QueryRequest,
+    x_request_id: Optional[str] = Header(None, alias="X-Request-ID")
+):
+    """
+    Streaming RAG query endpoint.
+    
+    Responds with server-sent events: one "citations" event as soon as
+    retrieval is done, a "token" event per answer fragment, then "done"
+    with the timings. A provider failure mid-answer ends the stream with
+    an "error" event. A cached answer is sent as a single "token" event
+    and marked by the X-Answer-Cache response header. With
+    include_timings, "done" also carries the per-stage breakdown.
+    """
+    request_id = generate_request_id(x_request_id)
+    
+    with trace(request_id) as request_trace:
+        logger.info(
+            "Streaming query received",
+            extra={
+                "request_id": request_id,
+                "query": request.query
+            }
+        )
+        
+        chunks, generation, query_vector = await retrieve_chunks(request, request_id)
+        cached = None
+        if answer_cache is not None and chunks:
+            with span("answer_cache"):
+                cached = answer_cache.get(request.query, chunks, generation, query_vector)
+        
+        with span("context"):
+            passages = llm_client.pack(chunks) if cached is None else []
+        citations = cached["citations"] if cached is not None else format_citations(passages)
+    
+    async def events() -> AsyncIterator[str]:
+        # The body is sent after the handler returned, outside its trace
+        with use_trace(request_trace):
+            yield sse_event("citations", {"request_id": request_id, "citations": citations})
+            ttft_ms = None
+            try:
+                if cached is not None or not chunks:
+                    # Cached, or nothing to ground an answer in: the provider is not called
+                    ttft_ms = request_trace.elapsed_ms()
+                    yield sse_event("token", {"text": cached["answer"] if cached is not None else NO_CONTEXT_ANSWER})
+                else:
+                    parts = []
+                    generation_start = time.perf_counter_ns()
+                    with span("generation"):
+                        async for token in llm_client.stream(format_context(passages), request.query):
+                            if ttft_ms is None:
+                                ttft_ms = request_trace.elapsed_ms()
+                                record("generation.first_token", time.perf_counter_ns() - generation_start, generation_start)
+                            parts.append(token)
+                            yield sse_event("token", {"text": token})
+                    if answer_cache is not None:
+                        answer = {"answer": "".join(parts), "citations": citations}
+                        answer_cache.put(request.query, chunks, generation, answer, query_vector)
+            except LLMError as e:
+                logger.error(f"Generation failed: {e}", extra={"request_id": request_id})
+                yield sse_event("error", {"request_id": request_id, "detail": str(e)})
+                return
+            
+            latency_ms = request_trace.elapsed_ms()
+            stages = request_trace.breakdown()
+            logger.info(
+                "Streaming query completed",
+                extra={
+                    "request_id": request_id,
+                    "latency_ms": latency_ms,
+                    "ttft_ms": ttft_ms,
+                    "stages": stages
+                }
+            )
+            done = {"request_id": request_id, "latency_ms": latency_ms, "ttft_ms": ttft_ms}
+            if request.include_timings:
+                done["timings"] = stages
+            yield sse_event("done", done)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={
+            "X-Request-ID": request_id,
+            "Cache-Control": "no-cache",
+            "X-Answer-Cache": "hit" if cached is not None else "miss"
         }
     )
+
+
+@app.post("/query/batch", response_model=BatchQueryResponse)
+async def query_batch(
+    request: BatchQueryRequest,
+    response: Response,
+    x_request_id: Optional[str] = Header(None, alias="X-Request-ID")
+):
+    """
+    Batch RAG query endpoint for evaluation and bulk compliance checks.
     
-    # TODO: Call retrieval pipeline
-    # TODO: Call LLM for answer generation
-    # TODO: Format response with citations
+    All queries share one retrieval pass: one batched encoder call, one
+    FAISS search over the query matrix and one sparse BM25 product. Each
+    item gets its own request id, derived from the batch request id.
+    Items answered from the answer cache are flagged as cached and
+    counted in the X-Answer-Cache-Hits response header. With
+    include_timings, the response breaks latency down per pipeline stage,
+    summed over the items.
+    """
+    with trace(generate_request_id(x_request_id)) as request_trace:
+        return await _query_batch(request, response, request_trace)
+
+
+async def _query_batch(request: BatchQueryRequest, response: Response, request_trace: Trace) -> "BatchQueryResponse":
+    """Body of /query/batch inside the batch's trace."""
+    request_id = request_trace.request_id
     
-    latency_ms = (time.time() - start_time) * 1000
+    max_queries = config.get("max_batch_queries", 1000)
+    if len(request.queries) > max_queries:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch has {len(request.queries)} queries, limit is {max_queries}"
+        )
     
     logger.info(
-        "Query completed",
+        f"Batch query received with {len(request.queries)} queries",
+        extra={"request_id": request_id}
+    )
+    
+    await wait_for_generation()
+    with retrievers.acquire() as retriever:
+        with span("retrieval"):
+            chunk_lists = await run_in_threadpool(
+                retriever.retrieve_batch,
+                request.queries,
+                request.top_k or config.get("top_k", 5),
+                request.nprobe,
+                request.ef_search
+            )
+        generation = retriever.generation
+        query_vectors = [retriever.faiss.cached_embedding(q) for q in request.queries]
+    retrieval_ms = request_trace.elapsed_ms()
+    
+    async def answer(i: int, query: str, chunks: List[Dict[str, Any]]) -> BatchQueryItem:
+        item_start = time.perf_counter_ns()
+        result, cached = await generate_answer(chunks, query, generation, query_vectors[i])
+        return BatchQueryItem(
+            request_id=f"{request_id}-{i}",
+            query=query,
+            answer=result["answer"],
+            citations=result["citations"],
+            latency_ms=(time.perf_counter_ns() - item_start) / 1e6,
+            cached=cached
+        )
+    
+    # Generations run concurrently, bounded by the transport's concurrency limit
+    try:
+        results = await asyncio.gather(*(
+            answer(i, query, chunks)
+            for i, (query, chunks) in enumerate(zip(request.queries, chunk_lists))
+        ))
+    except LLMError as e:
+        logger.error(f"Generation failed: {e}", extra={"request_id": request_id})
+        raise HTTPException(status_code=502, detail=str(e))
+    response.headers["X-Answer-Cache-Hits"] = str(sum(item.cached for item in results))
+    
+    latency_ms = request_trace.elapsed_ms()
+    stages = request_trace.breakdown()
+    
+    logger.info(
+        "Batch query completed",
         extra={
             "request_id": request_id,
-            "latency_ms": latency_ms
+            "latency_ms": latency_ms,
+            "stages": stages
         }
     )
     
-    # Stub response
-    return QueryResponse(
-        answer="TODO: Implement answer generation",
-        citations=[],
+    return BatchQueryResponse(
         request_id=request_id,
-        latency_ms=latency_ms
+        results=results,
+        retrieval_ms=retrieval_ms,
+        latency_ms=latency_ms,
+        timings=stages if request.include_timings else None
     )
 
 
+class IndexRequest(BaseModel):
+    """Request model for index endpoint."""
+    full: bool = False
+
+
 @app.post("/index")
 async def rebuild_index(
+    request: Optional[IndexRequest] = None,
     x_request_id: Optional[str] = Header(None, alias="X-Request-ID")
 ):
     """
-    Trigger index rebuild.
+    Submit an index rebuild job.
     
-    TODO: Implement index rebuild logic.
+    The build runs in a separate process into a new generation directory
+    and is published with an atomic symlink swap. Queries keep being
+    served from the current generation; each worker switches lazily once
+    the new one is published. Only one build runs at a time, a submission
+    while one is running is coalesced into it.
     """
     request_id = generate_request_id(x_request_id)
+    full = request.full if request is not None else False
     
     logger.info(
         "Index rebuild requested",
         extra={"request_id": request_id}
     )
     
-    # TODO: Call build_index script logic
+    job, coalesced = await run_in_threadpool(index_jobs.submit, full, request_id)
     
     return {
-        "status": "success",
-        "message": "Index rebuild triggered (TODO: implement)",
+        "status": job["status"],
+        "job_id": job["job_id"],
+        "coalesced": coalesced,
+        "message": "Coalesced into the running index build" if coalesced else "Index build submitted",
+        "generation": retrievers.generation_id,
         "request_id": request_id
     }
+
+
+@app.get("/index/{job_id}")
+async def index_job_status(job_id: str):
+    """
+    Index build job status with per-stage progress.
+    
+    Each stage reports done/total in its unit (files scanned and parsed,
+    chunks embedded, indexes written), throughput and ETA.
+    """
+    job = index_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown index job {job_id}")
+    return job
+
+
+@app.delete("/index/{job_id}")
+async def cancel_index_job(job_id: str):
+    """
+    Cancel a queued or running index build job.
+    
+    The unpublished generation is discarded. A job that already started
+    publishing completes.
+    """
+    job = await run_in_threadpool(index_jobs.cancel, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown index job {job_id}")
+    if job["status"] in TERMINAL_STATES:
+        raise HTTPException(status_code=409, detail=f"Index job {job_id} already {job['status']}")
+    return job
+
+
+startup["import_s"] = round(time.perf_counter() - _import_start, 3)
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+BM25 query mode benchmark for Winter Garden Legal RAG.
+
+This script:
+1. Builds a BM25 index over a synthetic ordinance-like corpus
+2. Runs the same queries in exhaustive and pruned mode
+3. Checks both modes return identical rankings
+4. Reports mean and p95 latency per mode
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from retrieval.bm25 import BM25Retrieval
+
+# Boilerplate terms that appear in almost every ordinance chunk
+COMMON_TERMS = ["city", "shall", "section", "the", "of", "permit", "code", "any"]
+
+
+def synthetic_corpus(n_docs: int, vocab_size: int, seed: int = 0):
+    """
+    Generate a corpus with a Zipf-like vocabulary plus boilerplate terms.
+
+    Args:
+        n_docs: Number of documents
+        vocab_size: Number of distinct rare terms
+        seed: Random seed
+
+    Returns:
+        Tuple of (documents, vocabulary)
+    """
+    rng = np.random.default_rng(seed)
+    vocab = np.array([f"term{i}" for i in range(vocab_size)])
+    weights = 1.0 / np.arange(1, vocab_size + 1)
+    weights /= weights.sum()
+    documents = []
+    for _ in range(n_docs):
+        n_tokens = int(rng.integers(40, 160))
+        rare = vocab[rng.choice(vocab_size, size=n_tokens, p=weights)]
+        mask = rng.random(n_tokens) < 0.3
+        rare[mask] = rng.choice(COMMON_TERMS, size=int(mask.sum()))
+        documents.append(" ".join(rare))
+    return documents, list(vocab)
+
+
+def time_mode(retriever: BM25Retrieval, queries, top_k: int, pruned: bool):
+    """Return per-query latencies in milliseconds and the results."""
+    latencies, results = [], []
+    for query in queries:
+        start = time.perf_counter()
+        results.append(retriever.search(query, top_k, pruned=pruned))
+        latencies.append((time.perf_counter() - start) * 1000)
+    return np.array(latencies), results
+
+
+def main():
+    """Main benchmark function."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--docs", type=int, default=50000)
+    parser.add_argument("--vocab", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--block-size", type=int, default=64)
+    args = parser.parse_args()
+
+    documents, vocab = synthetic_corpus(args.docs, args.vocab)
+    rng = random.Random(1)
+    # Long legal questions mix a few specific terms with boilerplate
+    queries = [
+        " ".join(
+            rng.choice(COMMON_TERMS) if rng.random() < 0.4 else rng.choice(vocab[:2000])
+            for _ in range(rng.randint(2, 16))
+        )
+        for _ in range(args.queries)
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        retriever = BM25Retrieval(tmp, block_size=args.block_size)
+        start = time.perf_counter()
+        retriever.build_index(documents, tmp)
+        print(f"build: {time.perf_counter() - start:.2f}s for {args.docs} docs")
+
+        # Warm the page cache so both modes read from memory
+        time_mode(retriever, queries, args.top_k, pruned=False)
+        exhaustive_ms, exhaustive = time_mode(retriever, queries, args.top_k, pruned=False)
+        pruned_ms, pruned = time_mode(retriever, queries, args.top_k, pruned=True)
+
+    mismatches = sum(
+        not (np.array_equal(a[0], b[0]) and np.array_equal(a[1], b[1]))
+        for a, b in zip(exhaustive, pruned)
+    )
+    for name, latencies in (("exhaustive", exhaustive_ms), ("pruned", pruned_ms)):
+        print(
+            f"{name:>10}: mean {latencies.mean():.3f} ms, "
+            f"p95 {np.percentile(latencies, 95):.3f} ms"
+        )
+    print(f"ranking mismatches: {mismatches}/{len(queries)}")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Grounding check benchmark for Winter Garden Legal RAG.
+
+This script:
+1. Builds ordinance-like retrieved chunks and answers of growing length
+2. Times validate_answer (shingle index built per call) per answer length
+3. Times a naive check that substring-searches every answer 3-gram in
+   every chunk, for comparison
+4. Checks both agree on which sentences are supported
+"""
+
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from validators.grounding import ShingleIndex, split_sentences, validate_answer
+
+WORDS = (
+    "city shall permit section owner property sidewalk cafe noise fee resolution commission zoning "
+    "district building code variance hearing notice board approval license vehicle parking sign "
+    "setback lot structure use residential commercial applicant appeal violation penalty"
+).split()
+
+
+def synthetic_case(n_chunks: int, chunk_words: int, n_sentences: int, seed: int = 0):
+    """
+    Generate retrieved chunks and an answer mixing quoted and invented sentences.
+
+    Args:
+        n_chunks: Retrieved chunks
+        chunk_words: Words per chunk
+        n_sentences: Answer sentences
+        seed: Random seed
+
+    Returns:
+        Tuple of (chunks, answer)
+    """
+    rng = random.Random(seed)
+    chunks = [
+        {"chunk_id": i, "text": " ".join(rng.choice(WORDS) for _ in range(chunk_words)) + "."}
+        for i in range(n_chunks)
+    ]
+    sentences = []
+    for _ in range(n_sentences):
+        if rng.random() < 0.8:
+            words = rng.choice(chunks)["text"].rstrip(".").split()
+            start = rng.randrange(len(words) - 12)
+            sentence = " ".join(words[start:start + 12])
+        else:
+            sentence = " ".join(rng.choice(WORDS) for _ in range(12))
+        sentences.append(f"{sentence.capitalize()}. [{rng.randint(1, n_chunks)}]")
+    return chunks, " ".join(sentences)
+
+
+def naive_supported(answer: str, chunks, min_support: float = 0.5):
+    """Quadratic baseline: substring-search each sentence's 3-grams in every chunk."""
+    texts = [" " + " ".join(re.findall(r"\w+", chunk["text"].lower())) + " " for chunk in chunks]
+    supported = []
+    for sentence in split_sentences(answer):
+        words = re.findall(r"\w+", re.sub(r"\[\d+\]", " ", sentence).lower())
+        covered = set()
+        for i in range(len(words) - 2):
+            shingle = f" {' '.join(words[i:i + 3])} "
+            if any(shingle in text for text in texts):
+                covered.update(range(i, i + 3))
+        supported.append(len(covered) / len(words) >= min_support)
+    return supported
+
+
+def time_ms(fn, repeat: int):
+    """Per-call latencies in milliseconds."""
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return np.array(latencies)
+
+
+def main():
+    """Main benchmark function."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=10)
+    parser.add_argument("--chunk-words", type=int, default=100)
+    parser.add_argument("--sentences", type=int, nargs="+", default=[5, 20, 80, 320])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    mismatches = 0
+    for n_sentences in args.sentences:
+        chunks, answer = synthetic_case(args.chunks, args.chunk_words, n_sentences)
+        context = "\n\n".join(chunk["text"] for chunk in chunks)
+
+        result = validate_answer(answer, context, chunks)
+        supported = [s["support"] >= 0.5 for s in result["sentences"]]
+        mismatches += supported != naive_supported(answer, chunks)
+
+        build_ms = time_ms(lambda: ShingleIndex.from_chunks(chunks), args.repeat)
+        check_ms = time_ms(lambda: validate_answer(answer, context, chunks), args.repeat)
+        naive_ms = time_ms(lambda: naive_supported(answer, chunks), args.repeat)
+        print(
+            f"{n_sentences:>4} sentences: index build {build_ms.mean():.3f} ms, "
+            f"validate_answer mean {check_ms.mean():.3f} ms p95 {np.percentile(check_ms, 95):.3f} ms, "
+            f"naive mean {naive_ms.mean():.3f} ms, confidence {result['confidence']:.2f}, "
+            f"issues {len(result['issues'])}"
+        )
+    print(f"support mismatches vs naive: {mismatches}/{len(args.sentences)}")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,443 @@
+#!/usr/bin/env python3
+"""
+Retrieval benchmark suite for Winter Garden Legal RAG.
+
+This script:
+1. Builds BM25 and FAISS indexes over the ordinance PDFs in data_path
+   (--corpus pdfs) or a deterministic synthetic ordinance-like corpus
+2. Records build time and on-disk index size per index
+3. Times single-query search and batched search for BM25 (exhaustive and
+   pruned), every FAISS index type across nprobe / ef_search values, and
+   hybrid retrieval per fusion method, reporting p50/p95/p99 and QPS
+4. Measures recall@k of approximate modes against exact search on the
+   same queries (flat FAISS, exhaustive BM25, hybrid over both)
+5. Saves the results as JSON; the compare command flags regressions of
+   one run against a baseline run
+
+Examples:
+    python benchmarks/bench_retrieval.py run --output base.json
+    python benchmarks/bench_retrieval.py run --corpus pdfs --output new.json
+    python benchmarks/bench_retrieval.py compare base.json new.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config.loader import load_config
+from retrieval.bm25 import BM25Retrieval
+from retrieval.encoders import HashingEncoder, get_encoder
+from retrieval.faiss_store import FaissRetrieval
+from retrieval.hybrid import HybridRetrieval
+from utils.logger import configure_logging
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+# Terms every ordinance section repeats
+BOILERPLATE = "the city shall section of any permit code and or to in by such".split()
+TOPICS = (
+    "sidewalk cafe noise fee zoning district variance hearing notice board approval license vehicle "
+    "parking sign setback lot structure residential commercial applicant appeal violation penalty "
+    "fence pool tree removal stormwater drainage easement subdivision plat annexation utility water "
+    "sewer garbage solid waste alcohol beverage hours operation vendor solicitation animal dog leash "
+    "building inspection certificate occupancy demolition historic preservation landscaping buffer"
+).split()
+
+
+def synthetic_corpus(n_chunks: int, seed: int = 0):
+    """
+    Generate ordinance-like chunks with a Zipf-distributed vocabulary.
+
+    Args:
+        n_chunks: Number of chunks
+        seed: Random seed
+
+    Returns:
+        List of chunk dicts shaped like PDFParser output
+    """
+    rng = np.random.default_rng(seed)
+    vocab = np.array(TOPICS + [f"term{i}" for i in range(5000)])
+    weights = 1.0 / np.arange(1, len(vocab) + 1)
+    weights /= weights.sum()
+    chunks = []
+    for i in range(n_chunks):
+        n_words = int(rng.integers(50, 90))
+        words = vocab[rng.choice(len(vocab), size=n_words, p=weights)]
+        mask = rng.random(n_words) < 0.35
+        words[mask] = rng.choice(BOILERPLATE, size=int(mask.sum()))
+        text = f"Sec. {i // 20}-{i % 20}. " + " ".join(words) + "."
+        page, slot = divmod(i, 4)
+        chunks.append({
+            "text": text,
+            "pdf_file": f"synthetic-{page // 25}.pdf",
+            "page": page % 25 + 1,
+            "char_start": slot * 500,
+            "char_end": slot * 500 + len(text),
+        })
+    return chunks
+
+
+def pdf_corpus(config, data_path: str):
+    """
+    Parse the ordinance PDFs into chunks.
+
+    Args:
+        config: Configuration dict, for chunking and parse cache options
+        data_path: Directory of PDFs
+
+    Returns:
+        List of chunk dicts
+    """
+    from parsers.pdf_parser import PDFParser
+
+    return list(PDFParser.from_config(config).parse_directory(data_path))
+
+
+def sample_queries(chunks, n_queries: int, seed: int = 1):
+    """
+    Draw queries as short word windows of random chunks.
+
+    Args:
+        chunks: Indexed chunks
+        n_queries: Number of queries
+        seed: Random seed
+
+    Returns:
+        List of query strings
+    """
+    rng = random.Random(seed)
+    queries = []
+    while len(queries) < n_queries:
+        words = rng.choice(chunks)["text"].split()
+        if len(words) < 4:
+            continue
+        length = rng.randint(3, min(12, len(words)))
+        start = rng.randint(0, len(words) - length)
+        queries.append(" ".join(words[start:start + length]))
+    return queries
+
+
+def dir_bytes(path: str) -> int:
+    """Total size of the files under a directory."""
+    return sum(f.stat().st_size for f in Path(path).rglob("*") if f.is_file())
+
+
+def latency_stats(latencies_ms, n_queries: int):
+    """Percentiles of per-call latencies and throughput in queries per second."""
+    latencies_ms = np.asarray(latencies_ms)
+    total_s = latencies_ms.sum() / 1000
+    return {
+        "calls": len(latencies_ms),
+        "mean_ms": round(float(latencies_ms.mean()), 4),
+        "p50_ms": round(float(np.percentile(latencies_ms, 50)), 4),
+        "p95_ms": round(float(np.percentile(latencies_ms, 95)), 4),
+        "p99_ms": round(float(np.percentile(latencies_ms, 99)), 4),
+        "qps": round(n_queries / total_s, 1) if total_s else None,
+    }
+
+
+def time_single(search, queries, warmup: int):
+    """Time search(query) per query after a warm-up pass, returning stats and result ids."""
+    for query in queries[:warmup]:
+        search(query)
+    latencies, ids = [], []
+    for query in queries:
+        start = time.perf_counter()
+        result = search(query)
+        latencies.append((time.perf_counter() - start) * 1000)
+        ids.append(result[0])
+    return latency_stats(latencies, len(queries)), ids
+
+
+def time_batch(search_batch, queries, batch_size: int):
+    """Time search_batch over consecutive batches of queries."""
+    search_batch(queries[:batch_size])
+    latencies = []
+    for i in range(0, len(queries), batch_size):
+        start = time.perf_counter()
+        search_batch(queries[i:i + batch_size])
+        latencies.append((time.perf_counter() - start) * 1000)
+    stats = latency_stats(latencies, len(queries))
+    stats["batch_size"] = batch_size
+    return stats
+
+
+def recall_at_k(found, truth, k: int) -> float:
+    """Mean share of the exact top-k ids also returned by the approximate search."""
+    hits = []
+    for f, t in zip(found, truth):
+        t = np.asarray(t)[:k]
+        if len(t):
+            hits.append(len(np.intersect1d(np.asarray(f)[:k], t)) / len(t))
+    return round(float(np.mean(hits)), 4) if hits else 1.0
+
+
+def run(args):
+    """Build the indexes, time every configuration and save the results."""
+    config = load_config(args.config)
+    configure_logging({**config, "log_level": "WARNING"})
+
+    start = time.perf_counter()
+    if args.corpus == "pdfs":
+        data_path = args.data_path or config.get("data_path", "./data/raw_pdfs/")
+        chunks = pdf_corpus(config, data_path)
+        corpus = f"pdfs:{data_path}"
+    else:
+        chunks = synthetic_corpus(args.chunks)
+        corpus = f"synthetic:{args.chunks}"
+    parse_seconds = time.perf_counter() - start
+    if not chunks:
+        sys.exit(f"No chunks in corpus {corpus}")
+    texts = [c["text"] for c in chunks]
+    queries = sample_queries(chunks, args.queries)
+    print(f"corpus {corpus}: {len(chunks)} chunks, {len(queries)} queries")
+
+    encoder = HashingEncoder(config.get("embedding_dim", 384)) if args.encoder == "hashing" else get_encoder(config)
+    start = time.perf_counter()
+    embeddings = encoder.encode(texts)
+    embed_seconds = time.perf_counter() - start
+
+    k = args.top_k
+    results = {}
+
+    def report(name, build, single, batch, recall):
+        results[name] = {**build, "single": single, "batch": batch, "recall_at_k": recall}
+        recall_text = f"{recall:.4f}" if recall is not None else "n/a"
+        print(
+            f"{name:<28} p50 {single['p50_ms']:8.3f} ms  p99 {single['p99_ms']:8.3f} ms  "
+            f"qps {single['qps']:>9}  batch qps {batch['qps']:>9}  recall@{k} {recall_text}"
+        )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # BM25: one index, queried exhaustively (exact) and with pruning
+        bm25_path = str(Path(tmp) / "bm25")
+        bm25_args = dict(k1=config.get("bm25_k1", 1.5), b=config.get("bm25_b", 0.75),
+                         block_size=config.get("bm25_block_size", 64))
+        start = time.perf_counter()
+        BM25Retrieval(bm25_path, **bm25_args).build_index(texts, bm25_path)
+        bm25_build = {"build_seconds": round(time.perf_counter() - start, 3), "index_bytes": dir_bytes(bm25_path)}
+        bm25 = {mode: BM25Retrieval(bm25_path, pruned=mode == "pruned", **bm25_args) for mode in ("exhaustive", "pruned")}
+
+        bm25_truth = None
+        for mode, retriever in bm25.items():
+            single, ids = time_single(lambda q: retriever.search(q, k), queries, args.warmup)
+            batch = time_batch(lambda qs: retriever.search_batch(qs, k), queries, args.batch_size)
+            bm25_truth = bm25_truth or ids
+            report(f"bm25/{mode}", bm25_build, single, batch, recall_at_k(ids, bm25_truth, k))
+
+        # FAISS: flat first, its results are the exact baseline. It is always
+        # built, but only timed and reported when asked for
+        index_params = {
+            "nlist": config.get("faiss_nlist", 256),
+            "pq_m": config.get("faiss_pq_m", 16),
+            "pq_nbits": config.get("faiss_pq_nbits", 8),
+            "hnsw_m": config.get("faiss_hnsw_m", 32),
+            "ef_construction": config.get("faiss_ef_construction", 200),
+        }
+        sweeps = {
+            "flat": [{}],
+            "ivf_flat": [{"nprobe": n} for n in args.nprobe],
+            "ivf_pq": [{"nprobe": n} for n in args.nprobe],
+            "hnsw": [{"ef_search": ef} for ef in args.ef_search],
+        }
+        faiss = {}
+        faiss_truth = None
+        exact_faiss = None
+        for index_type in ["flat"] + [t for t in args.faiss_types if t != "flat"]:
+            path = str(Path(tmp) / f"faiss-{index_type}")
+            retriever = FaissRetrieval(path, index_type=index_type, index_params=index_params, encoder=encoder)
+            start = time.perf_counter()
+            retriever.build_index(embeddings, chunks, path)
+            build = {"build_seconds": round(time.perf_counter() - start, 3), "index_bytes": dir_bytes(path)}
+            if index_type == "flat":
+                exact_faiss = retriever
+                if "flat" not in args.faiss_types:
+                    faiss_truth = [retriever.search(q, k)[0] for q in queries]
+                    continue
+            faiss[index_type] = retriever
+            for params in sweeps[index_type]:
+                nprobe, ef_search = params.get("nprobe"), params.get("ef_search")
+                single, ids = time_single(
+                    lambda q: retriever.search(q, k, nprobe, ef_search), queries, args.warmup
+                )
+                batch = time_batch(lambda qs: retriever.search_batch(qs, k, nprobe, ef_search), queries, args.batch_size)
+                if index_type == "flat":
+                    faiss_truth = ids
+                suffix = "".join(f"@{key}={value}" for key, value in params.items())
+                report(f"faiss/{index_type}{suffix}", build, single, batch, recall_at_k(ids, faiss_truth, k))
+
+        # Hybrid: pruned BM25 with each FAISS index, against exhaustive BM25 with flat FAISS
+        for fusion in args.fusion:
+            hybrid_args = dict(
+                fusion_method=fusion,
+                rrf_k=config.get("rrf_k", 60),
+                bm25_weight=config.get("bm25_weight", 0.5),
+                faiss_weight=config.get("faiss_weight", 0.5),
+                timeout_ms=None,
+                max_workers=2,
+            )
+            exact = HybridRetrieval("", "", bm25=bm25["exhaustive"], faiss=exact_faiss, **hybrid_args)
+            hybrid_truth = [exact.search(q, k)[0] for q in queries]
+            # close() would also close the shared BM25 and FAISS handles
+            exact._executor.shutdown()
+            for index_type, faiss_retriever in faiss.items():
+                hybrid = HybridRetrieval("", "", bm25=bm25["pruned"], faiss=faiss_retriever, **hybrid_args)
+                single, ids = time_single(lambda q: hybrid.search(q, k), queries, args.warmup)
+                batch = time_batch(lambda qs: hybrid.search_batch(qs, k), queries, args.batch_size)
+                hybrid._executor.shutdown()
+                report(f"hybrid/{fusion}/{index_type}", {}, single, batch, recall_at_k(ids, hybrid_truth, k))
+
+        for retriever in list(bm25.values()) + list(faiss.values()):
+            retriever.close()
+        if "flat" not in faiss:
+            exact_faiss.close()
+
+    output = {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "corpus": corpus,
+            "chunks": len(chunks),
+            "queries": len(queries),
+            "top_k": k,
+            "encoder": encoder.name,
+            "parse_seconds": round(parse_seconds, 3),
+            "embed_seconds": round(embed_seconds, 3),
+        },
+        "results": results,
+    }
+    path = Path(args.output) if args.output else RESULTS_DIR / f"retrieval-{time.strftime('%Y%m%dT%H%M%S')}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(output, f, indent=2)
+    print(f"results saved to {path}")
+
+
+def git_commit():
+    """Short commit hash of the working tree, None outside a git checkout."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=Path(__file__).parent
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# (metric path, higher is better) checked by compare
+COMPARED = [
+    (("single", "p50_ms"), False),
+    (("single", "p95_ms"), False),
+    (("single", "p99_ms"), False),
+    (("single", "qps"), True),
+    (("batch", "p95_ms"), False),
+    (("batch", "qps"), True),
+    (("build_seconds",), False),
+    (("index_bytes",), False),
+]
+
+
+def _metric(result, path):
+    for key in path:
+        if not isinstance(result, dict):
+            return None
+        result = result.get(key)
+    return result
+
+
+def compare(args):
+    """Print metric changes between two runs and exit non-zero on regressions."""
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    for key in ("corpus", "chunks", "queries", "top_k", "encoder"):
+        if baseline["meta"].get(key) != candidate["meta"].get(key):
+            print(f"warning: runs differ in {key}: {baseline['meta'].get(key)} vs {candidate['meta'].get(key)}")
+
+    regressions = []
+    for name in sorted(set(baseline["results"]) | set(candidate["results"])):
+        old, new = baseline["results"].get(name), candidate["results"].get(name)
+        if old is None or new is None:
+            print(f"{name}: only in {'candidate' if old is None else 'baseline'}")
+            continue
+        for path, higher_is_better in COMPARED:
+            before, after = _metric(old, path), _metric(new, path)
+            if not before or after is None:
+                continue
+            change = (after - before) / before
+            worse = -change if higher_is_better else change
+            flag = worse > args.max_slowdown
+            if flag:
+                regressions.append(f"{name} {'.'.join(path)}")
+            if flag or args.verbose:
+                print(f"{'REGRESSION' if flag else 'ok':<10} {name:<28} {'.'.join(path):<14} {before} -> {after} ({change:+.1%})")
+        before, after = old.get("recall_at_k"), new.get("recall_at_k")
+        if before is not None and after is not None:
+            flag = before - after > args.max_recall_drop
+            if flag:
+                regressions.append(f"{name} recall_at_k")
+            if flag or args.verbose:
+                print(f"{'REGRESSION' if flag else 'ok':<10} {name:<28} {'recall_at_k':<14} {before} -> {after}")
+
+    print(f"{len(regressions)} regressions")
+    sys.exit(1 if regressions else 0)
+
+
+def main():
+    """Main benchmark function."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Build indexes and time every configuration")
+    run_parser.add_argument("--config", default="config/config.yaml")
+    run_parser.add_argument("--corpus", choices=("synthetic", "pdfs"), default="synthetic")
+    run_parser.add_argument("--data-path", help="PDF directory, data_path from config by default")
+    run_parser.add_argument("--chunks", type=int, default=20000, help="Synthetic corpus size")
+    run_parser.add_argument("--encoder", choices=("hashing", "config"), default="hashing",
+                            help="hashing needs no model download; config uses the configured encoder")
+    run_parser.add_argument("--queries", type=int, default=500)
+    run_parser.add_argument("--warmup", type=int, default=50)
+    run_parser.add_argument("--top-k", type=int, default=10)
+    run_parser.add_argument("--batch-size", type=int, default=32)
+    run_parser.add_argument("--faiss-types", nargs="+", default=["flat", "ivf_flat", "ivf_pq", "hnsw"],
+                            choices=("flat", "ivf_flat", "ivf_pq", "hnsw"))
+    run_parser.add_argument("--nprobe", type=int, nargs="+", default=[4, 16, 64])
+    run_parser.add_argument("--ef-search", type=int, nargs="+", default=[16, 64, 128])
+    run_parser.add_argument("--fusion", nargs="+", default=["rrf", "weighted"], choices=("rrf", "weighted"))
+    run_parser.add_argument("--output", help=f"Results file, timestamped under {RESULTS_DIR} by default")
+
+    compare_parser = commands.add_parser("compare", help="Flag regressions of a run against a baseline")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("candidate")
+    compare_parser.add_argument("--max-slowdown", type=float, default=0.10,
+                                help="Tolerated relative worsening of latency, QPS, build time and size")
+    compare_parser.add_argument("--max-recall-drop", type=float, default=0.01,
+                                help="Tolerated absolute drop of recall@k")
+    compare_parser.add_argument("--verbose", action="store_true", help="Also print metrics within tolerance")
+
+    args = parser.parse_args()
+    if args.command == "run":
+        run(args)
+    else:
+        compare(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+"""
+End-to-end load test of the RAG API with a local LLM stand-in.
+
+This script:
+1. Builds a synthetic index generation with the hashing encoder in a
+   temporary directory and writes a config using the fake LLM provider,
+   with the given first-token and per-token latency medians, lognormal
+   jitter and error rate
+2. Starts uvicorn with N workers on that config (RAG_CONFIG), or with
+   --prefork the pre-fork launcher whose workers share indexes and model
+3. Drives /query, /query/stream or /query/batch at each target
+   concurrency (closed loop) or arrival rate (open loop, Poisson
+   arrivals, latency counted from the scheduled arrival)
+4. Reports throughput, latency percentiles, time to first token for
+   streaming, error rates by cause and the per-stage breakdown the API
+   returns with include_timings, per load level, then the unique (USS),
+   proportional (PSS) and resident memory of every server process, and
+   saves it as JSON
+
+Runs offline in one command, e.g.:
+    python benchmarks/load_test.py --workers 2 --concurrency 1 8 32 64
+    python benchmarks/load_test.py --workers 4 --prefork --chunks 50000
+    python benchmarks/load_test.py --endpoint stream --rate 20 50 100 --jitter 0.8
+    python benchmarks/load_test.py --url http://127.0.0.1:8000 --concurrency 16
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+import numpy as np
+import yaml
+
+ROOT = Path(__file__).parent.parent
+
+# Add project root and this directory to path
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from bench_retrieval import sample_queries, synthetic_corpus
+from config.loader import load_config
+from utils.memory import child_pids, process_memory
+
+
+def prepare_index(index_path: Path, chunks, dim: int):
+    """
+    Build and publish an index generation with the hashing encoder.
+
+    Args:
+        index_path: index_path of the served config
+        chunks: Chunks to index
+        dim: Hashing encoder dimension
+    """
+    from retrieval.bm25 import BM25Retrieval
+    from retrieval.encoders import HashingEncoder
+    from retrieval.faiss_store import FaissRetrieval
+    from retrieval.generations import GenerationStore
+
+    store = GenerationStore(str(index_path))
+    generation_id, path = store.new_generation()
+    texts = [c["text"] for c in chunks]
+    BM25Retrieval(str(path / "bm25")).build_index(texts, str(path / "bm25"))
+    encoder = HashingEncoder(dim)
+    FaissRetrieval(str(path / "faiss"), encoder=encoder).build_index(encoder.encode(texts), chunks, str(path / "faiss"))
+    store.publish(generation_id)
+
+
+def free_port() -> int:
+    """A TCP port nothing listens on right now."""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(config_path: Path, workers: int, log_path: Path, prefork: bool = False):
+    """
+    Start uvicorn, or scripts/serve.py with prefork, on a free port and wait for /health.
+
+    Returns:
+        Tuple of (process, base URL)
+    """
+    port = free_port()
+    log = open(log_path, "w")
+    if prefork:
+        command = [sys.executable, "scripts/serve.py", "--memory-interval", "0"]
+    else:
+        command = [sys.executable, "-m", "uvicorn", "api.routes:app", "--no-access-log"]
+    process = subprocess.Popen(
+        command + ["--host", "127.0.0.1", "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        cwd=ROOT,
+        env={**os.environ, "RAG_CONFIG": str(config_path)},
+        stdout=log,
+        stderr=subprocess.STDOUT
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 120
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"API server exited with {process.returncode}, see {log_path}")
+        try:
+            if httpx.get(f"{url}/health", timeout=1).status_code == 200:
+                return process, url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"API server did not become healthy, see {log_path}")
+
+
+class Sample:
+    """Outcome of one request."""
+
+    __slots__ = ("start", "latency_ms", "ttft_ms", "error", "timings", "queries")
+
+    def __init__(self, start: float, queries: int):
+        self.start = start
+        self.queries = queries
+        self.latency_ms = None
+        self.ttft_ms = None
+        self.error = None
+        self.timings = None
+
+
+async def send(client: httpx.AsyncClient, endpoint: str, queries, sample: Sample, scheduled: float):
+    """Send one request and fill in its sample; latency is measured from scheduled."""
+    try:
+        if endpoint == "stream":
+            body = {"query": queries[0], "include_timings": True}
+            async with client.stream("POST", "/query/stream", json=body) as response:
+                if response.status_code != 200:
+                    sample.error = f"http_{response.status_code}"
+                    return
+                event = None
+                async for line in response.aiter_lines():
+                    if line.startswith("event: "):
+                        event = line[7:]
+                        if event == "token" and sample.ttft_ms is None:
+                            sample.ttft_ms = (time.perf_counter() - scheduled) * 1000
+                    elif line.startswith("data: ") and event in ("done", "error"):
+                        data = json.loads(line[6:])
+                        if event == "error":
+                            sample.error = "stream_error"
+                        sample.timings = data.get("timings")
+        else:
+            path, body = ("/query", {"query": queries[0]}) if endpoint == "query" else ("/query/batch", {"queries": queries})
+            response = await client.post(path, json={**body, "include_timings": True})
+            if response.status_code != 200:
+                sample.error = f"http_{response.status_code}"
+                return
+            sample.timings = response.json().get("timings")
+    except httpx.TimeoutException:
+        sample.error = "timeout"
+    except httpx.HTTPError as e:
+        sample.error = type(e).__name__
+    finally:
+        sample.latency_ms = (time.perf_counter() - scheduled) * 1000
+
+
+async def run_level(url: str, endpoint: str, queries, batch_size: int, duration_s: float, warmup_s: float,
+                    concurrency: int = 0, rate: float = 0.0, timeout_s: float = 60.0, seed: int = 0):
+    """
+    Drive the API at one load level.
+
+    With concurrency, that many clients send back-to-back requests
+    (closed loop). With rate, requests arrive as a Poisson process
+    regardless of how fast the server answers (open loop).
+
+    Returns:
+        Samples of requests started after the warm-up, and the measured
+        window in seconds
+    """
+    rng = random.Random(seed)
+    per_request = batch_size if endpoint == "batch" else 1
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    samples = []
+    async with httpx.AsyncClient(base_url=url, timeout=timeout_s, limits=limits) as client:
+        begin = time.perf_counter()
+        measure_from = begin + warmup_s
+        deadline = measure_from + duration_s
+
+        def next_queries():
+            return [queries[rng.randrange(len(queries))] for _ in range(per_request)]
+
+        async def one(scheduled: float):
+            sample = Sample(scheduled, per_request)
+            await send(client, endpoint, next_queries(), sample, scheduled)
+            if scheduled >= measure_from:
+                samples.append(sample)
+
+        if concurrency:
+            async def user():
+                while time.perf_counter() < deadline:
+                    await one(time.perf_counter())
+            await asyncio.gather(*(user() for _ in range(concurrency)))
+        else:
+            tasks = []
+            scheduled = begin
+            while scheduled < deadline:
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                tasks.append(asyncio.create_task(one(scheduled)))
+                scheduled += rng.expovariate(rate)
+            await asyncio.gather(*tasks)
+        # Requests still running at the deadline are waited for and counted
+        window_s = max(time.perf_counter(), deadline) - measure_from
+    return samples, window_s
+
+
+def percentiles(values):
+    """p50/p90/p95/p99/max of a list of milliseconds."""
+    if not values:
+        return None
+    values = np.asarray(values)
+    return {
+        "p50_ms": round(float(np.percentile(values, 50)), 2),
+        "p90_ms": round(float(np.percentile(values, 90)), 2),
+        "p95_ms": round(float(np.percentile(values, 95)), 2),
+        "p99_ms": round(float(np.percentile(values, 99)), 2),
+        "max_ms": round(float(values.max()), 2),
+    }
+
+
+def summarize(samples, window_s: float):
+    """Throughput, latency, error and per-stage summary of one load level."""
+    ok = [s for s in samples if s.error is None]
+    errors = {}
+    for s in samples:
+        if s.error is not None:
+            errors[s.error] = errors.get(s.error, 0) + 1
+    stages = {}
+    for s in ok:
+        for stage, ms in (s.timings or {}).items():
+            stages.setdefault(stage, []).append(ms)
+    return {
+        "requests": len(samples),
+        "ok": len(ok),
+        "error_rate": round(1 - len(ok) / len(samples), 4) if samples else None,
+        "errors": errors,
+        "throughput_rps": round(len(ok) / window_s, 2),
+        "throughput_qps": round(sum(s.queries for s in ok) / window_s, 2),
+        "latency": percentiles([s.latency_ms for s in ok]),
+        "ttft": percentiles([s.ttft_ms for s in ok if s.ttft_ms is not None]),
+        "stages": {
+            stage: {"mean_ms": round(float(np.mean(ms)), 3), "p95_ms": round(float(np.percentile(ms, 95)), 3)}
+            for stage, ms in stages.items()
+        },
+    }
+
+
+def print_level(label: str, summary):
+    """One table row per load level."""
+    latency = summary["latency"] or {}
+    ttft = summary["ttft"] or {}
+    print(
+        f"{label:<14} {summary['throughput_rps']:>9.1f} {latency.get('p50_ms', float('nan')):>9.1f} "
+        f"{latency.get('p95_ms', float('nan')):>9.1f} {latency.get('p99_ms', float('nan')):>9.1f} "
+        f"{ttft.get('p95_ms', float('nan')):>9.1f} {summary['error_rate'] or 0:>7.2%}"
+    )
+
+
+def server_memory(pid: int):
+    """
+    Memory of a server process and its workers.
+
+    Returns:
+        One dict per process with pid, role and rss/pss/uss in bytes,
+        empty where /proc is not available
+    """
+    processes = [(pid, "master")] + [(child, "child") for child in child_pids(pid)]
+    report = []
+    for process_id, role in processes:
+        memory = process_memory(process_id)
+        if memory:
+            report.append({"pid": process_id, "role": role, **{k: memory[k] for k in ("rss", "pss", "uss")}})
+    return report
+
+
+def main():
+    """Main load test function."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", help="Load an already running API instead of starting one")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--prefork", action="store_true",
+                        help="Serve with scripts/serve.py, workers forked after loading shared indexes")
+    parser.add_argument("--endpoint", choices=("query", "stream", "batch"), default="query")
+    load = parser.add_mutually_exclusive_group()
+    load.add_argument("--concurrency", type=int, nargs="+", help="Closed-loop client counts, one level each")
+    load.add_argument("--rate", type=float, nargs="+", help="Open-loop arrival rates in requests/s, one level each")
+    parser.add_argument("--duration", type=float, default=20.0, help="Measured seconds per level")
+    parser.add_argument("--warmup", type=float, default=3.0, help="Unmeasured seconds before each level")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Client timeout per request in seconds")
+    parser.add_argument("--batch-size", type=int, default=8, help="Queries per /query/batch request")
+    parser.add_argument("--chunks", type=int, default=5000, help="Synthetic corpus size")
+    parser.add_argument("--queries", type=int, default=1000, help="Distinct queries sampled from the corpus")
+    parser.add_argument("--first-token-ms", type=float, default=300.0, help="Median fake time to first token")
+    parser.add_argument("--token-ms", type=float, default=20.0, help="Median fake delay between tokens")
+    parser.add_argument("--jitter", type=float, default=0.5, help="Lognormal sigma of every fake delay")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of fake LLM requests failing")
+    parser.add_argument("--caches", action="store_true", help="Keep query and answer caches on")
+    parser.add_argument("--config", default="config/config.yaml", help="Base config the overrides apply to")
+    parser.add_argument("--output", help="Save the report as JSON")
+    args = parser.parse_args()
+    levels = [("rate", r) for r in args.rate] if args.rate else [("concurrency", c) for c in args.concurrency or [1, 8, 32]]
+
+    chunks = synthetic_corpus(args.chunks)
+    queries = sample_queries(chunks, args.queries)
+    base = load_config(str(ROOT / args.config))
+    overrides = {
+        "llm_provider": "fake",
+        "llm_fake_first_token_ms": args.first_token_ms,
+        "llm_fake_token_ms": args.token_ms,
+        "llm_fake_jitter": args.jitter,
+        "llm_fake_error_rate": args.error_rate,
+        "embedding_encoder": "hashing",
+        "query_cache_enabled": args.caches,
+        "answer_cache_enabled": args.caches,
+        "answer_cache_path": "",
+        "log_level": "WARNING",
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        process = None
+        url = args.url
+        if url is None:
+            print(f"building index over {len(chunks)} synthetic chunks")
+            index_path = Path(tmp) / "index"
+            prepare_index(index_path, chunks, base.get("embedding_dim", 384))
+            config_path = Path(tmp) / "config.yaml"
+            with open(config_path, "w") as f:
+                yaml.safe_dump({**base, **overrides, "index_path": str(index_path)}, f)
+            process, url = start_server(config_path, args.workers, Path(tmp) / "server.log", args.prefork)
+            print(f"started {args.workers} {'pre-forked ' if args.prefork else ''}worker(s) at {url}")
+
+        report = {
+            "meta": {
+                "url": args.url,
+                "workers": None if args.url else args.workers,
+                "prefork": None if args.url else args.prefork,
+                "cpus": os.cpu_count(),
+                "endpoint": args.endpoint,
+                "batch_size": args.batch_size if args.endpoint == "batch" else None,
+                "duration_s": args.duration,
+                "fake_llm": None if args.url else {
+                    key[len("llm_fake_"):]: value for key, value in overrides.items() if key.startswith("llm_fake_")
+                },
+                "caches": args.caches,
+            },
+            "levels": [],
+        }
+        print(f"{'level':<14} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'ttft p95':>9} {'errors':>7}")
+        try:
+            for kind, value in levels:
+                samples, window_s = asyncio.run(run_level(
+                    url, args.endpoint, queries, args.batch_size, args.duration, args.warmup,
+                    concurrency=int(value) if kind == "concurrency" else 0,
+                    rate=value if kind == "rate" else 0.0,
+                    timeout_s=args.timeout
+                ))
+                summary = summarize(samples, window_s)
+                report["levels"].append({kind: value, **summary})
+                print_level(f"{kind[0]}={value:g}", summary)
+            if process is not None:
+                report["memory"] = server_memory(process.pid)
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait(timeout=30)
+
+    # Stage means of the most loaded level show where the time went
+    last = report["levels"][-1]["stages"] if report["levels"] else {}
+    if last:
+        print("stages at the last level (mean / p95 ms):")
+        for stage, stats in last.items():
+            print(f"  {stage:<24} {stats['mean_ms']:>9.2f} {stats['p95_ms']:>9.2f}")
+    if report.get("memory"):
+        # uss is what each extra worker costs; pss sums to the real total
+        print("server memory (uss / pss / rss MiB):")
+        for memory in report["memory"]:
+            print(f"  {memory['role']:<6} {memory['pid']:>7} "
+                  + " ".join(f"{memory[k] / 2**20:>9.1f}" for k in ("uss", "pss", "rss")))
+        print(f"  total pss {sum(m['pss'] for m in report['memory']) / 2**20:.1f} MiB")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"report saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
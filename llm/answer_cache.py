@@ -0,0 +1,381 @@
+"""Semantic cache of generated answers, keyed on query similarity and grounding context."""
+import io
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from retrieval.cache import normalize_query
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+FORMAT_VERSION = 1
+
+
+class _Entry:
+    """One cached answer and the query it was generated for."""
+
+    __slots__ = ("context", "query", "vector", "result", "expires_at")
+
+    def __init__(
+        self,
+        context: Tuple[str, Tuple[int, ...]],
+        query: str,
+        vector: Optional[np.ndarray],
+        result: Dict[str, Any],
+        expires_at: Optional[float]
+    ):
+        self.context = context
+        self.query = query
+        self.vector = vector
+        self.result = result
+        self.expires_at = expires_at
+
+
+def context_key(chunks: List[Dict[str, Any]]) -> Optional[Tuple[int, ...]]:
+    """
+    Identity of the grounding context built from retrieved chunks.
+
+    Order matters: it sets the passage numbers the answer cites.
+
+    Args:
+        chunks: Retrieved chunks with metadata
+
+    Returns:
+        Chunk ids in rank order, or None when a chunk has no id
+    """
+    ids = tuple(chunk.get("chunk_id") for chunk in chunks)
+    if not ids or any(chunk_id is None for chunk_id in ids):
+        return None
+    return tuple(int(chunk_id) for chunk_id in ids)
+
+
+class SemanticAnswerCache:
+    """
+    Thread-safe LRU cache of generated answers with time-to-live.
+
+    An answer is served again only for exactly the same grounding context:
+    the same index generation and the same retrieved chunk ids in the same
+    order. Within a context, a query hits when it normalizes to a cached
+    query or its embedding is within ``similarity`` (cosine) of one, so
+    paraphrases that retrieve the same passages share one LLM call.
+
+    Entries are grouped by context, so a lookup compares the query against
+    the few entries sharing its context rather than the whole cache. When
+    a new index generation shows up, entries of older generations are
+    dropped and late requests still on an older generation bypass the
+    cache.
+
+    With a path, the cache is loaded at startup and saved by save(). The
+    file records the LLM namespace (provider, model, sampling settings)
+    and is ignored when it no longer matches.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl_seconds: Optional[float] = 3600,
+        similarity: float = 0.95,
+        path: Optional[str] = None,
+        namespace: str = ""
+    ):
+        """
+        Initialize cache.
+
+        Args:
+            maxsize: Maximum number of cached answers
+            ttl_seconds: Answer lifetime, None keeps answers until evicted
+            similarity: Minimum cosine similarity of query embeddings for a hit
+            path: .npz file the cache is persisted to, None keeps it in memory
+            namespace: Identity of the LLM settings that produced the answers
+        """
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self.similarity = similarity
+        self.path = Path(path) if path else None
+        self.namespace = namespace
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._contexts: Dict[Tuple[str, Tuple[int, ...]], List[int]] = {}
+        self._next_id = 0
+        self._generation: Optional[str] = None
+        self._retired: set = set()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+        if self.path is not None:
+            self.load()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], namespace: str = "") -> Optional["SemanticAnswerCache"]:
+        """
+        Create a cache from the loaded YAML configuration.
+
+        Args:
+            config: Configuration dict
+            namespace: Identity of the LLM settings that produce the answers
+
+        Returns:
+            Configured SemanticAnswerCache, or None when disabled
+        """
+        if not config.get("answer_cache_enabled", True):
+            return None
+        return cls(
+            maxsize=config.get("answer_cache_size", 1024),
+            ttl_seconds=config.get("answer_cache_ttl_seconds", 3600),
+            similarity=config.get("answer_cache_similarity", 0.95),
+            path=config.get("answer_cache_path") or None,
+            namespace=namespace
+        )
+
+    def _observe(self, generation: str) -> bool:
+        """
+        Track the newest index generation. Lock must be held.
+
+        Returns:
+            False for a generation that has already been replaced
+        """
+        if generation == self._generation:
+            return True
+        if generation in self._retired:
+            return False
+        if self._generation is not None:
+            self._retired.add(self._generation)
+        self._generation = generation
+        stale = [entry_id for entry_id, entry in self._entries.items() if entry.context[0] != generation]
+        for entry_id in stale:
+            self._remove(entry_id)
+        if stale:
+            self.invalidations += len(stale)
+            logger.info(f"Answer cache dropped {len(stale)} answers of older index generations")
+        return True
+
+    def _remove(self, entry_id: int):
+        """Remove one entry. Lock must be held."""
+        entry = self._entries.pop(entry_id)
+        ids = self._contexts[entry.context]
+        ids.remove(entry_id)
+        if not ids:
+            del self._contexts[entry.context]
+
+    def _add(self, entry: _Entry):
+        """Insert an entry, evicting the least recently used when full. Lock must be held."""
+        entry_id = self._next_id
+        self._next_id += 1
+        self._entries[entry_id] = entry
+        self._contexts.setdefault(entry.context, []).append(entry_id)
+        while len(self._entries) > self.maxsize:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def get(
+        self,
+        query: str,
+        chunks: List[Dict[str, Any]],
+        generation: str,
+        query_vector: Optional[np.ndarray] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Look up an answer generated from the same context for a similar query.
+
+        Args:
+            query: User query
+            chunks: Retrieved chunks the answer would be grounded in
+            generation: Index generation the chunks were retrieved from
+            query_vector: L2-normalized query embedding, without it only
+                queries that normalize identically hit
+
+        Returns:
+            Copy of the cached result with 'similarity', or None on a miss
+        """
+        ids = context_key(chunks)
+        if ids is None:
+            return None
+        context = (generation, ids)
+        text = normalize_query(query)
+        now = time.time()
+        with self._lock:
+            if not self._observe(generation):
+                self.misses += 1
+                return None
+            best_id, best_similarity = None, -1.0
+            for entry_id in list(self._contexts.get(context, ())):
+                entry = self._entries[entry_id]
+                if entry.expires_at is not None and entry.expires_at <= now:
+                    self._remove(entry_id)
+                    self.expirations += 1
+                    continue
+                if entry.query == text:
+                    similarity = 1.0
+                elif query_vector is not None and entry.vector is not None:
+                    similarity = float(np.dot(entry.vector, query_vector))
+                else:
+                    continue
+                if similarity > best_similarity:
+                    best_id, best_similarity = entry_id, similarity
+            if best_id is None or best_similarity < self.similarity:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(best_id)
+            self.hits += 1
+            if best_similarity < 1.0:
+                self.similar_hits += 1
+            result = dict(self._entries[best_id].result)
+        result["similarity"] = best_similarity
+        return result
+
+    def put(
+        self,
+        query: str,
+        chunks: List[Dict[str, Any]],
+        generation: str,
+        result: Dict[str, Any],
+        query_vector: Optional[np.ndarray] = None
+    ):
+        """
+        Cache an answer generated from retrieved chunks.
+
+        Args:
+            query: User query
+            chunks: Retrieved chunks the answer is grounded in
+            generation: Index generation the chunks were retrieved from
+            result: Generation result with 'answer' and 'citations'
+            query_vector: L2-normalized query embedding
+        """
+        ids = context_key(chunks)
+        if ids is None or self.maxsize <= 0:
+            return
+        vector = None
+        if query_vector is not None:
+            vector = np.array(query_vector, dtype=np.float32)
+            vector.setflags(write=False)
+        expires_at = time.time() + self.ttl_seconds if self.ttl_seconds else None
+        entry = _Entry(
+            (generation, ids),
+            normalize_query(query),
+            vector,
+            {"answer": result["answer"], "citations": result["citations"]},
+            expires_at
+        )
+        with self._lock:
+            if self._observe(generation):
+                self._add(entry)
+
+    def clear(self):
+        """Drop all answers, keeping counters."""
+        with self._lock:
+            self._entries.clear()
+            self._contexts.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Snapshot of cache counters.
+
+        Returns:
+            Dict with size, capacity, hits (of which similar_hits matched a
+            paraphrase), misses, hit_rate, evictions, expirations and
+            invalidations by newer index generations
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "similar_hits": self.similar_hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+    def save(self):
+        """
+        Write unexpired answers to the cache file, replacing it atomically.
+
+        Workers sharing a path each save their own cache; the last one to
+        save wins.
+        """
+        if self.path is None:
+            return
+        now = time.time()
+        with self._lock:
+            entries = [
+                e for e in self._entries.values()
+                if (e.expires_at is None or e.expires_at > now)
+                and (self._generation is None or e.context[0] == self._generation)
+            ]
+        dim = next((e.vector.shape[0] for e in entries if e.vector is not None), 0)
+        vectors = np.zeros((len(entries), dim), dtype=np.float32)
+        records = []
+        for row, entry in enumerate(entries):
+            has_vector = entry.vector is not None and entry.vector.shape[0] == dim
+            if has_vector:
+                vectors[row] = entry.vector
+            records.append({
+                "generation": entry.context[0],
+                "chunk_ids": list(entry.context[1]),
+                "query": entry.query,
+                "has_vector": has_vector,
+                "result": entry.result,
+                "expires_at": entry.expires_at,
+            })
+        meta = {"version": FORMAT_VERSION, "namespace": self.namespace, "entries": records}
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        with open(tmp, "wb") as f:
+            np.savez(f, vectors=vectors, meta=np.array(json.dumps(meta)))
+        os.replace(tmp, self.path)
+        logger.info(f"Saved {len(records)} cached answers to {self.path}")
+
+    def load(self):
+        """Load answers saved by save(), skipping expired ones and other namespaces."""
+        if self.path is None or not self.path.exists():
+            return
+        try:
+            with open(self.path, "rb") as f:
+                data = np.load(io.BytesIO(f.read()), allow_pickle=False)
+                vectors = data["vectors"]
+                meta = json.loads(str(data["meta"]))
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable answer cache {self.path}: {e}")
+            return
+        if meta.get("version") != FORMAT_VERSION or meta.get("namespace") != self.namespace:
+            logger.info(f"Ignoring answer cache {self.path} written for other LLM settings")
+            return
+
+        now = time.time()
+        loaded = 0
+        with self._lock:
+            for row, record in enumerate(meta["entries"]):
+                expires_at = record["expires_at"]
+                if expires_at is not None and expires_at <= now:
+                    continue
+                vector = None
+                if record["has_vector"]:
+                    vector = vectors[row].copy()
+                    vector.setflags(write=False)
+                self._add(_Entry(
+                    (record["generation"], tuple(record["chunk_ids"])),
+                    record["query"],
+                    vector,
+                    record["result"],
+                    expires_at
+                ))
+                loaded += 1
+        logger.info(f"Loaded {loaded} cached answers from {self.path}")
@@ -1,52 +1,289 @@
-from typing import List, Dict, Any, Optional
+"""LLM client module."""
+import asyncio
+import hashlib
+import os
+import time
+from typing import AsyncIterator, List, Dict, Any, Optional
 from enum import Enum
 
+from .context import ContextPacker
+from .fake import FakeLLM
+from .providers import ADAPTERS, LLMError
+from .transport import ProviderTransport
 from utils.logger import get_logger
+from utils.tracing import record, span
 
 logger = get_logger(__name__)
 
+SYSTEM_PROMPT = (
+    "You answer questions about the Winter Garden, FL Code of Ordinances. "
+    "Use only the numbered context passages. Cite the passages supporting "
+    "each statement as [n]. If the context does not answer the question, say so."
+)
+
+NO_CONTEXT_ANSWER = "No relevant ordinance sections were found for this question."
+
 
 class LLMProvider(str, Enum):
     """Supported LLM providers."""
     OPENAI = "openai"
     ANTHROPIC = "anthropic"
     OLLAMA = "ollama"
+    FAKE = "fake"
+
+
+def format_context(chunks: List[Dict[str, Any]]) -> str:
+    """
+    Number retrieved chunks as context passages.
+
+    Args:
+        chunks: Retrieved chunks with metadata
+
+    Returns:
+        Passages as "[n] pdf_file, page p" followed by the chunk text
+    """
+    return "\n\n".join(
+        f"[{n}] {chunk.get('pdf_file', 'unknown')}, page {chunk.get('page', '?')}\n{chunk['text']}"
+        for n, chunk in enumerate(chunks, start=1)
+    )
+
+
+def format_citations(chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Citation entries matching the passage numbers of format_context().
+
+    Passages packed by ContextPacker also carry the ids of their merged
+    chunks, each chunk's span in the passage text and the near-duplicate
+    chunks they stand in for.
+
+    Args:
+        chunks: Retrieved chunks or packed passages with metadata
+
+    Returns:
+        List of citations with the passage number and chunk location
+    """
+    citations = []
+    for n, chunk in enumerate(chunks, start=1):
+        citation = {
+            "id": n,
+            "chunk_id": chunk.get("chunk_id"),
+            "pdf_file": chunk.get("pdf_file"),
+            "page": chunk.get("page"),
+            "char_start": chunk.get("char_start"),
+            "char_end": chunk.get("char_end"),
+            "score": chunk.get("score"),
+        }
+        for key in ("chunk_ids", "spans", "duplicates"):
+            if key in chunk:
+                citation[key] = chunk[key]
+        citations.append(citation)
+    return citations
 
 
 class LLMClient:
     """
     Generic LLM client wrapper.
-    
-    TODO: Implement provider-specific backends.
+
+    Answers are streamed from the provider's chat API through a pooled,
+    rate-limited ProviderTransport shared by all requests. The async
+    methods are for use inside the API's event loop; generate() and
+    generate_with_citations() run them to completion for scripts.
     """
-    
+
     def __init__(
         self,
         provider: LLMProvider = LLMProvider.OPENAI,
         model_name: str = "gpt-4o-mini",
         temperature: float = 0.1,
-        api_key: Optional[str] = None
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        max_tokens: int = 500,
+        timeout_s: float = 60.0,
+        fake: Optional[FakeLLM] = None,
+        transport: Optional[ProviderTransport] = None,
+        packer: Optional[ContextPacker] = None
     ):
         """
         Initialize LLM client.
-        
+
         Args:
             provider: LLM provider to use
             model_name: Model identifier
             temperature: Sampling temperature
-            api_key: API key (if required)
+            api_key: API key (if required), read from the provider's
+                environment variable when omitted
+            base_url: Provider endpoint, the public API when omitted
+            max_tokens: Default maximum tokens in response
+            timeout_s: HTTP timeout per read, used when no transport is given
+            fake: Fake provider settings for LLMProvider.FAKE
+            transport: HTTP transport to the provider, a default one for
+                base_url when omitted
+            packer: Context packer applied to retrieved chunks, chunks are
+                sent as they are when omitted
         """
-        self.provider = provider
+        self.provider = LLMProvider(provider)
         self.model_name = model_name
         self.temperature = temperature
-        self.api_key = api_key
-        
-        logger.info(f"LLMClient initialized with provider: {provider}, model: {model_name}")
-        
-        # TODO: Initialize provider-specific client
-        # if provider == LLMProvider.OPENAI:
-        #     self.client = OpenAI(api_key=api_key)
-    
+        self.max_tokens = max_tokens
+        self.timeout_s = timeout_s
+        self.fake = fake or FakeLLM()
+        self.packer = packer
+        self.adapter = ADAPTERS[self.provider.value]() if self.provider != LLMProvider.FAKE else None
+        if self.adapter is not None:
+            env = self.adapter.api_key_env
+            self.api_key = api_key or (os.environ.get(env) if env else None)
+            self.base_url = (base_url or self.adapter.default_base_url).rstrip("/")
+            self.transport = transport or ProviderTransport(self.base_url, timeout_s=timeout_s)
+        else:
+            self.api_key = api_key
+            self.base_url = base_url
+            self.transport = None
+
+        logger.info(f"LLMClient initialized with provider: {self.provider.value}, model: {model_name}")
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "LLMClient":
+        """
+        Create a client from the loaded YAML configuration.
+
+        Args:
+            config: Configuration dict
+
+        Returns:
+            Configured LLMClient
+        """
+        provider = LLMProvider(config.get("llm_provider", "openai"))
+        transport = None
+        if provider != LLMProvider.FAKE:
+            base_url = config.get("llm_base_url") or ADAPTERS[provider.value].default_base_url
+            transport = ProviderTransport.from_config(config, base_url.rstrip("/"))
+        return cls(
+            provider=provider,
+            model_name=config.get("llm_model_name", "gpt-4o-mini"),
+            temperature=config.get("temperature", 0.1),
+            api_key=config.get("llm_api_key") or None,
+            base_url=config.get("llm_base_url") or None,
+            max_tokens=config.get("llm_max_tokens", 500),
+            timeout_s=config.get("llm_timeout_s", 60.0),
+            fake=FakeLLM(
+                first_token_ms=config.get("llm_fake_first_token_ms", 0.0),
+                token_ms=config.get("llm_fake_token_ms", 0.0),
+                jitter=config.get("llm_fake_jitter", 0.0),
+                error_rate=config.get("llm_fake_error_rate", 0.0)
+            ),
+            transport=transport,
+            packer=ContextPacker.from_config(config)
+        )
+
+    async def stream(
+        self,
+        context: str,
+        query: str,
+        max_tokens: Optional[int] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream an answer based on context and query.
+
+        Args:
+            context: Retrieved context
+            query: User query
+            max_tokens: Maximum tokens in response
+
+        Yields:
+            Answer text fragments as the provider produces them
+
+        Raises:
+            LLMError: The provider rejected the request or failed mid-stream
+        """
+        max_tokens = max_tokens or self.max_tokens
+        user = f"Context:\n{context}\n\nQuestion: {query}"
+
+        if self.adapter is None:
+            async for token in self.fake.stream(SYSTEM_PROMPT, user, max_tokens):
+                yield token
+            return
+
+        path, body = self.adapter.request(self.model_name, SYSTEM_PROMPT, user, self.temperature, max_tokens)
+        headers = self.adapter.headers(self.api_key)
+        lines = self.transport.stream_lines(path, body, headers)
+        try:
+            async for line in lines:
+                token = self.adapter.parse_line(line)
+                if token:
+                    yield token
+        finally:
+            # Release the connection and concurrency slot even when the
+            # consumer stops early
+            await lines.aclose()
+
+    @property
+    def cache_namespace(self) -> str:
+        """Identity of the settings that shape answers, for caching them."""
+        prompt = hashlib.sha1(SYSTEM_PROMPT.encode()).hexdigest()[:8]
+        packing = (
+            f"{self.packer.max_tokens}/{self.packer.dedup_threshold}" if self.packer is not None else "none"
+        )
+        return f"{self.provider.value}:{self.model_name}:{self.temperature}:{self.max_tokens}:{prompt}:{packing}"
+
+    def pack(self, chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Passages sent to the provider for retrieved chunks.
+
+        Args:
+            chunks: Retrieved chunks with metadata
+
+        Returns:
+            Packed passages, or the chunks themselves without a packer
+        """
+        return self.packer.pack(chunks) if self.packer is not None else chunks
+
+    def stats(self) -> Dict[str, Any]:
+        """Transport counters, empty for the fake provider."""
+        return self.transport.stats() if self.transport is not None else {}
+
+    async def aclose(self):
+        """Close pooled provider connections."""
+        if self.transport is not None:
+            await self.transport.aclose()
+
+    def _run(self, coro) -> Any:
+        """Run coro in a new event loop, closing the connections bound to it before it ends."""
+        async def run_and_close():
+            try:
+                return await coro
+            finally:
+                await self.aclose()
+
+        return asyncio.run(run_and_close())
+
+    async def agenerate(
+        self,
+        context: str,
+        query: str,
+        max_tokens: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Generate a complete answer, timing the first token.
+
+        Args:
+            context: Retrieved context
+            query: User query
+            max_tokens: Maximum tokens in response
+
+        Returns:
+            Dict with 'answer' and 'ttft_ms'
+        """
+        start = time.perf_counter_ns()
+        ttft_ns = None
+        parts = []
+        with span("generation"):
+            async for token in self.stream(context, query, max_tokens):
+                if ttft_ns is None:
+                    ttft_ns = time.perf_counter_ns() - start
+                    record("generation.first_token", ttft_ns, start)
+                parts.append(token)
+        return {"answer": "".join(parts), "ttft_ms": ttft_ns / 1e6 if ttft_ns is not None else None}
+
     def generate(
         self,
         context: str,
@@ -55,49 +292,65 @@ class LLMClient:
     ) -> str:
         """
         Generate answer based on context and query.
-        
+
+        Blocks until the answer is complete; use stream() or agenerate()
+        inside an event loop.
+
         Args:
             context: Retrieved context
             query: User query
             max_tokens: Maximum tokens in response
-        
+
         Returns:
             Generated answer
-        
-        TODO: Implement generation logic for each provider.
-        """
-        logger.info(f"Generating answer for query: {query}")
-        
-        # TODO: Build prompt
-        # TODO: Call provider API
-        # TODO: Parse and return response
-        
-        return "TODO: Implement LLM generation"
-    
-    def generate_with_citations(
+        """
+        logger.info("Generating answer for query: %s", query)
+        return self._run(self.agenerate(context, query, max_tokens))["answer"]
+
+    async def agenerate_with_citations(
         self,
         chunks: List[Dict[str, Any]],
         query: str
     ) -> Dict[str, Any]:
         """
         Generate answer with citations.
-        
+
+        Without retrieved chunks there is nothing to ground an answer in,
+        so the provider is not called. Chunks are packed into passages
+        first; citations refer to the passages.
+
         Args:
             chunks: Retrieved chunks with metadata
             query: User query
-        
+
         Returns:
-            Dict with 'answer' and 'citations'
-        
-        TODO: Implement citation-aware generation.
-        """
-        logger.info(f"Generating answer with citations for query: {query}")
-        
-        # TODO: Format context from chunks
-        # TODO: Generate answer
-        # TODO: Extract and format citations
-        
-        return {
-            "answer": "TODO: Implement",
-            "citations": []
-        }
+            Dict with 'answer', 'citations', 'ttft_ms' and the 'passages'
+            the answer was generated from
+        """
+        logger.info("Generating answer with citations for query: %s", query)
+        if not chunks:
+            return {"answer": NO_CONTEXT_ANSWER, "citations": [], "ttft_ms": None, "passages": []}
+
+        with span("context"):
+            passages = self.pack(chunks)
+        result = await self.agenerate(format_context(passages), query)
+        result["citations"] = format_citations(passages)
+        result["passages"] = passages
+        return result
+
+    def generate_with_citations(
+        self,
+        chunks: List[Dict[str, Any]],
+        query: str
+    ) -> Dict[str, Any]:
+        """
+        Generate answer with citations, blocking until it is complete.
+
+        Args:
+            chunks: Retrieved chunks with metadata
+            query: User query
+
+        Returns:
+            Dict with 'answer', 'citations', 'ttft_ms' and 'passages'
+        """
+        return self._run(self.agenerate_with_citations(chunks, query))
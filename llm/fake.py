@@ -0,0 +1,94 @@
+"""Local stand-in for an LLM provider, for tests, benchmarks and offline runs."""
+import asyncio
+import random
+import re
+from typing import AsyncIterator, List, Optional
+
+from .providers import LLMError
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_PASSAGE = re.compile(r"^\[(\d+)\][^\n]*\n([^\n]+)", re.MULTILINE)
+_TOKEN = re.compile(r"\S+\s*")
+
+
+class FakeLLM:
+    """
+    Streams an extractive answer built from the prompt's context passages.
+
+    The answer quotes the first sentence of the first passage and cites it,
+    so it is grounded by construction. Latency is simulated with a delay
+    before the first token and between tokens, optionally drawn from a
+    lognormal distribution around those medians, and a share of requests
+    can fail like a provider error; no network or model is used.
+    """
+
+    def __init__(
+        self,
+        first_token_ms: float = 0.0,
+        token_ms: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        seed: Optional[int] = None
+    ):
+        """
+        Initialize fake provider.
+
+        Args:
+            first_token_ms: Median delay before the first token
+            token_ms: Median delay between tokens
+            jitter: Sigma of the lognormal factor applied to every delay,
+                0 is constant (1.0 gives a p99 about 10x the median)
+            error_rate: Share of requests failing with LLMError before
+                the first token
+            seed: Random seed for reproducible delays and errors
+        """
+        self.first_token_ms = first_token_ms
+        self.token_ms = token_ms
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+
+    def _delay_s(self, median_ms: float) -> float:
+        factor = self.rng.lognormvariate(0, self.jitter) if self.jitter else 1.0
+        return median_ms * factor / 1000
+
+    @staticmethod
+    def answer(user: str) -> str:
+        """Answer the fake produces for a user prompt."""
+        match = _PASSAGE.search(user)
+        if match is None:
+            return "The provided context does not answer this question."
+        number, text = match.groups()
+        sentence = re.split(r"(?<=[.;:])\s", text.strip(), maxsplit=1)[0]
+        return f"According to the ordinance text, {sentence} [{number}]"
+
+    @classmethod
+    def tokens(cls, user: str) -> List[str]:
+        """Answer split into word tokens that concatenate back to it."""
+        return _TOKEN.findall(cls.answer(user))
+
+    async def stream(self, system: str, user: str, max_tokens: int) -> AsyncIterator[str]:
+        """
+        Stream the answer word by word.
+
+        Args:
+            system: System prompt (ignored)
+            user: User prompt with numbered context passages
+            max_tokens: Maximum words streamed
+
+        Yields:
+            Answer tokens
+
+        Raises:
+            LLMError: For the emulated share of failing requests
+        """
+        if self.first_token_ms:
+            await asyncio.sleep(self._delay_s(self.first_token_ms))
+        if self.error_rate and self.rng.random() < self.error_rate:
+            raise LLMError("Emulated provider error from the fake LLM")
+        for i, token in enumerate(self.tokens(user)[:max_tokens]):
+            if i and self.token_ms:
+                await asyncio.sleep(self._delay_s(self.token_ms))
+            yield token
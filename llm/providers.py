@@ -0,0 +1,165 @@
+"""Wire formats of the streaming chat APIs of each LLM provider."""
+import json
+from typing import Dict, Any, Optional, Tuple
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class LLMError(RuntimeError):
+    """Raised when a provider rejects a request or fails mid-stream."""
+
+
+def _decode(data: str, provider: str) -> Dict[str, Any]:
+    """Parse the JSON of one stream event, raising LLMError on malformed data."""
+    try:
+        return json.loads(data)
+    except ValueError as e:
+        raise LLMError(f"Malformed {provider} stream line ({e}): {data[:200]!r}")
+
+
+class OpenAIAdapter:
+    """
+    OpenAI chat completions with ``stream: true``.
+
+    The response is server-sent events whose data lines carry
+    ``choices[0].delta.content`` and end with ``data: [DONE]``.
+    """
+
+    default_base_url = "https://api.openai.com"
+    api_key_env = "OPENAI_API_KEY"
+
+    def headers(self, api_key: Optional[str]) -> Dict[str, str]:
+        """Authentication headers."""
+        if not api_key:
+            raise LLMError(f"No API key configured, set llm_api_key or {self.api_key_env}")
+        return {"Authorization": f"Bearer {api_key}"}
+
+    def request(
+        self,
+        model: str,
+        system: str,
+        user: str,
+        temperature: float,
+        max_tokens: int
+    ) -> Tuple[str, Dict[str, Any]]:
+        """Return (path, JSON body) of a streaming request."""
+        return "/v1/chat/completions", {
+            "model": model,
+            "messages": [
+                {"role": "system", "content": system},
+                {"role": "user", "content": user},
+            ],
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "stream": True,
+        }
+
+    def parse_line(self, line: str) -> Optional[str]:
+        """Text carried by one response line, or None."""
+        if not line.startswith("data:"):
+            return None
+        data = line[5:].strip()
+        if data == "[DONE]":
+            return None
+        event = _decode(data, "OpenAI")
+        if "error" in event:
+            raise LLMError(f"OpenAI stream error: {event['error']}")
+        choices = event.get("choices") or [{}]
+        return choices[0].get("delta", {}).get("content") or None
+
+
+class AnthropicAdapter:
+    """
+    Anthropic messages API with ``stream: true``.
+
+    Text arrives in ``content_block_delta`` events as ``delta.text``.
+    """
+
+    default_base_url = "https://api.anthropic.com"
+    api_key_env = "ANTHROPIC_API_KEY"
+
+    def headers(self, api_key: Optional[str]) -> Dict[str, str]:
+        """Authentication headers."""
+        if not api_key:
+            raise LLMError(f"No API key configured, set llm_api_key or {self.api_key_env}")
+        return {"x-api-key": api_key, "anthropic-version": "2023-06-01"}
+
+    def request(
+        self,
+        model: str,
+        system: str,
+        user: str,
+        temperature: float,
+        max_tokens: int
+    ) -> Tuple[str, Dict[str, Any]]:
+        """Return (path, JSON body) of a streaming request."""
+        return "/v1/messages", {
+            "model": model,
+            "system": system,
+            "messages": [{"role": "user", "content": user}],
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "stream": True,
+        }
+
+    def parse_line(self, line: str) -> Optional[str]:
+        """Text carried by one response line, or None."""
+        if not line.startswith("data:"):
+            return None
+        event = _decode(line[5:].strip(), "Anthropic")
+        if event.get("type") == "error":
+            raise LLMError(f"Anthropic stream error: {event.get('error')}")
+        if event.get("type") == "content_block_delta":
+            return event.get("delta", {}).get("text") or None
+        return None
+
+
+class OllamaAdapter:
+    """
+    Ollama chat API, which streams newline-delimited JSON objects with
+    ``message.content`` until one has ``done: true``.
+    """
+
+    default_base_url = "http://localhost:11434"
+    api_key_env = None
+
+    def headers(self, api_key: Optional[str]) -> Dict[str, str]:
+        """Authentication headers, a local Ollama server needs none."""
+        return {}
+
+    def request(
+        self,
+        model: str,
+        system: str,
+        user: str,
+        temperature: float,
+        max_tokens: int
+    ) -> Tuple[str, Dict[str, Any]]:
+        """Return (path, JSON body) of a streaming request."""
+        return "/api/chat", {
+            "model": model,
+            "messages": [
+                {"role": "system", "content": system},
+                {"role": "user", "content": user},
+            ],
+            "options": {"temperature": temperature, "num_predict": max_tokens},
+            "stream": True,
+        }
+
+    def parse_line(self, line: str) -> Optional[str]:
+        """Text carried by one response line, or None."""
+        if not line.strip():
+            return None
+        event = _decode(line, "Ollama")
+        if "error" in event:
+            raise LLMError(f"Ollama stream error: {event['error']}")
+        return event.get("message", {}).get("content") or None
+
+
+ADAPTERS = {
+    "openai": OpenAIAdapter,
+    "anthropic": AnthropicAdapter,
+    "ollama": OllamaAdapter,
+}
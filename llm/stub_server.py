@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Local stub of the OpenAI, Anthropic and Ollama streaming chat endpoints.
+
+Emulates provider latency (time to first token, per-token delay, lognormal
+jitter) and failures (error rate, failing or slow first requests), so the
+transport's retries, hedging and rate limiting can be exercised and load
+tested without network access.
+
+Usage:
+    python -m llm.stub_server --port 8081 --first-token-ms 300 --error-rate 0.05
+    # then set llm_base_url: "http://127.0.0.1:8081" in config.yaml
+"""
+import argparse
+import asyncio
+import json
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import AsyncIterator, Callable, Iterator, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from .fake import FakeLLM
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def _openai_events(tokens):
+    for token in tokens:
+        yield f"data: {json.dumps({'choices': [{'index': 0, 'delta': {'content': token}}]})}\n\n"
+    yield "data: [DONE]\n\n"
+
+
+def _anthropic_events(tokens):
+    yield f"event: message_start\ndata: {json.dumps({'type': 'message_start'})}\n\n"
+    for token in tokens:
+        delta = {"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": token}}
+        yield f"event: content_block_delta\ndata: {json.dumps(delta)}\n\n"
+    yield f"event: message_stop\ndata: {json.dumps({'type': 'message_stop'})}\n\n"
+
+
+def _ollama_events(tokens):
+    for token in tokens:
+        yield json.dumps({"message": {"role": "assistant", "content": token}, "done": False}) + "\n"
+    yield json.dumps({"done": True}) + "\n"
+
+
+class StubProvider:
+    """
+    Behaviour of the stub endpoints.
+
+    Counters (requests, active, max_active, client_ports) are updated as
+    requests arrive so tests can assert on concurrency and connection reuse.
+    """
+
+    def __init__(
+        self,
+        first_token_ms: float = 50.0,
+        token_ms: float = 5.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        retry_after_s: Optional[float] = None,
+        fail_first: int = 0,
+        slow_first: int = 0,
+        slow_ms: float = 0.0,
+        seed: Optional[int] = None
+    ):
+        """
+        Initialize stub behaviour.
+
+        Args:
+            first_token_ms: Median delay before the first token
+            token_ms: Median delay between tokens
+            jitter: Sigma of the lognormal factor applied to every delay, 0 is constant
+            error_rate: Share of requests answered with error_status
+            error_status: HTTP status of emulated failures
+            retry_after_s: Retry-After header sent with failures
+            fail_first: The first N requests fail
+            slow_first: The first N requests get slow_ms extra before the first token
+            slow_ms: Extra delay for slow requests
+            seed: Random seed for reproducible jitter and errors
+        """
+        self.first_token_ms = first_token_ms
+        self.token_ms = token_ms
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after_s = retry_after_s
+        self.fail_first = fail_first
+        self.slow_first = slow_first
+        self.slow_ms = slow_ms
+        self.rng = random.Random(seed)
+        self.requests = 0
+        self.active = 0
+        self.max_active = 0
+        self.client_ports = set()
+
+    def _delay_s(self, median_ms: float) -> float:
+        factor = self.rng.lognormvariate(0, self.jitter) if self.jitter else 1.0
+        return median_ms * factor / 1000
+
+    def _handler(self, format_events: Callable, media_type: str):
+        async def handle(request: Request):
+            n = self.requests
+            self.requests += 1
+            if request.client is not None:
+                self.client_ports.add(request.client.port)
+            body = await request.json()
+
+            if n < self.fail_first or self.rng.random() < self.error_rate:
+                headers = {"Retry-After": str(self.retry_after_s)} if self.retry_after_s is not None else {}
+                return JSONResponse(
+                    {"error": {"type": "stub_error", "message": f"Emulated HTTP {self.error_status}"}},
+                    status_code=self.error_status,
+                    headers=headers
+                )
+
+            first_token_s = self._delay_s(self.first_token_ms)
+            if n < self.slow_first:
+                first_token_s += self.slow_ms / 1000
+            tokens = FakeLLM.tokens(body["messages"][-1]["content"])
+
+            async def events() -> AsyncIterator[str]:
+                self.active += 1
+                self.max_active = max(self.max_active, self.active)
+                try:
+                    await asyncio.sleep(first_token_s)
+                    for i, event in enumerate(format_events(tokens)):
+                        if i:
+                            await asyncio.sleep(self._delay_s(self.token_ms))
+                        yield event
+                finally:
+                    self.active -= 1
+
+            return StreamingResponse(events(), media_type=media_type)
+
+        return handle
+
+    def app(self) -> FastAPI:
+        """ASGI app serving the three providers' chat endpoints."""
+        app = FastAPI(title="LLM provider stub")
+        app.post("/v1/chat/completions")(self._handler(_openai_events, "text/event-stream"))
+        app.post("/v1/messages")(self._handler(_anthropic_events, "text/event-stream"))
+        app.post("/api/chat")(self._handler(_ollama_events, "application/x-ndjson"))
+        return app
+
+
+@contextmanager
+def serve(stub: StubProvider, host: str = "127.0.0.1", port: int = 0) -> Iterator[str]:
+    """
+    Run the stub on a background thread.
+
+    Args:
+        stub: Stub behaviour
+        host: Bind address
+        port: Bind port, 0 picks a free one
+
+    Yields:
+        Base URL of the running stub
+    """
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(stub.app(), host=host, port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, name="llm-stub", daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 10
+    while not server.started:
+        if not thread.is_alive() or time.monotonic() > deadline:
+            raise RuntimeError("LLM stub server failed to start")
+        time.sleep(0.01)
+    bound_port = server.servers[0].sockets[0].getsockname()[1]
+    try:
+        yield f"http://{host}:{bound_port}"
+    finally:
+        server.should_exit = True
+        thread.join(timeout=10)
+
+
+def main():
+    """Run the stub server in the foreground."""
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--first-token-ms", type=float, default=300.0)
+    parser.add_argument("--token-ms", type=float, default=20.0)
+    parser.add_argument("--jitter", type=float, default=0.3, help="Lognormal sigma of every delay")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--retry-after-s", type=float, default=None)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    stub = StubProvider(
+        first_token_ms=args.first_token_ms,
+        token_ms=args.token_ms,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        retry_after_s=args.retry_after_s,
+        seed=args.seed
+    )
+    logger.info(f"LLM provider stub listening on http://{args.host}:{args.port}")
+    uvicorn.run(stub.app(), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,376 @@
+"""Pooled, rate-limited HTTP transport for streaming LLM provider calls."""
+import asyncio
+import random
+import time
+from typing import TYPE_CHECKING, AsyncIterator, Callable, Dict, Any, Optional
+
+from .providers import LLMError
+from utils.logger import get_logger
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = get_logger(__name__)
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504, 529}
+
+
+class _Retryable(Exception):
+    """An attempt failed in a way worth retrying."""
+
+    def __init__(self, detail: str, retry_after_s: Optional[float] = None):
+        super().__init__(detail)
+        self.retry_after_s = retry_after_s
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter for async callers.
+
+    Holds up to ``burst`` tokens and refills at ``rate_per_s``. A rate of
+    0 disables limiting.
+    """
+
+    def __init__(self, rate_per_s: float, burst: int = 1):
+        """
+        Initialize bucket.
+
+        Args:
+            rate_per_s: Refill rate, 0 for unlimited
+            burst: Bucket capacity
+        """
+        self.rate_per_s = rate_per_s
+        self.burst = max(burst, 1)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate_per_s)
+        self._updated = now
+
+    def try_acquire(self) -> bool:
+        """Take a token if one is available right now."""
+        if self.rate_per_s <= 0:
+            return True
+        self._refill()
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        return False
+
+    async def acquire(self) -> float:
+        """
+        Take a token, waiting for the refill if needed.
+
+        Returns:
+            Seconds spent waiting
+        """
+        waited = 0.0
+        while not self.try_acquire():
+            delay = (1 - self._tokens) / self.rate_per_s
+            await asyncio.sleep(delay)
+            waited += delay
+        return waited
+
+
+class _Attempt:
+    """One open streaming response and the concurrency slot it holds."""
+
+    def __init__(self, semaphore: asyncio.Semaphore):
+        self.semaphore = semaphore
+        self.response: Optional["httpx.Response"] = None
+        self.lines: Optional[AsyncIterator[str]] = None
+        self.first_line: Optional[str] = None
+        self._released = False
+
+    async def close(self):
+        if self.response is not None:
+            await self.response.aclose()
+        if not self._released:
+            self._released = True
+            self.semaphore.release()
+
+
+class ProviderTransport:
+    """
+    Async HTTP transport for one LLM provider endpoint.
+
+    Requests from all callers share one ``httpx.AsyncClient``, so TCP and
+    TLS connections are kept alive and reused. Per provider:
+        - a semaphore caps concurrent streams,
+        - a token bucket caps the request rate,
+        - 429/5xx responses and connection errors are retried with full
+          jitter exponential backoff, honouring Retry-After,
+        - an attempt with no first byte after hedge_after_ms is hedged with
+          a duplicate request when a slot and a rate token are free right
+          away; the first to respond wins and the other is cancelled.
+
+    Retries and hedges happen only before the first byte is streamed to
+    the caller. The client and semaphore are bound to the event loop that
+    first uses them and recreated for a new loop; the previous client is
+    closed, so close the transport before its loop ends (LLMClient's
+    blocking methods do).
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        max_connections: int = 32,
+        max_concurrency: int = 16,
+        rate_per_s: float = 0.0,
+        burst: int = 1,
+        max_retries: int = 3,
+        backoff_base_ms: float = 200.0,
+        backoff_max_ms: float = 5000.0,
+        hedge_after_ms: float = 0.0,
+        timeout_s: float = 60.0
+    ):
+        """
+        Initialize transport.
+
+        Args:
+            base_url: Provider endpoint
+            max_connections: Connection pool size
+            max_concurrency: Concurrent streams
+            rate_per_s: Requests per second, 0 for unlimited
+            burst: Requests allowed at once before rate limiting applies
+            max_retries: Retries after the first attempt
+            backoff_base_ms: Backoff ceiling of the first retry, doubled per retry
+            backoff_max_ms: Largest backoff ceiling
+            hedge_after_ms: Time without a first byte before hedging, 0 disables
+            timeout_s: Connect and read timeout
+        """
+        self.base_url = base_url
+        self.max_connections = max_connections
+        self.max_concurrency = max_concurrency
+        self.bucket = TokenBucket(rate_per_s, burst)
+        self.max_retries = max_retries
+        self.backoff_base_ms = backoff_base_ms
+        self.backoff_max_ms = backoff_max_ms
+        self.hedge_after_ms = hedge_after_ms
+        self.timeout_s = timeout_s
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._client: Optional["httpx.AsyncClient"] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._stats = {
+            "requests": 0,
+            "attempts": 0,
+            "retries": 0,
+            "hedges": 0,
+            "hedge_wins": 0,
+            "rate_limited_s": 0.0,
+            "errors": 0,
+        }
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], base_url: str) -> "ProviderTransport":
+        """
+        Create a transport from the loaded YAML configuration.
+
+        Args:
+            config: Configuration dict
+            base_url: Provider endpoint
+
+        Returns:
+            Configured ProviderTransport
+        """
+        return cls(
+            base_url,
+            max_connections=config.get("llm_max_connections", 32),
+            max_concurrency=config.get("llm_max_concurrency", 16),
+            rate_per_s=config.get("llm_rate_limit_per_s", 0.0),
+            burst=config.get("llm_rate_limit_burst", 1),
+            max_retries=config.get("llm_max_retries", 3),
+            backoff_base_ms=config.get("llm_backoff_base_ms", 200.0),
+            backoff_max_ms=config.get("llm_backoff_max_ms", 5000.0),
+            hedge_after_ms=config.get("llm_hedge_after_ms", 0.0),
+            timeout_s=config.get("llm_timeout_s", 60.0)
+        )
+
+    async def _bind(self):
+        """Create the client and semaphore for the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        # Imported on first use, workers using the fake provider never load it
+        import httpx
+
+        old_client, old_loop = self._client, self._loop
+        self._loop = loop
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=self.timeout_s,
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_connections
+            )
+        )
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        if old_client is not None:
+            await self._close_client(old_client, old_loop)
+
+    @staticmethod
+    async def _close_client(client: "httpx.AsyncClient", loop: Optional[asyncio.AbstractEventLoop]):
+        """Close the client of a previous event loop, on that loop while it still runs."""
+        if loop is not None and loop.is_running():
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+            return
+        try:
+            await client.aclose()
+        except RuntimeError as e:
+            # Its loop is closed, the sockets can no longer be shut down cleanly
+            logger.warning(f"Could not close LLM connections of a finished event loop: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Request, retry and hedge counters."""
+        stats = dict(self._stats)
+        stats["rate_limited_s"] = round(stats["rate_limited_s"], 3)
+        return stats
+
+    def _backoff_s(self, retry: int, retry_after_s: Optional[float]) -> float:
+        """Full jitter backoff before a retry, at least Retry-After."""
+        ceiling = min(self.backoff_max_ms, self.backoff_base_ms * 2 ** retry) / 1000
+        return max(random.uniform(0, ceiling), retry_after_s or 0.0)
+
+    async def _open(self, make_request: Callable[[], "httpx.Request"], attempt: _Attempt) -> _Attempt:
+        """Send a request and read up to its first line. The slot is already held."""
+        import httpx
+
+        self._stats["attempts"] += 1
+        try:
+            try:
+                attempt.response = await self._client.send(make_request(), stream=True)
+            except httpx.TransportError as e:
+                raise _Retryable(f"{type(e).__name__}: {e}")
+            status = attempt.response.status_code
+            if status != 200:
+                detail = (await attempt.response.aread()).decode(errors="replace")[:500]
+                if status in RETRYABLE_STATUS:
+                    retry_after = attempt.response.headers.get("retry-after")
+                    try:
+                        retry_after_s = float(retry_after) if retry_after else None
+                    except ValueError:
+                        retry_after_s = None
+                    raise _Retryable(f"HTTP {status}: {detail}", retry_after_s)
+                raise LLMError(f"HTTP {status}: {detail}")
+            attempt.lines = attempt.response.aiter_lines()
+            try:
+                attempt.first_line = await attempt.lines.__anext__()
+            except StopAsyncIteration:
+                attempt.first_line = None
+            except httpx.TransportError as e:
+                raise _Retryable(f"{type(e).__name__}: {e}")
+            return attempt
+        except BaseException:
+            await attempt.close()
+            raise
+
+    async def _open_hedged(self, make_request: Callable[[], "httpx.Request"]) -> _Attempt:
+        """Open a request, hedging it once if the first byte is slow."""
+        await self._semaphore.acquire()
+        primary = asyncio.ensure_future(self._open(make_request, _Attempt(self._semaphore)))
+        hedge: Optional[asyncio.Future] = None
+        winner: Optional[asyncio.Future] = None
+        try:
+            if self.hedge_after_ms > 0:
+                done, _ = await asyncio.wait({primary}, timeout=self.hedge_after_ms / 1000)
+                if not done and not self._semaphore.locked() and self.bucket.try_acquire():
+                    await self._semaphore.acquire()
+                    self._stats["hedges"] += 1
+                    hedge = asyncio.ensure_future(self._open(make_request, _Attempt(self._semaphore)))
+            if hedge is None:
+                attempt = await primary
+                winner = primary
+                return attempt
+
+            pending = {primary, hedge}
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        error = task.exception()
+                    elif winner is None:
+                        winner = task
+                if winner is not None:
+                    if winner is hedge:
+                        self._stats["hedge_wins"] += 1
+                    return winner.result()
+            raise error
+        finally:
+            # Also reached when the caller is cancelled mid-wait: cancel or
+            # close every attempt that is not returned, releasing its slot
+            for task in (primary, hedge):
+                if task is None or task is winner:
+                    continue
+                task.cancel()
+                try:
+                    loser = await task
+                except BaseException:
+                    continue
+                await loser.close()
+
+    async def stream_lines(
+        self,
+        path: str,
+        body: Dict[str, Any],
+        headers: Dict[str, str]
+    ) -> AsyncIterator[str]:
+        """
+        POST a streaming request and yield the response lines.
+
+        Args:
+            path: Request path under the base URL
+            body: JSON body
+            headers: Request headers
+
+        Yields:
+            Response lines
+
+        Raises:
+            LLMError: Non-retryable error status, or retries exhausted
+        """
+        import httpx
+
+        await self._bind()
+        self._stats["requests"] += 1
+
+        def make_request() -> "httpx.Request":
+            return self._client.build_request("POST", path, json=body, headers=headers)
+
+        attempt = None
+        for retry in range(self.max_retries + 1):
+            self._stats["rate_limited_s"] += await self.bucket.acquire()
+            try:
+                attempt = await self._open_hedged(make_request)
+                break
+            except _Retryable as e:
+                if retry == self.max_retries:
+                    self._stats["errors"] += 1
+                    raise LLMError(f"Giving up after {retry + 1} attempts: {e}")
+                delay = self._backoff_s(retry, e.retry_after_s)
+                self._stats["retries"] += 1
+                logger.warning(f"LLM request failed ({e}), retrying in {delay * 1000:.0f}ms")
+                await asyncio.sleep(delay)
+            except LLMError:
+                self._stats["errors"] += 1
+                raise
+
+        try:
+            if attempt.first_line is not None:
+                yield attempt.first_line
+                async for line in attempt.lines:
+                    yield line
+        except httpx.TransportError as e:
+            self._stats["errors"] += 1
+            raise LLMError(f"Stream interrupted: {type(e).__name__}: {e}")
+        finally:
+            await attempt.close()
+
+    async def aclose(self):
+        """Close pooled connections of the current event loop's client."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._loop = None
@@ -0,0 +1,117 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Iterable, List, Dict, Any, Optional
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def file_sha256(path: str) -> str:
+    """
+    Content hash of a file.
+
+    Args:
+        path: File path
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ParseCache:
+    """
+    Content-addressed cache of parser output on disk.
+
+    Two levels are kept so a chunking change does not redo extraction:
+        pages/<sha256>-v<version>.json                     - page texts
+        chunks/<sha256>-v<version>-<size>-<overlap>.json   - chunks
+
+    Entries are immutable and written through a temporary file and a
+    rename, so parser processes can share one cache without locking.
+    """
+
+    def __init__(self, cache_path: str, version: int, refresh: bool = False):
+        """
+        Initialize cache.
+
+        Args:
+            cache_path: Cache directory
+            version: Parser version, part of every key
+            refresh: Ignore existing entries and overwrite them
+        """
+        self.cache_path = Path(cache_path)
+        self.version = version
+        self.refresh = refresh
+        (self.cache_path / "pages").mkdir(parents=True, exist_ok=True)
+        (self.cache_path / "chunks").mkdir(parents=True, exist_ok=True)
+
+    def _pages_file(self, sha256: str) -> Path:
+        return self.cache_path / "pages" / f"{sha256}-v{self.version}.json"
+
+    def _chunks_file(self, sha256: str, chunk_size: int, chunk_overlap: int) -> Path:
+        return self.cache_path / "chunks" / f"{sha256}-v{self.version}-{chunk_size}-{chunk_overlap}.json"
+
+    def _read(self, path: Path) -> Optional[Any]:
+        if self.refresh or not path.exists():
+            return None
+        try:
+            with open(path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable parse cache entry {path}: {e}")
+            return None
+
+    def _write(self, path: Path, value: Any):
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp, "w") as f:
+            json.dump(value, f)
+        os.replace(tmp, path)
+
+    def get_pages(self, sha256: str) -> Optional[List[str]]:
+        """Cached page texts of a file, or None."""
+        return self._read(self._pages_file(sha256))
+
+    def put_pages(self, sha256: str, pages: List[str]):
+        """Store page texts of a file."""
+        self._write(self._pages_file(sha256), pages)
+
+    def get_chunks(self, sha256: str, chunk_size: int, chunk_overlap: int) -> Optional[List[Dict[str, Any]]]:
+        """Cached chunks of a file for one chunk setting, or None."""
+        return self._read(self._chunks_file(sha256, chunk_size, chunk_overlap))
+
+    def put_chunks(self, sha256: str, chunk_size: int, chunk_overlap: int, chunks: List[Dict[str, Any]]):
+        """Store chunks of a file for one chunk setting."""
+        self._write(self._chunks_file(sha256, chunk_size, chunk_overlap), chunks)
+
+    def gc(self, live_hashes: Iterable[str]) -> int:
+        """
+        Delete entries for files that no longer exist or older parser versions.
+
+        Args:
+            live_hashes: Content hashes of the current source files
+
+        Returns:
+            Number of entries removed
+        """
+        live = set(live_hashes)
+        removed = 0
+        for entry in list(self.cache_path.glob("pages/*.json")) + list(self.cache_path.glob("chunks/*.json")):
+            sha256, _, rest = entry.stem.partition("-v")
+            version = rest.split("-", 1)[0]
+            if sha256 not in live or version != str(self.version):
+                entry.unlink()
+                removed += 1
+        # Temporary files left behind by interrupted writers
+        for tmp in self.cache_path.glob("*/*.tmp"):
+            tmp.unlink()
+            removed += 1
+        logger.info(f"Parse cache GC removed {removed} entries from {self.cache_path}")
+        return removed
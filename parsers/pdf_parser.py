@@ -1,65 +1,284 @@
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import Iterator, List, Dict, Any, Optional, Tuple
 
+from .cache import ParseCache, file_sha256
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Bumped whenever extraction or chunking output changes
+PARSER_VERSION = 1
+
+
+def _timed_parse(parser: "PDFParser", pdf_path: str) -> Tuple[List[Dict[str, Any]], float]:
+    """Process pool entry point, parses one file and reports its wall time."""
+    start = time.perf_counter()
+    chunks = parser.parse(pdf_path)
+    return chunks, time.perf_counter() - start
+
 
 class PDFParser:
     """
     PDF document parser.
-    
-    TODO: Implement PDF parsing with PyPDF2 or similar.
+
+    Text is extracted page by page with pypdf and split into overlapping
+    character windows that break on whitespace. Chunks never span pages,
+    so every chunk carries the page it came from.
     """
-    
-    def __init__(self, chunk_size: int = 500, chunk_overlap: int = 50):
+
+    def __init__(
+        self,
+        chunk_size: int = 500,
+        chunk_overlap: int = 50,
+        workers: int = 0,
+        max_in_flight: int = 0,
+        cache: Optional[ParseCache] = None
+    ):
         """
         Initialize PDF parser.
-        
+
         Args:
-            chunk_size: Size of text chunks
-            chunk_overlap: Overlap between chunks
+            chunk_size: Size of text chunks in characters
+            chunk_overlap: Overlap between chunks in characters
+            workers: Processes used by parse_directory, 0 uses every CPU and
+                1 parses in the calling process
+            max_in_flight: Files submitted but not yet consumed, bounds memory
+                held by finished results; 0 uses twice the worker count
+            cache: Parse cache consulted by parse(), keyed by file content
         """
+        if chunk_overlap >= chunk_size:
+            raise ValueError(f"chunk_overlap={chunk_overlap} must be smaller than chunk_size={chunk_size}")
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
-        logger.info(f"PDFParser initialized (chunk_size={chunk_size})")
-    
+        self.workers = workers or os.cpu_count() or 1
+        self.max_in_flight = max_in_flight or 2 * self.workers
+        self.cache = cache
+        self.timings: Dict[str, float] = {}
+        self.failures: Dict[str, str] = {}
+        logger.info(f"PDFParser initialized (chunk_size={chunk_size}, workers={self.workers})")
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], refresh_cache: bool = False) -> "PDFParser":
+        """
+        Create a parser from the loaded YAML configuration.
+
+        Args:
+            config: Configuration dict
+            refresh_cache: Ignore cached results and overwrite them
+
+        Returns:
+            Configured PDFParser
+        """
+        cache = None
+        if config.get("parse_cache_enabled", True):
+            cache = ParseCache(
+                config.get("parse_cache_path", "./data/cache/parse/"),
+                PARSER_VERSION,
+                refresh=refresh_cache
+            )
+        return cls(
+            chunk_size=config.get("chunk_size", 500),
+            chunk_overlap=config.get("chunk_overlap", 50),
+            workers=config.get("parse_workers", 0),
+            max_in_flight=config.get("parse_max_in_flight", 0),
+            cache=cache
+        )
+
+    def __getstate__(self):
+        # Per-run bookkeeping stays in the parent process
+        state = self.__dict__.copy()
+        state["timings"] = {}
+        state["failures"] = {}
+        return state
+
+    def extract_pages(self, pdf_path: str) -> List[str]:
+        """
+        Extract the text of every page.
+
+        Args:
+            pdf_path: Path to PDF file
+
+        Returns:
+            Page texts in page order
+        """
+        from pypdf import PdfReader
+
+        reader = PdfReader(pdf_path)
+        return [page.extract_text() or "" for page in reader.pages]
+
+    def split_text(self, text: str) -> List[Tuple[int, int, str]]:
+        """
+        Split text into overlapping windows on whitespace boundaries.
+
+        Args:
+            text: Whitespace-normalized text
+
+        Returns:
+            List of (char_start, char_end, chunk_text)
+        """
+        windows = []
+        start = 0
+        while start < len(text):
+            end = min(start + self.chunk_size, len(text))
+            if end < len(text):
+                cut = text.rfind(" ", start + 1, end)
+                if cut > start:
+                    end = cut
+            windows.append((start, end, text[start:end]))
+            if end >= len(text):
+                break
+            next_start = max(end - self.chunk_overlap, start + 1)
+            # Start the overlap on a word boundary when one is available
+            if text[next_start - 1] != " ":
+                space = text.find(" ", next_start, end)
+                if space != -1:
+                    next_start = space + 1
+            start = next_start
+        return windows
+
     def parse(self, pdf_path: str) -> List[Dict[str, Any]]:
         """
         Parse PDF into chunks with metadata.
-        
+
+        With a cache, chunks for the same file content and chunk settings
+        are reused, and page text is reused across chunk settings.
+
         Args:
             pdf_path: Path to PDF file
-        
+
         Returns:
-            List of chunks with metadata
-        
-        TODO: Implement PDF parsing and chunking.
-        """
-        logger.info(f"Parsing PDF: {pdf_path}")
-        
-        # TODO: Extract text from PDF
-        # TODO: Split into chunks
-        # TODO: Add metadata (page_num, pdf_file, etc.)
-        
-        return []
-    
-    def parse_directory(self, dir_path: str) -> List[Dict[str, Any]]:
+            List of chunks with text, pdf_file, page (1-based),
+            chunk_index, char_start and char_end
+        """
+        if self.cache is None:
+            logger.info(f"Parsing PDF: {pdf_path}")
+            return self.chunk_pages(Path(pdf_path).name, self.extract_pages(pdf_path))
+
+        sha256 = file_sha256(pdf_path)
+        chunks = self.cache.get_chunks(sha256, self.chunk_size, self.chunk_overlap)
+        if chunks is not None:
+            # Cached under the content hash; the file may have been renamed
+            pdf_file = Path(pdf_path).name
+            for chunk in chunks:
+                chunk["pdf_file"] = pdf_file
+            return chunks
+
+        pages = self.cache.get_pages(sha256)
+        if pages is None:
+            logger.info(f"Parsing PDF: {pdf_path}")
+            pages = self.extract_pages(pdf_path)
+            self.cache.put_pages(sha256, pages)
+        chunks = self.chunk_pages(Path(pdf_path).name, pages)
+        self.cache.put_chunks(sha256, self.chunk_size, self.chunk_overlap, chunks)
+        return chunks
+
+    def chunk_pages(self, pdf_file: str, pages: List[str]) -> List[Dict[str, Any]]:
+        """
+        Split extracted pages into chunks with metadata.
+
+        Args:
+            pdf_file: File name recorded on each chunk
+            pages: Page texts in page order
+
+        Returns:
+            List of chunks, see parse()
+        """
+        chunks = []
+        for page_num, page_text in enumerate(pages, start=1):
+            text = " ".join(page_text.split())
+            for char_start, char_end, chunk_text in self.split_text(text):
+                chunks.append({
+                    "text": chunk_text,
+                    "pdf_file": pdf_file,
+                    "page": page_num,
+                    "chunk_index": len(chunks),
+                    "char_start": char_start,
+                    "char_end": char_end,
+                })
+        return chunks
+
+    def parse_files(self, pdf_paths: List[str]) -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+        """
+        Parse files across a process pool, yielding results in input order.
+
+        At most max_in_flight files are submitted ahead of the consumer, so
+        memory held by finished but unconsumed results stays bounded. A file
+        that fails to parse is logged, recorded in failures and skipped.
+        Per-file wall times are recorded in timings.
+
+        Args:
+            pdf_paths: Paths to PDF files
+
+        Yields:
+            Tuple of (pdf_path, chunks) for every file that parsed
+        """
+        self.timings = {}
+        self.failures = {}
+        if self.workers <= 1:
+            for path in pdf_paths:
+                try:
+                    chunks, seconds = _timed_parse(self, str(path))
+                except Exception as e:
+                    self._record_failure(str(path), e)
+                    continue
+                self._record_timing(str(path), len(chunks), seconds)
+                yield str(path), chunks
+            return
+
+        paths = iter(str(p) for p in pdf_paths)
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            in_flight = deque()
+            for path in paths:
+                in_flight.append((path, executor.submit(_timed_parse, self, path)))
+                if len(in_flight) >= self.max_in_flight:
+                    break
+            while in_flight:
+                path, future = in_flight.popleft()
+                next_path = next(paths, None)
+                if next_path is not None:
+                    in_flight.append((next_path, executor.submit(_timed_parse, self, next_path)))
+                try:
+                    chunks, seconds = future.result()
+                except Exception as e:
+                    self._record_failure(path, e)
+                    continue
+                self._record_timing(path, len(chunks), seconds)
+                yield path, chunks
+
+    def _record_timing(self, path: str, n_chunks: int, seconds: float):
+        """Log and keep the parse time of one file."""
+        self.timings[path] = seconds
+        logger.info(f"Parsed {Path(path).name}: {n_chunks} chunks in {seconds:.2f}s")
+
+    def _record_failure(self, path: str, error: Exception):
+        """Log and keep a parse failure without aborting the run."""
+        self.failures[path] = f"{type(error).__name__}: {error}"
+        logger.error(f"Failed to parse {path}, skipping: {self.failures[path]}")
+
+    def parse_directory(self, dir_path: str) -> Iterator[Dict[str, Any]]:
         """
         Parse all PDFs in directory.
-        
+
+        Files are parsed in parallel but chunks are yielded in sorted file
+        order, so the output is deterministic and never held in full.
+
         Args:
             dir_path: Path to directory containing PDFs
-        
-        Returns:
-            List of all chunks from all PDFs
-        
-        TODO: Implement directory parsing.
+
+        Yields:
+            Chunks from all PDFs that parsed
         """
         logger.info(f"Parsing directory: {dir_path}")
-        
-        all_chunks = []
-        # TODO: Iterate over PDFs and parse each
-        
-        return all_chunks
+        pdf_paths = sorted(Path(dir_path).glob("*.pdf"))
+        n_chunks = 0
+        for _, chunks in self.parse_files(pdf_paths):
+            n_chunks += len(chunks)
+            yield from chunks
+        logger.info(
+            f"Parsed {len(pdf_paths) - len(self.failures)} of {len(pdf_paths)} PDFs "
+            f"into {n_chunks} chunks ({len(self.failures)} failed)"
+        )
@@ -0,0 +1,150 @@
+import asyncio
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def _bucket(value: int) -> int:
+    """Smallest power of two >= value, used as a histogram bucket bound."""
+    bound = 1
+    while bound < value:
+        bound *= 2
+    return bound
+
+
+class MicroBatcher:
+    """
+    Dynamic micro-batching scheduler for async callers.
+
+    Concurrent ``submit`` calls are queued; a dispatcher task collects them
+    for up to ``max_wait_ms`` after the first one arrives, or until
+    ``max_batch_size`` items are waiting, then runs ``fn`` once over the
+    whole batch in a worker thread and resolves each caller's future with
+    its own result. Batches run one at a time, so requests arriving during
+    a forward pass form the next batch instead of competing for the CPU.
+    """
+
+    def __init__(
+        self,
+        fn: Callable[[List[Any]], Sequence[Any]],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        name: str = "batcher"
+    ):
+        """
+        Initialize batcher.
+
+        Args:
+            fn: Blocking function mapping a list of items to a list of results
+            max_batch_size: Maximum items per call to fn
+            max_wait_ms: Maximum time the first item of a batch waits for company
+            name: Name used in logs and stats
+        """
+        self.fn = fn
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.name = name
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.batches = 0
+        self.items = 0
+        self.batch_size_histogram: Counter = Counter()
+        self.queue_depth_histogram: Counter = Counter()
+
+    def _ensure_started(self):
+        """Start the dispatcher on the running loop, restarting if the loop changed."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._task is None or self._task.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._task = loop.create_task(self._dispatch())
+
+    async def submit(self, item: Any) -> Any:
+        """
+        Queue one item and wait for its result.
+
+        Args:
+            item: Input for fn
+
+        Returns:
+            The result fn produced for this item
+        """
+        self._ensure_started()
+        future = self._loop.create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    async def _collect(self) -> List[tuple]:
+        """Wait for the first item, then gather more until full or timed out."""
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.max_wait_ms / 1000.0
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _dispatch(self):
+        """Dispatcher loop, runs until cancelled."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            # Backlog when the batch closed: this batch plus whatever queued behind it
+            self.queue_depth_histogram[_bucket(len(batch) + self._queue.qsize())] += 1
+            self.batch_size_histogram[_bucket(len(batch))] += 1
+            self.batches += 1
+            self.items += len(batch)
+
+            items = [item for item, _ in batch]
+            try:
+                results = await loop.run_in_executor(None, self.fn, items)
+            except Exception as e:
+                logger.error(f"{self.name} batch of {len(batch)} failed: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (_, future), result in zip(batch, results):
+                # A caller that was cancelled no longer wants its result
+                if not future.done():
+                    future.set_result(result)
+
+    async def close(self):
+        """Stop the dispatcher task."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Snapshot of scheduler counters.
+
+        Histograms are keyed by power-of-two upper bounds ("le" buckets).
+
+        Returns:
+            Dict with queue depth, batch counts and histograms
+        """
+        return {
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": self.items / self.batches if self.batches else 0.0,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+            "batch_size_histogram": {str(k): v for k, v in sorted(self.batch_size_histogram.items())},
+            "queue_depth_histogram": {str(k): v for k, v in sorted(self.queue_depth_histogram.items())},
+        }
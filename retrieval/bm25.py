@@ -1,53 +1,783 @@
-from typing import List, Dict, Any
+import json
+import os
+import re
+import uuid
+from collections import Counter
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
 
+import numpy as np
+
+from .cache import LRUCache, freeze, get_cache, normalize_query
+from . import shared as shared_artefacts
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# On-disk format version, bumped whenever the file layout changes
+FORMAT_VERSION = 2
+
+# Legal text keeps section numbers such as "18-123" or "5.2" as one token
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[-.][a-z0-9]+)*")
+
+_TF_MAX = np.iinfo(np.uint16).max
+
+# Slack applied to stored upper bounds so float32 rounding at query time can
+# never push a real contribution above its bound
+_BOUND_SLACK = np.float32(1.0 + 1e-5)
+
+# Per-index arrays, each stored as <name>.npy and held as self._<name>
+_ARRAYS = (
+    "offsets", "doc_ids", "tfs", "doc_lens", "idf", "term_max",
+    "block_offsets", "block_max", "block_last_doc",
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercase and split text into BM25 terms.
+
+    Args:
+        text: Raw text
+
+    Returns:
+        List of terms
+    """
+    return _TOKEN_RE.findall(text.lower())
+
 
 class BM25Retrieval:
     """
-    BM25-based retrieval implementation.
-    
-    TODO: Implement BM25 ranking using rank-bm25 library.
+    BM25-based retrieval over a memory-mapped inverted index.
+
+    The index directory holds:
+        meta.json     - corpus statistics and BM25 parameters
+        vocab.json    - term dictionary (term -> term id)
+        offsets.npy   - int64 CSR row pointers, one row per term
+        doc_ids.npy   - int32 posting doc ids, sorted within each term
+        tfs.npy       - uint16 term frequencies aligned with doc_ids
+        doc_lens.npy  - int32 document lengths in terms
+        idf.npy       - float32 precomputed idf per term
+        term_max.npy  - float32 max score contribution per term
+        block_offsets.npy, block_max.npy, block_last_doc.npy
+                      - per-block score upper bounds over fixed-size runs
+                        of each posting list (block-max metadata)
+
+    Array files are opened with ``np.load(mmap_mode="r")`` so load time and
+    resident memory do not grow with the number of postings. Chunk ids
+    removed by update_index stay allocated as holes with no postings.
+
+    Queries run in one of two modes that return identical rankings:
+    exhaustive scoring of every posting, or dynamic pruning that uses the
+    stored upper bounds to skip postings that cannot reach the current
+    top-k threshold.
+
+    With shared=True the vocabulary, mappings and length norms of a loaded
+    generation are registered in the process, and later retrievers of the
+    same generation (including those of workers forked after the load)
+    attach to them instead of loading again.
     """
-    
-    def __init__(self, index_path: str):
+
+    def __init__(
+        self,
+        index_path: str,
+        k1: float = 1.5,
+        b: float = 0.75,
+        block_size: int = 64,
+        pruned: bool = True,
+        result_cache: Optional[LRUCache] = None,
+        shared: bool = False
+    ):
         """
         Initialize BM25 retriever.
-        
+
         Args:
             index_path: Path to BM25 index
+            k1: Term frequency saturation used when building
+            b: Length normalization used when building
+            block_size: Postings per block-max block used when building
+            pruned: Default query mode, False forces exhaustive scoring
+            result_cache: Cache of ranked chunk ids per query
+            shared: Attach to the arrays of the same generation already
+                loaded in this process (or a pre-fork parent)
         """
         self.index_path = index_path
+        self.k1 = k1
+        self.b = b
+        self.block_size = block_size
+        self.pruned = pruned
+        self.result_cache = result_cache
+        self.shared = shared
+        self.generation = ""
+        self.vocab: Dict[str, int] = {}
+        self.n_docs = 0
+        self.n_live = 0
+        self.avgdl = 0.0
+        self._offsets = None
+        self._doc_ids = None
+        self._tfs = None
+        self._doc_lens = None
+        self._idf = None
+        self._norms = None
+        self._term_max = None
+        self._block_offsets = None
+        self._block_max = None
+        self._block_last_doc = None
         logger.info(f"BM25Retrieval initialized with path: {index_path}")
-        # TODO: Load BM25 index
-    
-    def retrieve(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
+
+        if (Path(index_path) / "meta.json").exists():
+            self._load(index_path)
+        else:
+            logger.warning(f"No BM25 index found at {index_path}")
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], index_path: Optional[str] = None) -> "BM25Retrieval":
+        """
+        Create a retriever from the loaded YAML configuration.
+
+        Args:
+            config: Configuration dict
+            index_path: Override for bm25_index_path
+
+        Returns:
+            Configured BM25Retrieval
+        """
+        return cls(
+            index_path or config.get("bm25_index_path", "./data/index/bm25/"),
+            k1=config.get("bm25_k1", 1.5),
+            b=config.get("bm25_b", 0.75),
+            block_size=config.get("bm25_block_size", 64),
+            pruned=config.get("bm25_pruning", True),
+            result_cache=get_cache("result", config),
+            shared=config.get("shared_artefacts", False)
+        )
+
+    @property
+    def is_loaded(self) -> bool:
+        """Whether an index is available for search."""
+        return self._offsets is not None
+
+    def _load(self, path: str):
+        """
+        Memory-map an index directory written by build_index.
+
+        Args:
+            path: Index directory
+        """
+        root = Path(path)
+        with open(root / "meta.json", "r") as f:
+            meta = json.load(f)
+        if meta.get("format_version") != FORMAT_VERSION:
+            raise ValueError(
+                f"Unsupported BM25 index format {meta.get('format_version')} at {path}"
+            )
+        self.n_docs = meta["n_docs"]
+        self.n_live = meta.get("n_live", self.n_docs)
+        self.avgdl = meta["avgdl"]
+        self.k1 = meta["k1"]
+        self.b = meta["b"]
+        self.block_size = meta["block_size"]
+        self.generation = meta["generation"]
+
+        attached = None
+        if self.shared:
+            attached = shared_artefacts.attach("bm25", path, self.generation)
+        loaded = attached or self._read(root)
+        if self.shared and attached is None:
+            shared_artefacts.register("bm25", path, self.generation, loaded)
+        self.vocab, arrays = loaded
+        for name, array in arrays.items():
+            setattr(self, f"_{name}", array)
+
+        logger.info(
+            f"BM25 index loaded: {self.n_docs} docs, {len(self.vocab)} terms, "
+            f"{len(self._doc_ids)} postings, attached={attached is not None}"
+        )
+
+    def _read(self, root: Path) -> Tuple[Dict[str, int], Dict[str, np.ndarray]]:
+        """
+        Read the vocabulary and map the arrays of an index directory.
+
+        Returns:
+            Tuple of (vocab, arrays by name, including the length norms)
+        """
+        with open(root / "vocab.json", "r") as f:
+            vocab = json.load(f)
+        # Plain ndarray views over the mappings; slicing np.memmap objects
+        # carries per-call subclass overhead on the query hot path
+        arrays = {name: self._mmap(root / f"{name}.npy") for name in _ARRAYS}
+
+        # Per-document length normalization, k1 * (1 - b + b * dl / avgdl)
+        avgdl = self.avgdl if self.avgdl > 0 else 1.0
+        arrays["norms"] = (
+            self.k1 * (1.0 - self.b + self.b * (arrays["doc_lens"] / avgdl))
+        ).astype(np.float32)
+        return vocab, arrays
+
+    def close(self):
+        """Drop the index mappings; the files are unmapped once no view remains."""
+        if self.shared:
+            shared_artefacts.release("bm25", self.index_path)
+        self._offsets = self._doc_ids = self._tfs = self._doc_lens = None
+        self._idf = self._norms = self._term_max = None
+        self._block_offsets = self._block_max = self._block_last_doc = None
+
+    @staticmethod
+    def _mmap(path: Path) -> np.ndarray:
+        """Open a read-only .npy mapping as a plain ndarray view."""
+        return np.load(path, mmap_mode="r").view(np.ndarray)
+
+    def _query_terms(self, query: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Map a query to known term ids and their query term frequencies.
+
+        Terms whose postings were all deleted by update_index stay in the
+        vocabulary and are dropped here. Terms come back ordered by
+        descending upper bound. Both query modes accumulate in this order,
+        so their float32 scores agree bit for bit.
+
+        Args:
+            query: Search query
+
+        Returns:
+            Tuple of (term_ids, query_tfs, upper_bounds)
+        """
+        counts = Counter(t for t in tokenize(query) if t in self.vocab)
+        term_ids = np.fromiter((self.vocab[t] for t in counts), dtype=np.int64, count=len(counts))
+        qtfs = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+        live = self._offsets[term_ids + 1] > self._offsets[term_ids]
+        term_ids, qtfs = term_ids[live], qtfs[live]
+        bounds = qtfs * self._term_max[term_ids] * _BOUND_SLACK
+        order = np.lexsort((term_ids, -bounds))
+        return term_ids[order], qtfs[order], bounds[order]
+
+    def _term_scores(self, term_id: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Score every posting of one term.
+
+        Args:
+            term_id: Term id
+
+        Returns:
+            Tuple of (doc_ids, per-document BM25 contribution without idf)
+        """
+        lo, hi = self._offsets[term_id], self._offsets[term_id + 1]
+        docs = self._doc_ids[lo:hi]
+        return docs, self._saturate(self._tfs[lo:hi], docs)
+
+    def _saturate(self, tfs: np.ndarray, docs: np.ndarray) -> np.ndarray:
+        """BM25 term frequency saturation, tf * (k1 + 1) / (tf + norm)."""
+        tf = tfs.astype(np.float32)
+        return tf * np.float32(self.k1 + 1.0) / (tf + self._norms[docs])
+
+    def search(
+        self,
+        query: str,
+        top_k: int = 5,
+        pruned: Optional[bool] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Score the query against the index.
+
+        Args:
+            query: Search query
+            top_k: Number of results to return
+            pruned: Override the default query mode for this call
+
+        Returns:
+            Tuple of (chunk_ids, scores) sorted by descending score
+        """
+        if not self.is_loaded or top_k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        pruned = self.pruned if pruned is None else pruned
+        if self.result_cache is None:
+            return self._search(query, top_k, pruned)
+
+        # Keyed by generation, so a rebuilt index never serves stale rankings
+        key = ("bm25", self.generation, normalize_query(query), top_k, pruned)
+        cached = self.result_cache.get(key)
+        if cached is None:
+            cached = freeze(self._search(query, top_k, pruned))
+            self.result_cache.put(key, cached)
+        return cached
+
+    def _search(self, query: str, top_k: int, pruned: bool) -> Tuple[np.ndarray, np.ndarray]:
+        """Uncached search, see search()."""
+        term_ids, qtfs, bounds = self._query_terms(query)
+        if pruned:
+            return self._search_pruned(term_ids, qtfs, bounds, top_k)
+
+        scores = np.zeros(self.n_docs, dtype=np.float32)
+        for term_id, qtf in zip(term_ids, qtfs):
+            docs, contrib = self._term_scores(term_id)
+            # Doc ids are unique within a posting list, so fancy += is safe
+            scores[docs] += (qtf * self._idf[term_id]) * contrib
+
+        candidates = np.flatnonzero(scores > 0)
+        return self._top_k(candidates, scores[candidates], top_k)
+
+    def _search_pruned(
+        self,
+        term_ids: np.ndarray,
+        qtfs: np.ndarray,
+        bounds: np.ndarray,
+        top_k: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Block-max MaxScore evaluation.
+
+        Terms are visited by descending upper bound. While the bounds of the
+        unvisited terms can still lift an unseen document to the top-k
+        threshold, terms are "essential" and fully scored. Once they cannot,
+        the remaining terms only need to be looked up for the surviving
+        candidates; before each lookup, candidates whose partial score plus
+        the block max of their block and the bounds of later terms falls
+        below the threshold are dropped without touching their postings.
+
+        Args:
+            term_ids: Query term ids in descending bound order
+            qtfs: Query term frequencies
+            bounds: Upper bound of each term's contribution
+            top_k: Number of results to return
+
+        Returns:
+            Tuple of (chunk_ids, scores) sorted by descending score
+        """
+        n_terms = len(term_ids)
+        remaining = np.zeros(n_terms + 1, dtype=np.float32)
+        remaining[:n_terms] = np.cumsum(bounds[::-1])[::-1]
+
+        scores = np.zeros(self.n_docs, dtype=np.float32)
+        top = np.empty(0, dtype=np.int64)
+        threshold = np.float32(0.0)
+
+        # Essential terms, fully scored
+        i = 0
+        while i < n_terms and remaining[i] >= threshold:
+            docs, contrib = self._term_scores(term_ids[i])
+            scores[docs] += (qtfs[i] * self._idf[term_ids[i]]) * contrib
+            top, threshold = self._update_threshold(top, docs, scores, top_k, threshold)
+            i += 1
+
+        candidates = np.flatnonzero((scores > 0) & (scores + remaining[i] >= threshold))
+
+        # Non-essential terms, looked up only for surviving candidates
+        for j in range(i, n_terms):
+            if len(candidates) == 0:
+                break
+
+            term_id = term_ids[j]
+            blo, bhi = self._block_offsets[term_id], self._block_offsets[term_id + 1]
+            block = np.searchsorted(self._block_last_doc[blo:bhi], candidates)
+            in_list = block < bhi - blo
+
+            block_bound = np.zeros(len(candidates), dtype=np.float32)
+            block_bound[in_list] = (
+                qtfs[j] * self._block_max[blo + block[in_list]] * _BOUND_SLACK
+            )
+            keep = scores[candidates] + block_bound + remaining[j + 1] >= threshold
+            candidates, in_list = candidates[keep], in_list[keep]
+
+            lo, hi = self._offsets[term_id], self._offsets[term_id + 1]
+            lookup = candidates[in_list]
+            pos = lo + np.searchsorted(self._doc_ids[lo:hi], lookup)
+            found = pos < hi
+            found[found] = self._doc_ids[pos[found]] == lookup[found]
+            docs = lookup[found]
+            if len(docs):
+                contrib = self._saturate(self._tfs[pos[found]], docs)
+                scores[docs] += (qtfs[j] * self._idf[term_id]) * contrib
+                top, threshold = self._update_threshold(top, docs, scores, top_k, threshold)
+
+            candidates = candidates[scores[candidates] + remaining[j + 1] >= threshold]
+
+        return self._top_k(candidates, scores[candidates], top_k)
+
+    @staticmethod
+    def _update_threshold(
+        top: np.ndarray,
+        docs: np.ndarray,
+        scores: np.ndarray,
+        top_k: int,
+        current: np.float32
+    ) -> Tuple[np.ndarray, np.float32]:
+        """
+        Raise the pruning threshold after a batch of score updates.
+
+        Partial scores never exceed final scores, so the k-th best partial
+        score over any k distinct documents is a safe lower bound on the
+        final k-th score. Only the previous top-k and the documents that
+        were just updated can raise it.
+
+        Args:
+            top: Distinct doc ids holding the current top-k partial scores
+            docs: Sorted, distinct doc ids updated in this step
+            scores: Dense score array indexed by chunk id
+            top_k: Number of results to return
+            current: Current threshold
+
+        Returns:
+            Tuple of (new top-k doc ids, new threshold)
+        """
+        if not len(docs):
+            return top, current
+        if len(top):
+            idx = np.minimum(np.searchsorted(docs, top), len(docs) - 1)
+            top = top[docs[idx] != top]
+        pool = np.concatenate((top, docs))
+        if len(pool) < top_k:
+            return pool, current
+        if len(pool) > top_k:
+            pool = pool[np.argpartition(-scores[pool], top_k - 1)[:top_k]]
+        return pool, max(current, scores[pool].min())
+
+    @staticmethod
+    def _top_k(
+        candidates: np.ndarray,
+        cand_scores: np.ndarray,
+        top_k: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Select the top_k candidates without a full sort.
+
+        Args:
+            candidates: Chunk ids eligible for the result
+            cand_scores: Scores aligned with candidates
+            top_k: Number of results to return
+
+        Returns:
+            Tuple of (chunk_ids, scores), ties broken by lower chunk id
+        """
+        if len(candidates) > top_k:
+            # Keep every candidate tied with the k-th score so the final
+            # ordering does not depend on how argpartition splits ties
+            part = np.argpartition(-cand_scores, top_k - 1)
+            kth = cand_scores[part[top_k - 1]]
+            keep = cand_scores >= kth
+            candidates, cand_scores = candidates[keep], cand_scores[keep]
+        order = np.lexsort((candidates, -cand_scores))[:top_k]
+        return candidates[order].astype(np.int64), cand_scores[order]
+
+    def search_batch(self, queries: List[str], top_k: int = 5) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Score many queries with one sparse matrix product.
+
+        Builds a (queries x terms) matrix of query term frequencies and a
+        (terms x docs) impact matrix restricted to the terms the batch
+        actually uses, then multiplies them. Scores agree with search() up
+        to float32 summation order.
+
+        Args:
+            queries: Search queries
+            top_k: Number of results per query
+
+        Returns:
+            List of (chunk_ids, scores) per query, in input order
+        """
+        empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32))
+        if not self.is_loaded or top_k <= 0:
+            return [empty for _ in queries]
+
+        results: List[Optional[Tuple[np.ndarray, np.ndarray]]] = [None] * len(queries)
+        keys = [("bm25", self.generation, normalize_query(q), top_k, "batch") for q in queries]
+        if self.result_cache is not None:
+            for i, key in enumerate(keys):
+                results[i] = self.result_cache.get(key)
+        pending = [i for i, r in enumerate(results) if r is None]
+        if not pending:
+            return results
+
+        from scipy import sparse
+
+        # Query side: one row per pending query, columns are batch-local terms
+        rows, cols, data = [], [], []
+        term_index: Dict[int, int] = {}
+        for row, i in enumerate(pending):
+            counts = Counter(t for t in tokenize(queries[i]) if t in self.vocab)
+            for term, qtf in counts.items():
+                col = term_index.setdefault(self.vocab[term], len(term_index))
+                rows.append(row)
+                cols.append(col)
+                data.append(qtf)
+        query_matrix = sparse.csr_matrix(
+            (np.array(data, dtype=np.float32), (rows, cols)),
+            shape=(len(pending), len(term_index))
+        )
+
+        # Document side: CSR rows of the batch's terms, weighted by idf
+        term_ids = np.fromiter(term_index, dtype=np.int64, count=len(term_index))
+        starts, ends = self._offsets[term_ids], self._offsets[term_ids + 1]
+        indptr = np.zeros(len(term_ids) + 1, dtype=np.int64)
+        np.cumsum(ends - starts, out=indptr[1:])
+        positions = np.arange(indptr[-1]) + np.repeat(starts - indptr[:-1], ends - starts)
+        docs = self._doc_ids[positions]
+        impacts = np.repeat(self._idf[term_ids], ends - starts) * self._saturate(self._tfs[positions], docs)
+        impact_matrix = sparse.csr_matrix(
+            (impacts.astype(np.float32), docs, indptr),
+            shape=(len(term_ids), self.n_docs)
+        )
+
+        scores = (query_matrix @ impact_matrix).tocsr()
+        for row, i in enumerate(pending):
+            lo, hi = scores.indptr[row], scores.indptr[row + 1]
+            result = self._top_k(
+                scores.indices[lo:hi].astype(np.int64), scores.data[lo:hi], top_k
+            )
+            if self.result_cache is not None:
+                self.result_cache.put(keys[i], freeze(result))
+            results[i] = result
+        return results
+
+    def retrieve_batch(self, queries: List[str], top_k: int = 5) -> List[List[Dict[str, Any]]]:
+        """
+        Retrieve documents for many queries at once.
+
+        Args:
+            queries: Search queries
+            top_k: Number of results per query
+
+        Returns:
+            List of retrieved chunks with scores, one list per query
+        """
+        logger.info("BM25 batch retrieval for %d queries", len(queries))
+        return [
+            [{"chunk_id": int(i), "score": float(s)} for i, s in zip(ids, scores)]
+            for ids, scores in self.search_batch(queries, top_k)
+        ]
+
+    def retrieve(
+        self,
+        query: str,
+        top_k: int = 5,
+        pruned: Optional[bool] = None
+    ) -> List[Dict[str, Any]]:
         """
         Retrieve documents using BM25.
-        
+
         Args:
             query: Search query
             top_k: Number of results to return
-        
+            pruned: Override the default query mode for this call
+
         Returns:
             List of retrieved chunks with scores
-        
-        TODO: Implement BM25 retrieval logic.
         """
-        logger.info(f"BM25 retrieval for query: {query}")
-        return []
-    
+        logger.info("BM25 retrieval for query: %s", query)
+        ids, scores = self.search(query, top_k, pruned=pruned)
+        return [
+            {"chunk_id": int(i), "score": float(s)}
+            for i, s in zip(ids, scores)
+        ]
+
     def build_index(self, documents: List[str], save_path: str):
         """
         Build and save BM25 index.
-        
+
         Args:
-            documents: List of document texts
+            documents: List of document texts, position is the chunk id
             save_path: Path to save index
-        
-        TODO: Implement index building.
         """
         logger.info(f"Building BM25 index with {len(documents)} documents")
-        pass
+
+        vocab: Dict[str, int] = {}
+        terms, docs, tfs, doc_lens = self._postings(
+            list(range(len(documents))), documents, vocab, len(documents)
+        )
+        self._write_index(save_path, vocab, terms, docs, tfs, doc_lens, n_live=len(documents))
+
+    def update_index(
+        self,
+        added: Dict[int, str],
+        deleted: List[int],
+        save_path: Optional[str] = None
+    ):
+        """
+        Add and delete chunks without re-tokenizing unchanged documents.
+
+        Postings of untouched chunks are carried over from the current
+        arrays; only added texts are tokenized. Deleted chunk ids become
+        holes (no postings, zero length) until the next full rebuild.
+        Corpus statistics, idf and the block-max bounds are recomputed, so
+        scores match a fresh build over the live chunks.
+
+        Args:
+            added: Mapping of new chunk id to text
+            deleted: Live chunk ids to remove
+            save_path: Path to save index, defaults to index_path
+        """
+        if not self.is_loaded:
+            raise ValueError(f"No BM25 index loaded at {self.index_path} to update")
+        save_path = save_path or self.index_path
+        logger.info(f"Updating BM25 index: +{len(added)} / -{len(deleted)} chunks")
+
+        new_ids = sorted(added)
+        n_slots = max([len(self._doc_lens)] + [i + 1 for i in new_ids])
+        doc_lens = np.zeros(n_slots, dtype=np.int32)
+        doc_lens[:len(self._doc_lens)] = self._doc_lens
+        dropped = np.union1d(np.asarray(deleted, dtype=np.int64), np.asarray(new_ids, dtype=np.int64))
+        doc_lens[dropped] = 0
+
+        # Current postings as (term, doc, tf) triples, minus dropped chunks
+        df = np.diff(self._offsets)
+        old_terms = np.repeat(np.arange(len(df), dtype=np.int64), df)
+        old_docs = self._doc_ids.astype(np.int64)
+        keep = ~np.isin(old_docs, dropped)
+
+        vocab = dict(self.vocab)
+        new_terms, new_docs, new_tfs, new_lens = self._postings(
+            new_ids, [added[i] for i in new_ids], vocab, n_slots
+        )
+        doc_lens[new_ids] = new_lens
+
+        terms = np.concatenate((old_terms[keep], new_terms))
+        docs = np.concatenate((old_docs[keep], new_docs))
+        tfs = np.concatenate((self._tfs[keep].astype(np.int64), new_tfs))
+        order = np.lexsort((docs, terms))
+        n_live = self.n_live - len(deleted) + len(new_ids)
+        self._write_index(save_path, vocab, terms[order], docs[order], tfs[order], doc_lens, n_live)
+
+    @staticmethod
+    def _postings(
+        doc_ids: List[int],
+        texts: List[str],
+        vocab: Dict[str, int],
+        n_slots: int
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Tokenize texts into postings, extending vocab in place.
+
+        Args:
+            doc_ids: Chunk id of each text, ascending
+            texts: Document texts
+            vocab: Term dictionary to look up and extend
+            n_slots: Size of the chunk id space
+
+        Returns:
+            Tuple of (terms, docs, tfs, doc_lens); postings are sorted by
+            term, then doc, and doc_lens is aligned with doc_ids
+        """
+        term_chunks = []
+        doc_lens = np.zeros(len(texts), dtype=np.int32)
+        for i, text in enumerate(texts):
+            tokens = tokenize(text)
+            doc_lens[i] = len(tokens)
+            term_chunks.append(
+                np.fromiter(
+                    (vocab.setdefault(t, len(vocab)) for t in tokens),
+                    dtype=np.int64,
+                    count=len(tokens)
+                )
+            )
+
+        n_slots = max(n_slots, 1)
+        token_terms = np.concatenate(term_chunks) if term_chunks else np.empty(0, dtype=np.int64)
+        token_docs = np.repeat(np.asarray(doc_ids, dtype=np.int64), doc_lens)
+
+        # Unique (term, doc) keys come back sorted by term, then doc
+        keys, tfs = np.unique(token_terms * n_slots + token_docs, return_counts=True)
+        return keys // n_slots, keys % n_slots, tfs, doc_lens
+
+    def _write_index(
+        self,
+        save_path: str,
+        vocab: Dict[str, int],
+        posting_terms: np.ndarray,
+        posting_docs: np.ndarray,
+        tfs: np.ndarray,
+        doc_lens: np.ndarray,
+        n_live: int
+    ):
+        """
+        Derive statistics and bounds from postings, save them and reload.
+
+        Args:
+            save_path: Path to save index
+            vocab: Term dictionary
+            posting_terms: Term id per posting, sorted by term then doc
+            posting_docs: Chunk id per posting
+            tfs: Term frequency per posting
+            doc_lens: Length of every chunk id slot, 0 for holes
+            n_live: Number of live chunks, used for idf and avgdl
+        """
+        n_docs = len(doc_lens)
+        n_terms = len(vocab)
+        posting_docs = posting_docs.astype(np.int32)
+
+        df = np.bincount(posting_terms, minlength=n_terms)
+        offsets = np.zeros(n_terms + 1, dtype=np.int64)
+        np.cumsum(df, out=offsets[1:])
+        idf = np.log1p((n_live - df + 0.5) / (df + 0.5)).astype(np.float32)
+        tfs = np.minimum(tfs, _TF_MAX).astype(np.uint16)
+
+        # Score upper bounds, computed with the same float32 arithmetic as
+        # query time so the pruned mode stays exact
+        avgdl = float(doc_lens.sum()) / n_live if n_live else 0.0
+        norms = (self.k1 * (1.0 - self.b + self.b * (doc_lens / (avgdl or 1.0)))).astype(np.float32)
+        tf32 = tfs.astype(np.float32)
+        contrib = idf[posting_terms] * (tf32 * np.float32(self.k1 + 1.0) / (tf32 + norms[posting_docs]))
+        term_max = np.zeros(n_terms, dtype=np.float32)
+        block_counts = (df + self.block_size - 1) // self.block_size
+        block_offsets = np.zeros(n_terms + 1, dtype=np.int64)
+        np.cumsum(block_counts, out=block_offsets[1:])
+        block_rank = np.arange(block_offsets[-1]) - np.repeat(block_offsets[:-1], block_counts)
+        block_starts = np.repeat(offsets[:-1], block_counts) + block_rank * self.block_size
+        block_ends = np.minimum(block_starts + self.block_size, np.repeat(offsets[1:], block_counts))
+        if len(contrib):
+            # Terms left without postings by deletions keep a zero bound;
+            # reduceat over the non-empty starts still covers each list exactly
+            nonempty = df > 0
+            term_max[nonempty] = np.maximum.reduceat(contrib, offsets[:-1][nonempty])
+            block_max = np.maximum.reduceat(contrib, block_starts).astype(np.float32)
+            block_last_doc = posting_docs[block_ends - 1]
+        else:
+            block_max = np.empty(0, dtype=np.float32)
+            block_last_doc = np.empty(0, dtype=np.int32)
+
+        root = Path(save_path)
+        root.mkdir(parents=True, exist_ok=True)
+        _save_array(root / "offsets.npy", offsets)
+        _save_array(root / "doc_ids.npy", posting_docs)
+        _save_array(root / "tfs.npy", tfs)
+        _save_array(root / "doc_lens.npy", doc_lens)
+        _save_array(root / "idf.npy", idf)
+        _save_array(root / "term_max.npy", term_max)
+        _save_array(root / "block_offsets.npy", block_offsets)
+        _save_array(root / "block_max.npy", block_max)
+        _save_array(root / "block_last_doc.npy", block_last_doc)
+        with open(root / "vocab.json", "w") as f:
+            json.dump(vocab, f)
+
+        # meta.json is written last and marks the index as complete
+        meta = {
+            "format_version": FORMAT_VERSION,
+            "n_docs": n_docs,
+            "n_live": n_live,
+            "n_terms": n_terms,
+            "n_postings": int(len(posting_docs)),
+            "avgdl": avgdl,
+            "k1": self.k1,
+            "b": self.b,
+            "block_size": self.block_size,
+            "generation": uuid.uuid4().hex,
+        }
+        with open(root / "meta.json", "w") as f:
+            json.dump(meta, f, indent=2)
+
+        logger.info(
+            f"BM25 index saved to {save_path}: {n_terms} terms, {len(posting_docs)} postings"
+        )
+        self._load(save_path)
+
+
+def _save_array(path: Path, array: np.ndarray):
+    """
+    Write a .npy file through a temporary name and rename it into place.
+
+    A reader that still has the old file memory-mapped keeps a valid
+    mapping of the old inode instead of seeing it truncated.
+    """
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp, path)
@@ -0,0 +1,188 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+import numpy as np
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+_MISSING = object()
+
+
+def normalize_query(query: str) -> str:
+    """
+    Canonical form of a query used for cache keys.
+
+    Case and whitespace are folded; all-MiniLM-L6-v2 is an uncased model and
+    BM25 tokenization lowercases, so neither retriever can tell the
+    difference.
+
+    Args:
+        query: Raw query
+
+    Returns:
+        Normalized query
+    """
+    return _WHITESPACE_RE.sub(" ", query).strip().lower()
+
+
+def freeze(arrays: Tuple[np.ndarray, ...]) -> Tuple[np.ndarray, ...]:
+    """
+    Mark arrays read-only before sharing them through a cache.
+
+    Args:
+        arrays: Arrays about to be cached
+
+    Returns:
+        The same arrays
+    """
+    for array in arrays:
+        array.setflags(write=False)
+    return arrays
+
+
+class LRUCache:
+    """
+    Thread-safe bounded LRU cache with optional time-to-live.
+
+    Counts hits, misses, capacity evictions and TTL expirations so the cache
+    can be sized from production traffic.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl_seconds: Optional[float] = None, name: str = "cache"):
+        """
+        Initialize cache.
+
+        Args:
+            maxsize: Maximum number of entries
+            ttl_seconds: Entry lifetime, None keeps entries until evicted
+            name: Name reported in stats
+        """
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self.name = name
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Look up a key and mark it most recently used.
+
+        Args:
+            key: Cache key
+            default: Returned on miss
+
+        Returns:
+            Cached value or default
+        """
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any):
+        """
+        Insert or replace a key, evicting the least recently used entry when full.
+
+        Args:
+            key: Cache key
+            value: Value to store
+        """
+        if self.maxsize <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop all entries, keeping counters."""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Snapshot of cache counters.
+
+        Returns:
+            Dict with size, capacity, hits, misses, hit_rate, evictions, expirations
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+# Process-wide caches shared by every retriever instance, so a reloaded
+# index generation starts missing immediately without dropping other entries
+_caches: Dict[str, LRUCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(name: str, config: Dict[str, Any]) -> Optional[LRUCache]:
+    """
+    Return the shared cache for a name, creating it from config on first use.
+
+    Args:
+        name: Cache name, "embedding" or "result"
+        config: Configuration dict
+
+    Returns:
+        Shared LRUCache, or None when caching is disabled
+    """
+    if not config.get("query_cache_enabled", True):
+        return None
+    with _caches_lock:
+        if name not in _caches:
+            _caches[name] = LRUCache(
+                maxsize=config.get(f"{name}_cache_size", 4096),
+                ttl_seconds=config.get("cache_ttl_seconds", 3600),
+                name=name
+            )
+            logger.info(f"Created {name} cache (maxsize={_caches[name].maxsize})")
+        return _caches[name]
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Counters for every shared cache.
+
+    Returns:
+        Mapping of cache name to its stats
+    """
+    with _caches_lock:
+        caches = dict(_caches)
+    return {name: cache.stats() for name, cache in caches.items()}
@@ -0,0 +1,163 @@
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Callable, List, Dict, Any, Optional
+
+import numpy as np
+
+from .encoders import l2_normalize
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+EMBEDDING_DTYPES = ("float32", "float16", "int8")
+
+# Unit vectors have components in [-1, 1], so a fixed scale quantizes them
+# without a calibration pass and lets batches be written as they arrive
+_INT8_SCALE = 127.0
+
+
+class EmbeddingStage:
+    """
+    Resumable, batched embedding of chunk texts into a memory-mapped matrix.
+
+    The store directory holds:
+        vectors.npy    - (n_chunks, dim) matrix in the configured dtype
+        progress.json  - fingerprint of the inputs and rows completed
+
+    Rows are encoded batch by batch and written straight into a
+    preallocated .npy memmap; progress.json is updated after each flushed
+    batch. A run over the same texts, encoder and dtype resumes after the
+    last checkpoint; any other input starts over.
+    """
+
+    def __init__(
+        self,
+        store_path: str,
+        encoder,
+        batch_size: int = 64,
+        dtype: str = "float32"
+    ):
+        """
+        Initialize embedding stage.
+
+        Args:
+            store_path: Directory for vectors.npy and progress.json
+            encoder: Object with name, dim and encode(texts)
+            batch_size: Texts encoded per encoder call
+            dtype: Storage dtype, one of EMBEDDING_DTYPES
+        """
+        if dtype not in EMBEDDING_DTYPES:
+            raise ValueError(f"Unknown embedding dtype: {dtype}")
+        self.store_path = Path(store_path)
+        self.encoder = encoder
+        self.batch_size = batch_size
+        self.dtype = dtype
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], encoder) -> "EmbeddingStage":
+        """
+        Create an embedding stage from the loaded YAML configuration.
+
+        Args:
+            config: Configuration dict
+            encoder: Text encoder
+
+        Returns:
+            Configured EmbeddingStage
+        """
+        return cls(
+            config.get("embedding_store_path", "./data/index/embeddings/"),
+            encoder,
+            batch_size=config.get("embedding_batch_size", 64),
+            dtype=config.get("embedding_dtype", "float32")
+        )
+
+    def _fingerprint(self, texts: List[str]) -> str:
+        """Hash of everything that determines the stored matrix."""
+        digest = hashlib.sha256(f"{self.encoder.name}|{self.dtype}|{len(texts)}".encode())
+        for text in texts:
+            digest.update(text.encode())
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def _read_progress(self) -> Optional[Dict[str, Any]]:
+        path = self.store_path / "progress.json"
+        if not path.exists() or not (self.store_path / "vectors.npy").exists():
+            return None
+        with open(path, "r") as f:
+            return json.load(f)
+
+    def _checkpoint(self, fingerprint: str, done: int, total: int):
+        tmp = self.store_path / "progress.json.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"fingerprint": fingerprint, "done": done, "total": total, "dtype": self.dtype}, f)
+        os.replace(tmp, self.store_path / "progress.json")
+
+    def _quantize(self, vectors: np.ndarray) -> np.ndarray:
+        if self.dtype == "int8":
+            return np.clip(np.rint(vectors * _INT8_SCALE), -127, 127).astype(np.int8)
+        return vectors.astype(self.dtype)
+
+    def _dequantize(self, stored: np.ndarray) -> np.ndarray:
+        vectors = stored.astype(np.float32)
+        if self.dtype == "int8":
+            vectors /= _INT8_SCALE
+        return l2_normalize(vectors) if self.dtype != "float32" else vectors
+
+    def run(self, texts: List[str], progress: Optional[Callable[[int, int], None]] = None) -> np.ndarray:
+        """
+        Embed texts, resuming an interrupted run over the same inputs.
+
+        Args:
+            texts: Chunk texts in chunk id order
+            progress: Called with (rows done, total rows) after every checkpoint
+
+        Returns:
+            L2-normalized float32 matrix of shape (len(texts), dim)
+        """
+        dim = self.encoder.dim
+        if not texts:
+            return np.empty((0, dim), dtype=np.float32)
+
+        self.store_path.mkdir(parents=True, exist_ok=True)
+        vectors_file = str(self.store_path / "vectors.npy")
+        fingerprint = self._fingerprint(texts)
+        checkpoint = self._read_progress()
+
+        if checkpoint is not None and checkpoint["fingerprint"] == fingerprint:
+            done = checkpoint["done"]
+            stored = np.lib.format.open_memmap(vectors_file, mode="r+")
+            logger.info(f"Resuming embedding at {done}/{len(texts)} chunks")
+        else:
+            done = 0
+            # Invalidate the old checkpoint before its matrix is overwritten
+            (self.store_path / "progress.json").unlink(missing_ok=True)
+            stored = np.lib.format.open_memmap(
+                vectors_file, mode="w+", dtype=self.dtype, shape=(len(texts), dim)
+            )
+            self._checkpoint(fingerprint, 0, len(texts))
+        if progress is not None:
+            progress(done, len(texts))
+
+        start_time = time.perf_counter()
+        for start in range(done, len(texts), self.batch_size):
+            end = min(start + self.batch_size, len(texts))
+            stored[start:end] = self._quantize(l2_normalize(self.encoder.encode(texts[start:end])))
+            stored.flush()
+            self._checkpoint(fingerprint, end, len(texts))
+            if progress is not None:
+                progress(end, len(texts))
+            logger.debug(f"Embedded {end}/{len(texts)} chunks")
+
+        encoded = len(texts) - done
+        if encoded:
+            seconds = time.perf_counter() - start_time
+            logger.info(
+                f"Embedded {encoded} chunks in {seconds:.1f}s "
+                f"({encoded / max(seconds, 1e-9):.0f}/s, {self.dtype}, "
+                f"{stored.nbytes / 2 ** 20:.1f} MiB on disk)"
+            )
+        return self._dequantize(np.asarray(stored))
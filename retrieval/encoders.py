@@ -0,0 +1,137 @@
+import hashlib
+from typing import List, Dict, Any
+
+import numpy as np
+
+from .bm25 import tokenize
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+ENCODER_TYPES = ("sentence-transformers", "hashing")
+
+
+def l2_normalize(vectors: np.ndarray) -> np.ndarray:
+    """Return a float32 copy of vectors scaled to unit L2 norm."""
+    vectors = np.array(vectors, dtype=np.float32, copy=True)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class SentenceTransformerEncoder:
+    """
+    Text encoder backed by a sentence-transformers model.
+
+    The model is loaded on first use, so constructing the encoder (and any
+    retriever holding one) stays cheap for processes that never embed.
+    """
+
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
+        """
+        Initialize encoder.
+
+        Args:
+            model_name: sentence-transformers model name or path
+        """
+        self.name = model_name
+        self._model = None
+
+    def _get_model(self):
+        """Load the sentence-transformers model on first use."""
+        if self._model is None:
+            from sentence_transformers import SentenceTransformer
+
+            logger.info(f"Loading embedding model: {self.name}")
+            self._model = SentenceTransformer(self.name)
+        return self._model
+
+    def load(self):
+        """Load the model now instead of on the first encode."""
+        self._get_model()
+
+    @property
+    def dim(self) -> int:
+        """Embedding dimension."""
+        return self._get_model().get_sentence_embedding_dimension()
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            Float32 matrix of shape (len(texts), dim)
+        """
+        return self._get_model().encode(texts, convert_to_numpy=True)
+
+
+class HashingEncoder:
+    """
+    Deterministic signed feature-hashing encoder.
+
+    Each BM25 token is hashed to a bucket and a sign. No model download or
+    GPU is needed and output is identical across processes and runs, which
+    makes it a stand-in for the sentence-transformers model in offline
+    tests and benchmarks. It captures lexical overlap only.
+    """
+
+    def __init__(self, dim: int = 384):
+        """
+        Initialize encoder.
+
+        Args:
+            dim: Embedding dimension
+        """
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def load(self):
+        """Nothing to load; present for parity with SentenceTransformerEncoder."""
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            Float32 matrix of shape (len(texts), dim)
+        """
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in tokenize(text):
+                h = int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), "little")
+                vectors[row, h % self.dim] += 1.0 if (h >> 63) else -1.0
+        return vectors
+
+
+def get_encoder(config: Dict[str, Any]):
+    """
+    Return the text encoder named by the configuration.
+
+    Calls with the same encoder settings return the same encoder, so the
+    model is loaded once per process: retrievers of a hot-swapped index
+    generation, and workers forked by scripts/serve.py, reuse it.
+
+    Args:
+        config: Configuration dict
+
+    Returns:
+        SentenceTransformerEncoder or HashingEncoder
+    """
+    from .shared import shared_encoder
+
+    return shared_encoder(config, lambda: _new_encoder(config))
+
+
+def _new_encoder(config: Dict[str, Any]):
+    encoder_type = config.get("embedding_encoder", "sentence-transformers")
+    if encoder_type == "hashing":
+        return HashingEncoder(dim=config.get("embedding_dim", 384))
+    if encoder_type == "sentence-transformers":
+        return SentenceTransformerEncoder(config.get("embedding_model_name", "all-MiniLM-L6-v2"))
+    raise ValueError(f"Unknown embedding encoder: {encoder_type}")
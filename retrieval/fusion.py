@@ -0,0 +1,95 @@
+from typing import Sequence, Tuple
+
+import numpy as np
+
+FUSION_METHODS = ("rrf", "weighted")
+
+
+def _accumulate(
+    ranked_ids: Sequence[np.ndarray],
+    contributions: Sequence[np.ndarray],
+    top_k: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Sum per-list contributions by chunk id and keep the best top_k.
+
+    Args:
+        ranked_ids: Chunk ids from each retriever
+        contributions: Fused score contribution aligned with ranked_ids
+        top_k: Number of results to return
+
+    Returns:
+        Tuple of (chunk_ids, fused_scores) sorted by descending score,
+        ties broken by lower chunk id
+    """
+    if not ranked_ids or sum(len(ids) for ids in ranked_ids) == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+
+    ids = np.concatenate([np.asarray(i, dtype=np.int64) for i in ranked_ids])
+    contrib = np.concatenate([np.asarray(c, dtype=np.float64) for c in contributions])
+    unique_ids, inverse = np.unique(ids, return_inverse=True)
+    fused = np.bincount(inverse, weights=contrib, minlength=len(unique_ids))
+    order = np.lexsort((unique_ids, -fused))[:top_k]
+    return unique_ids[order], fused[order]
+
+
+def reciprocal_rank_fusion(
+    ranked_ids: Sequence[np.ndarray],
+    weights: Sequence[float],
+    top_k: int,
+    k: int = 60
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Weighted Reciprocal Rank Fusion, sum of weight / (k + rank).
+
+    Args:
+        ranked_ids: Chunk ids from each retriever, best first
+        weights: Weight per retriever
+        top_k: Number of results to return
+        k: RRF smoothing constant
+
+    Returns:
+        Tuple of (chunk_ids, fused_scores)
+    """
+    contributions = [
+        weight / (k + np.arange(1, len(ids) + 1, dtype=np.float64))
+        for ids, weight in zip(ranked_ids, weights)
+    ]
+    return _accumulate(ranked_ids, contributions, top_k)
+
+
+def weighted_score_fusion(
+    ranked_ids: Sequence[np.ndarray],
+    ranked_scores: Sequence[np.ndarray],
+    weights: Sequence[float],
+    top_k: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Weighted sum of min-max normalized retriever scores.
+
+    BM25 scores are unbounded while cosine scores live in [-1, 1], so each
+    list is rescaled to [0, 1] before weighting. A chunk missing from a list
+    contributes 0 for that retriever.
+
+    Args:
+        ranked_ids: Chunk ids from each retriever
+        ranked_scores: Raw scores aligned with ranked_ids
+        weights: Weight per retriever
+        top_k: Number of results to return
+
+    Returns:
+        Tuple of (chunk_ids, fused_scores)
+    """
+    contributions = []
+    for scores, weight in zip(ranked_scores, weights):
+        scores = np.asarray(scores, dtype=np.float64)
+        if len(scores) == 0:
+            contributions.append(scores)
+            continue
+        low, high = scores.min(), scores.max()
+        if high > low:
+            normalized = (scores - low) / (high - low)
+        else:
+            normalized = np.ones_like(scores)
+        contributions.append(weight * normalized)
+    return _accumulate(ranked_ids, contributions, top_k)
@@ -0,0 +1,310 @@
+import os
+import shutil
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Any, Iterator, Optional, Tuple
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+CURRENT_LINK = "current"
+
+
+def sortable_id() -> str:
+    """Unique id whose string order is creation order (UTC timestamp plus random suffix)."""
+    return f"{datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')}-{uuid.uuid4().hex[:8]}"
+
+
+class GenerationStore:
+    """
+    Versioned index directories published through an atomic symlink.
+
+    Layout under index_path:
+        generations/<id>/bm25/      - BM25 index
+        generations/<id>/faiss/     - FAISS index
+        generations/<id>/manifest.json
+        current -> generations/<id>
+
+    A generation directory is never modified after it is published.
+    Builds work on a fresh copy and publish it by renaming a new symlink
+    over ``current``, so a reader resolving the link always sees one
+    complete generation.
+    """
+
+    def __init__(self, index_path: str, keep: int = 3):
+        """
+        Initialize store.
+
+        Args:
+            index_path: Root index directory
+            keep: Generations kept on disk by prune(), including the current one
+        """
+        self.index_path = Path(index_path)
+        self.keep = keep
+
+    @property
+    def generations_path(self) -> Path:
+        return self.index_path / "generations"
+
+    def current_id(self) -> Optional[str]:
+        """Id of the published generation, or None if nothing is published."""
+        try:
+            return Path(os.readlink(self.index_path / CURRENT_LINK)).name
+        except OSError:
+            return None
+
+    def path(self, generation_id: str) -> Path:
+        """Directory of a generation."""
+        return self.generations_path / generation_id
+
+    def new_generation(self) -> Tuple[str, Path]:
+        """
+        Create an unpublished generation seeded with a copy of the current one.
+
+        Returns:
+            Tuple of (generation id, directory)
+        """
+        # Ids sort in creation order, which prune() relies on
+        generation_id = sortable_id()
+        path = self.path(generation_id)
+        current = self.current_id()
+        if current is not None:
+            shutil.copytree(self.path(current), path)
+        else:
+            path.mkdir(parents=True)
+        return generation_id, path
+
+    def publish(self, generation_id: str):
+        """
+        Atomically point ``current`` at a generation.
+
+        Args:
+            generation_id: Generation to publish
+        """
+        tmp = self.index_path / f"{CURRENT_LINK}.{uuid.uuid4().hex[:8]}.tmp"
+        os.symlink(Path("generations") / generation_id, tmp)
+        os.replace(tmp, self.index_path / CURRENT_LINK)
+        logger.info(f"Published index generation {generation_id}")
+
+    def discard(self, generation_id: str):
+        """Delete an unpublished generation."""
+        shutil.rmtree(self.path(generation_id), ignore_errors=True)
+
+    def prune(self):
+        """
+        Delete old generations beyond the newest ``keep``.
+
+        Workers that still serve a deleted generation keep working: its
+        files are unlinked but stay mapped until the last handle closes.
+        """
+        current = self.current_id()
+        generations = sorted(p.name for p in self.generations_path.iterdir() if p.is_dir())
+        for generation_id in generations[:-self.keep] if self.keep > 0 else generations:
+            if generation_id != current:
+                self.discard(generation_id)
+                logger.info(f"Pruned index generation {generation_id}")
+
+
+def build_generation(
+    config: Dict[str, Any],
+    full: bool = False,
+    progress: Optional[Callable[[str, int, int], None]] = None
+) -> Dict[str, Any]:
+    """
+    Build the next index generation and publish it.
+
+    The current generation is copied, brought up to date by the
+    incremental indexer and published only if something changed.
+
+    Args:
+        config: Configuration dict
+        full: Force a full rebuild
+        progress: Called with (stage, done, total) by the indexer, and with
+            stage "publish" right before the new generation goes live
+
+    Returns:
+        Indexer summary plus the generation id (None when nothing changed)
+        and the files that failed to parse
+    """
+    from parsers.pdf_parser import PDFParser
+    from .bm25 import BM25Retrieval
+    from .faiss_store import FaissRetrieval
+    from .indexer import MANIFEST_FILE, IncrementalIndexer
+
+    store = GenerationStore(
+        config.get("index_path", "./data/index/"),
+        keep=config.get("index_generations_keep", 3)
+    )
+    generation_id, path = store.new_generation()
+    try:
+        bm25 = BM25Retrieval.from_config(config, index_path=str(path / "bm25"))
+        faiss = FaissRetrieval.from_config(config, index_path=str(path / "faiss"))
+        parser = PDFParser.from_config(config)
+        indexer = IncrementalIndexer.from_config(
+            config, parser, bm25, faiss, manifest_path=str(path / MANIFEST_FILE), progress=progress
+        )
+        summary = indexer.run(config.get("data_path", "./data/raw_pdfs/"), full=full)
+        summary["parse_failures"] = sorted(parser.failures)
+    except BaseException:
+        store.discard(generation_id)
+        raise
+
+    if summary["mode"] == "incremental" and not (summary["added"] or summary["changed"] or summary["removed"]):
+        store.discard(generation_id)
+        summary["generation"] = None
+        return summary
+
+    if progress is not None:
+        progress("publish", 0, 1)
+    store.publish(generation_id)
+    store.prune()
+    if progress is not None:
+        progress("publish", 1, 1)
+    summary["generation"] = generation_id
+    return summary
+
+
+class _Handle:
+    """A loaded retriever and the number of requests using it."""
+
+    def __init__(self, generation_id: Optional[str], retriever):
+        self.generation_id = generation_id
+        self.retriever = retriever
+        self.refs = 0
+        self.retired = False
+
+
+class GenerationManager:
+    """
+    Serves requests from the published generation and hot swaps on change.
+
+    The ``current`` link is checked at most once per check interval. When
+    it moved, the new generation is loaded in a background thread, and
+    requests keep using the old one until it is ready. The old handle is
+    reference counted and closed only after its last request releases it.
+    Only the very first generation is loaded by the request that needs it.
+    """
+
+    def __init__(
+        self,
+        store: GenerationStore,
+        factory: Callable[[Optional[Path]], Any],
+        check_interval_s: float = 1.0
+    ):
+        """
+        Initialize manager.
+
+        Args:
+            store: Generation store to follow
+            factory: Builds a retriever from a generation directory, or from
+                the configured paths when given None (nothing published)
+            check_interval_s: Minimum time between checks of the current link
+        """
+        self.store = store
+        self.factory = factory
+        self.check_interval_s = check_interval_s
+        self._handle: Optional[_Handle] = None
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._checked_at = 0.0
+
+    @property
+    def generation_id(self) -> Optional[str]:
+        """Generation served by this process, or the published one before the first load."""
+        handle = self._handle
+        return handle.generation_id if handle is not None else self.store.current_id()
+
+    def _latest(self) -> _Handle:
+        """Current handle, starting the load of a newly published generation if there is one."""
+        now = time.monotonic()
+        handle = self._handle
+        if handle is not None and now - self._checked_at < self.check_interval_s:
+            return handle
+        self._checked_at = now
+
+        published = self.store.current_id()
+        if handle is not None and handle.generation_id == published:
+            return handle
+
+        if handle is None:
+            # Nothing to serve meanwhile, the first generation loads in the caller
+            with self._load_lock:
+                self._load(published)
+            return self._handle
+
+        # One loader at a time, in the background; requests keep the old handle
+        if self._load_lock.acquire(blocking=False):
+            threading.Thread(
+                target=self._load_in_background, args=(published,),
+                name=f"load-generation-{published}", daemon=True
+            ).start()
+        return handle
+
+    def _load(self, published: Optional[str]):
+        """Build the retriever of a generation and swap it in. The load lock is held."""
+        if self._handle is not None and self._handle.generation_id == published:
+            return
+        path = self.store.path(published) if published is not None else None
+        retriever = self.factory(path)
+        logger.info(f"Loaded index generation {published}")
+        with self._lock:
+            old, self._handle = self._handle, _Handle(published, retriever)
+            if old is not None:
+                old.retired = True
+                if old.refs == 0:
+                    self._close(old)
+
+    def _load_in_background(self, published: Optional[str]):
+        """Load a generation off the request path, releasing the load lock when done."""
+        try:
+            self._load(published)
+        except Exception:
+            logger.exception(f"Loading index generation {published} failed, serving the previous one")
+        finally:
+            self._load_lock.release()
+
+    def refresh(self):
+        """
+        Load the published generation if none is served yet, or start
+        loading a newly published one in the background.
+
+        Blocks only while loading the first generation; async callers run
+        it in a worker thread before acquire() so the event loop never
+        waits on a load.
+        """
+        self._latest()
+
+    @contextmanager
+    def acquire(self) -> Iterator[Any]:
+        """
+        Borrow the retriever of the latest generation for one request.
+
+        Yields:
+            Retriever that stays open until the block exits
+        """
+        self._latest()
+        # Swaps and closes happen under the lock, so the handle read here is
+        # live and cannot be closed before its count is raised
+        with self._lock:
+            handle = self._handle
+            handle.refs += 1
+        try:
+            yield handle.retriever
+        finally:
+            with self._lock:
+                handle.refs -= 1
+                if handle.retired and handle.refs == 0:
+                    self._close(handle)
+
+    @staticmethod
+    def _close(handle: _Handle):
+        """Release the index handles of a retired generation."""
+        logger.info(f"Releasing index generation {handle.generation_id}")
+        close = getattr(handle.retriever, "close", None)
+        if close is not None:
+            close()
@@ -1,8 +1,15 @@
-from typing import List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
 
 from .bm25 import BM25Retrieval
+from .cache import LRUCache, freeze, get_cache, normalize_query
 from .faiss_store import FaissRetrieval
+from .fusion import FUSION_METHODS, reciprocal_rank_fusion, weighted_score_fusion
 from utils.logger import get_logger
+from utils.tracing import propagate, span
 
 logger = get_logger(__name__)
 
@@ -10,52 +17,320 @@ logger = get_logger(__name__)
 class HybridRetrieval:
     """
     Hybrid retrieval combining BM25 and FAISS.
-    
-    TODO: Implement score fusion strategy (e.g., RRF, weighted sum).
+
+    Both retrievers run concurrently on a thread pool (FAISS and NumPy
+    release the GIL during search) and are fused with either Reciprocal
+    Rank Fusion or a weighted sum of normalized scores. A retriever that
+    misses its deadline or fails is left out and the other side's results
+    are returned on their own.
     """
-    
+
     def __init__(
         self,
         bm25_index_path: str,
         faiss_index_path: str,
         bm25_weight: float = 0.5,
-        faiss_weight: float = 0.5
+        faiss_weight: float = 0.5,
+        fusion_method: str = "rrf",
+        rrf_k: int = 60,
+        timeout_ms: Optional[float] = 500.0,
+        max_workers: int = 8,
+        bm25: Optional[BM25Retrieval] = None,
+        faiss: Optional[FaissRetrieval] = None,
+        result_cache: Optional[LRUCache] = None
     ):
         """
         Initialize hybrid retriever.
-        
+
         Args:
             bm25_index_path: Path to BM25 index
             faiss_index_path: Path to FAISS index
             bm25_weight: Weight for BM25 scores
             faiss_weight: Weight for FAISS scores
+            fusion_method: "rrf" or "weighted"
+            rrf_k: RRF smoothing constant
+            timeout_ms: Per-retriever deadline, None waits indefinitely
+            max_workers: Thread pool size shared by concurrent requests
+            bm25: Preconfigured BM25 retriever, created from the path if omitted
+            faiss: Preconfigured FAISS retriever, created from the path if omitted
+            result_cache: Cache of fused rankings per query
         """
-        self.bm25 = BM25Retrieval(bm25_index_path)
-        self.faiss = FaissRetrieval(faiss_index_path)
+        if fusion_method not in FUSION_METHODS:
+            raise ValueError(f"Unknown fusion method: {fusion_method}")
+
+        self.bm25 = bm25 or BM25Retrieval(bm25_index_path)
+        self.faiss = faiss or FaissRetrieval(faiss_index_path)
         self.bm25_weight = bm25_weight
         self.faiss_weight = faiss_weight
+        self.fusion_method = fusion_method
+        self.rrf_k = rrf_k
+        self.timeout_ms = timeout_ms
+        self.result_cache = result_cache
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="hybrid-retrieval"
+        )
         logger.info("HybridRetrieval initialized")
-    
-    def retrieve(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], generation_path: Optional[str] = None) -> "HybridRetrieval":
+        """
+        Create a retriever from the loaded YAML configuration.
+
+        Args:
+            config: Configuration dict
+            generation_path: Index generation directory holding bm25/ and
+                faiss/, overrides the configured index paths
+
+        Returns:
+            Configured HybridRetrieval
+        """
+        bm25_path = faiss_path = None
+        if generation_path is not None:
+            bm25_path = str(Path(generation_path) / "bm25")
+            faiss_path = str(Path(generation_path) / "faiss")
+        bm25 = BM25Retrieval.from_config(config, index_path=bm25_path)
+        faiss = FaissRetrieval.from_config(config, index_path=faiss_path)
+        return cls(
+            bm25.index_path,
+            faiss.index_path,
+            bm25_weight=config.get("bm25_weight", 0.5),
+            faiss_weight=config.get("faiss_weight", 0.5),
+            fusion_method=config.get("fusion_method", "rrf"),
+            rrf_k=config.get("rrf_k", 60),
+            timeout_ms=config.get("retriever_timeout_ms", 500.0),
+            max_workers=config.get("retrieval_max_workers", 8),
+            bm25=bm25,
+            faiss=faiss,
+            result_cache=get_cache("result", config)
+        )
+
+    @property
+    def generation(self) -> str:
+        """Combined generation id of both underlying indexes."""
+        return f"{self.bm25.generation}:{self.faiss.generation}"
+
+    def _fan_out(self, bm25_call, faiss_call) -> Dict[str, Any]:
+        """
+        Run both retrievers concurrently.
+
+        Args:
+            bm25_call: Zero-argument callable running the BM25 search
+            faiss_call: Zero-argument callable running the FAISS search
+
+        Returns:
+            Mapping of retriever name to its result for every retriever
+            that finished in time without error
+        """
+        def timed(name, call):
+            def run():
+                with span(f"retrieval.{name}"):
+                    return call()
+            # Spans and log request ids follow the call onto the worker thread
+            return propagate(run)
+
+        futures = {
+            self._executor.submit(timed("bm25", bm25_call)): "bm25",
+            self._executor.submit(timed("faiss", faiss_call)): "faiss",
+        }
+        timeout = self.timeout_ms / 1000.0 if self.timeout_ms is not None else None
+        done, late = wait(futures, timeout=timeout)
+
+        results = {}
+        for future in done:
+            name = futures[future]
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                logger.error(f"{name} retrieval failed, returning partial results: {e}")
+        for future in late:
+            # The search keeps running on its worker; its result is discarded
+            logger.warning(
+                f"{futures[future]} retrieval exceeded {self.timeout_ms} ms, "
+                f"returning partial results"
+            )
+        return results
+
+    def _fuse(
+        self,
+        results: Dict[str, Tuple[np.ndarray, np.ndarray]],
+        top_k: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Fuse per-retriever rankings.
+
+        Args:
+            results: Mapping of retriever name to (chunk_ids, scores)
+            top_k: Number of results to return
+
+        Returns:
+            Tuple of (chunk_ids, fused_scores)
+        """
+        weights = {"bm25": self.bm25_weight, "faiss": self.faiss_weight}
+        names = sorted(results)
+        ranked_ids = [results[name][0] for name in names]
+        if self.fusion_method == "rrf":
+            return reciprocal_rank_fusion(
+                ranked_ids, [weights[name] for name in names], top_k, k=self.rrf_k
+            )
+        return weighted_score_fusion(
+            ranked_ids,
+            [results[name][1] for name in names],
+            [weights[name] for name in names],
+            top_k
+        )
+
+    def _cache_key(self, query: str, top_k: int, nprobe: Optional[int], ef_search: Optional[int]):
+        """Result cache key covering every setting that changes the ranking."""
+        return (
+            "hybrid", self.generation, normalize_query(query), top_k,
+            self.fusion_method, self.bm25_weight, self.faiss_weight, self.rrf_k,
+            nprobe, ef_search
+        )
+
+    def search(
+        self,
+        query: str,
+        top_k: int = 5,
+        nprobe: Optional[int] = None,
+        ef_search: Optional[int] = None,
+        query_vector: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Fused search returning arrays.
+
+        Args:
+            query: Search query
+            top_k: Number of results to return
+            nprobe: FAISS IVF lists to probe for this call
+            ef_search: FAISS HNSW beam width for this call
+            query_vector: Precomputed query embedding for the FAISS side
+
+        Returns:
+            Tuple of (chunk_ids, fused_scores) sorted by descending score
+        """
+        key = None
+        if self.result_cache is not None:
+            key = self._cache_key(query, top_k, nprobe, ef_search)
+            cached = self.result_cache.get(key)
+            if cached is not None:
+                return cached
+
+        depth = top_k * 2
+        results = self._fan_out(
+            lambda: self.bm25.search(query, depth),
+            lambda: self.faiss.search(query, depth, nprobe, ef_search, query_vector)
+        )
+        with span("retrieval.fusion"):
+            fused = self._fuse(results, top_k)
+        # Partial results from a late or failed retriever are never cached
+        if self.result_cache is not None and len(results) == 2:
+            self.result_cache.put(key, freeze(fused))
+        return fused
+
+    def search_batch(
+        self,
+        queries: List[str],
+        top_k: int = 5,
+        nprobe: Optional[int] = None,
+        ef_search: Optional[int] = None
+    ) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Fused search for many queries, running each retriever's batch path once.
+
+        Args:
+            queries: Search queries
+            top_k: Number of results per query
+            nprobe: FAISS IVF lists to probe for this call
+            ef_search: FAISS HNSW beam width for this call
+
+        Returns:
+            List of (chunk_ids, fused_scores) per query, in input order
+        """
+        keys = []
+        fused: List[Optional[Tuple[np.ndarray, np.ndarray]]] = [None] * len(queries)
+        if self.result_cache is not None:
+            keys = [self._cache_key(q, top_k, nprobe, ef_search) for q in queries]
+            for i, key in enumerate(keys):
+                fused[i] = self.result_cache.get(key)
+        pending = [i for i, r in enumerate(fused) if r is None]
+        if not pending:
+            return fused
+
+        pending_queries = [queries[i] for i in pending]
+        depth = top_k * 2
+        results = self._fan_out(
+            lambda: self.bm25.search_batch(pending_queries, depth),
+            lambda: self.faiss.search_batch(pending_queries, depth, nprobe, ef_search)
+        )
+        with span("retrieval.fusion"):
+            for row, i in enumerate(pending):
+                per_query = {name: batch[row] for name, batch in results.items()}
+                fused[i] = self._fuse(per_query, top_k)
+                if self.result_cache is not None and len(results) == 2:
+                    self.result_cache.put(keys[i], freeze(fused[i]))
+        return fused
+
+    def retrieve(
+        self,
+        query: str,
+        top_k: int = 5,
+        nprobe: Optional[int] = None,
+        ef_search: Optional[int] = None,
+        query_vector: Optional[np.ndarray] = None
+    ) -> List[Dict[str, Any]]:
         """
         Retrieve documents using hybrid approach.
-        
+
         Args:
             query: Search query
             top_k: Number of results to return
-        
+            nprobe: FAISS IVF lists to probe for this call
+            ef_search: FAISS HNSW beam width for this call
+            query_vector: Precomputed query embedding for the FAISS side
+
         Returns:
             List of retrieved chunks with fused scores
-        
-        TODO: Implement score fusion and re-ranking.
-        """
-        logger.info(f"Hybrid retrieval for query: {query}")
-        
-        # TODO: Get results from both retrievers
-        # bm25_results = self.bm25.retrieve(query, top_k * 2)
-        # faiss_results = self.faiss.retrieve(query, top_k * 2)
-        
-        # TODO: Fuse scores
-        # TODO: Re-rank and return top_k
-        
-        return []
+        """
+        logger.info("Hybrid retrieval for query: %s", query)
+        ids, scores = self.search(query, top_k, nprobe, ef_search, query_vector)
+        return self._to_results(ids, scores)
+
+    def retrieve_batch(
+        self,
+        queries: List[str],
+        top_k: int = 5,
+        nprobe: Optional[int] = None,
+        ef_search: Optional[int] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Retrieve documents for many queries at once.
+
+        Args:
+            queries: Search queries
+            top_k: Number of results per query
+            nprobe: FAISS IVF lists to probe for this call
+            ef_search: FAISS HNSW beam width for this call
+
+        Returns:
+            List of retrieved chunks with fused scores, one list per query
+        """
+        logger.info("Hybrid batch retrieval for %d queries", len(queries))
+        return [
+            self._to_results(ids, scores)
+            for ids, scores in self.search_batch(queries, top_k, nprobe, ef_search)
+        ]
+
+    def close(self):
+        """Stop the worker pool and release both index handles."""
+        self._executor.shutdown(wait=False)
+        self.bm25.close()
+        self.faiss.close()
+
+    def _to_results(self, ids: np.ndarray, scores: np.ndarray) -> List[Dict[str, Any]]:
+        """Attach chunk metadata to fused ids."""
+        documents = self.faiss.documents
+        results = []
+        for chunk_id, score in zip(ids.tolist(), scores.tolist()):
+            metadata = documents[chunk_id] if chunk_id < len(documents) else {}
+            results.append({**metadata, "chunk_id": chunk_id, "score": score})
+        return results
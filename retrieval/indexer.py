@@ -0,0 +1,334 @@
+import json
+import os
+from pathlib import Path
+from typing import Callable, List, Dict, Any, Optional
+
+import numpy as np
+
+from parsers.cache import file_sha256
+from .bm25 import BM25Retrieval
+from .embeddings import EmbeddingStage
+from .faiss_store import FaissRetrieval
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+
+# progress(stage, done, total) for the stages "scan", "parse", "embed" and "index"
+ProgressCallback = Callable[[str, int, int], None]
+
+
+class IndexManifest:
+    """
+    Record of which source files are indexed under which chunk ids.
+
+    Each file owns a contiguous chunk id range [start, end). Ids are never
+    reused: a changed file gets a fresh range and its old range becomes
+    deleted, so both indexes can apply the change as plain adds and
+    removes. Generations of the indexes the manifest describes are stored
+    so a build interrupted between index writes is detected.
+    """
+
+    def __init__(
+        self,
+        files: Optional[Dict[str, Dict[str, Any]]] = None,
+        next_chunk_id: int = 0,
+        n_deleted: int = 0,
+        generations: Optional[Dict[str, str]] = None
+    ):
+        """
+        Initialize manifest.
+
+        Args:
+            files: Mapping of file name to {"sha256", "chunk_range"}
+            next_chunk_id: First unallocated chunk id
+            n_deleted: Chunk ids deleted since the last full build
+            generations: Index generations keyed by "bm25" and "faiss"
+        """
+        self.files = files or {}
+        self.next_chunk_id = next_chunk_id
+        self.n_deleted = n_deleted
+        self.generations = generations or {}
+
+    @classmethod
+    def load(cls, path: str) -> Optional["IndexManifest"]:
+        """
+        Read a manifest file.
+
+        Args:
+            path: Manifest file path
+
+        Returns:
+            IndexManifest, or None if the file does not exist
+        """
+        if not Path(path).exists():
+            return None
+        with open(path, "r") as f:
+            data = json.load(f)
+        return cls(
+            files=data["files"],
+            next_chunk_id=data["next_chunk_id"],
+            n_deleted=data["n_deleted"],
+            generations=data.get("generations", {})
+        )
+
+    def save(self, path: str):
+        """
+        Write the manifest through a temporary file.
+
+        Args:
+            path: Manifest file path
+        """
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(
+                {
+                    "files": self.files,
+                    "next_chunk_id": self.next_chunk_id,
+                    "n_deleted": self.n_deleted,
+                    "generations": self.generations,
+                },
+                f,
+                indent=2
+            )
+        os.replace(tmp, path)
+
+    def chunk_ids(self, name: str) -> List[int]:
+        """Chunk ids owned by a file."""
+        start, end = self.files[name]["chunk_range"]
+        return list(range(start, end))
+
+    @property
+    def deleted_ratio(self) -> float:
+        """Share of allocated chunk ids that are deleted."""
+        return self.n_deleted / self.next_chunk_id if self.next_chunk_id else 0.0
+
+
+class IncrementalIndexer:
+    """
+    Keeps the BM25 and FAISS indexes in sync with a directory of PDFs.
+
+    Files are compared with the manifest by content hash. New files are
+    parsed, embedded and added; removed files are deleted; changed files
+    are deleted and re-added under fresh chunk ids. Unchanged files are not
+    parsed or embedded. Files that fail to parse are left out of the
+    manifest, so the next run retries them. Once deleted ids exceed compaction_ratio of the id
+    space, or when no consistent manifest exists, everything is rebuilt
+    from scratch with contiguous ids (and IVF/PQ retrained).
+    """
+
+    def __init__(
+        self,
+        parser,
+        bm25: BM25Retrieval,
+        faiss: FaissRetrieval,
+        manifest_path: str,
+        compaction_ratio: float = 0.25,
+        embedder: Optional[EmbeddingStage] = None,
+        progress: Optional[ProgressCallback] = None
+    ):
+        """
+        Initialize indexer.
+
+        Args:
+            parser: PDFParser, or any object whose parse_files(paths) yields
+                (path, chunks) and skips files that fail
+            bm25: BM25 retriever whose index_path is updated
+            faiss: FAISS retriever whose index_path is updated
+            manifest_path: Manifest file path
+            compaction_ratio: Deleted share of chunk ids that triggers a full rebuild
+            embedder: Resumable embedding stage, texts are encoded in one
+                faiss.encode call if omitted
+            progress: Called with (stage, done, total) as files are hashed
+                and parsed, chunks embedded and indexes written
+        """
+        self.parser = parser
+        self.bm25 = bm25
+        self.faiss = faiss
+        self.manifest_path = manifest_path
+        self.compaction_ratio = compaction_ratio
+        self.embedder = embedder
+        self.progress = progress
+
+    @classmethod
+    def from_config(
+        cls,
+        config: Dict[str, Any],
+        parser,
+        bm25: BM25Retrieval,
+        faiss: FaissRetrieval,
+        manifest_path: Optional[str] = None,
+        progress: Optional[ProgressCallback] = None
+    ) -> "IncrementalIndexer":
+        """
+        Create an indexer from the loaded YAML configuration.
+
+        Args:
+            config: Configuration dict
+            parser: Document parser
+            bm25: BM25 retriever
+            faiss: FAISS retriever
+            manifest_path: Override for the manifest under index_path
+            progress: Stage progress callback
+
+        Returns:
+            Configured IncrementalIndexer
+        """
+        index_path = config.get("index_path", "./data/index/")
+        return cls(
+            parser,
+            bm25,
+            faiss,
+            manifest_path or str(Path(index_path) / MANIFEST_FILE),
+            compaction_ratio=config.get("index_compaction_ratio", 0.25),
+            embedder=EmbeddingStage.from_config(config, faiss.encoder),
+            progress=progress
+        )
+
+    def _report(self, stage: str, done: int, total: int):
+        """Forward stage progress to the callback, if any."""
+        if self.progress is not None:
+            self.progress(stage, done, total)
+
+    def _parse(self, paths: List[Path]):
+        """Parse files, reporting one step per file parsed."""
+        for done, item in enumerate(self.parser.parse_files(paths), start=1):
+            self._report("parse", done, len(paths))
+            yield item
+        # Files that failed are skipped without a step; close the stage
+        self._report("parse", len(paths), len(paths))
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        """Embed chunk texts through the embedding stage when configured."""
+        if self.embedder is not None:
+            return self.embedder.run(texts, progress=lambda done, total: self._report("embed", done, total))
+        self._report("embed", 0, len(texts))
+        embeddings = self.faiss.encode(texts)
+        self._report("embed", len(texts), len(texts))
+        return embeddings
+
+    def _consistent(self, manifest: Optional[IndexManifest]) -> bool:
+        """Whether the manifest describes the indexes currently on disk."""
+        return (
+            manifest is not None
+            and self.bm25.is_loaded
+            and self.faiss.is_loaded
+            and manifest.generations.get("bm25") == self.bm25.generation
+            and manifest.generations.get("faiss") == self.faiss.generation
+        )
+
+    def run(self, data_path: str, full: bool = False) -> Dict[str, Any]:
+        """
+        Bring the indexes up to date with the PDFs in data_path.
+
+        Args:
+            data_path: Directory of source PDFs
+            full: Force a full rebuild
+
+        Returns:
+            Summary with the mode used and the files added, changed and removed
+        """
+        paths = {p.name: p for p in sorted(Path(data_path).glob("*.pdf"))}
+        hashes = {}
+        self._report("scan", 0, len(paths))
+        for name, p in paths.items():
+            hashes[name] = file_sha256(str(p))
+            self._report("scan", len(hashes), len(paths))
+
+        manifest = IndexManifest.load(self.manifest_path)
+        if not full and not self._consistent(manifest):
+            logger.info("No manifest matching the current indexes, running a full build")
+            full = True
+        if full:
+            return self._full_build(paths, hashes)
+
+        added = [n for n in hashes if n not in manifest.files]
+        removed = [n for n in manifest.files if n not in hashes]
+        changed = [
+            n for n in hashes
+            if n in manifest.files and manifest.files[n]["sha256"] != hashes[n]
+        ]
+        summary = {"mode": "incremental", "added": added, "changed": changed, "removed": removed}
+        if not (added or changed or removed):
+            logger.info("Indexes are up to date")
+            return summary
+
+        deleted: List[int] = []
+        for name in removed + changed:
+            deleted.extend(manifest.chunk_ids(name))
+            del manifest.files[name]
+
+        manifest.n_deleted += len(deleted)
+
+        # Compact before parsing anything, the full build parses every file anyway
+        if manifest.deleted_ratio > self.compaction_ratio:
+            logger.info(
+                f"{manifest.n_deleted} of {manifest.next_chunk_id} chunk ids deleted, compacting"
+            )
+            result = self._full_build(paths, hashes)
+            result.update({"added": added, "changed": changed, "removed": removed, "compacted": True})
+            return result
+
+        new_chunks: Dict[int, Dict[str, Any]] = {}
+        for path, chunks in self._parse([paths[n] for n in added + changed]):
+            name = Path(path).name
+            start = manifest.next_chunk_id
+            for offset, chunk in enumerate(chunks):
+                new_chunks[start + offset] = chunk
+            manifest.next_chunk_id = start + len(chunks)
+            manifest.files[name] = {"sha256": hashes[name], "chunk_range": [start, manifest.next_chunk_id]}
+
+        new_ids = sorted(new_chunks)
+        texts = [new_chunks[i]["text"] for i in new_ids]
+        if texts:
+            embeddings = self._embed(texts)
+        else:
+            embeddings = np.empty((0, self.faiss.index.d), dtype=np.float32)
+        self._report("index", 0, 2)
+        self.faiss.update_index(embeddings, new_chunks, deleted)
+        self._report("index", 1, 2)
+        self.bm25.update_index({i: new_chunks[i]["text"] for i in new_ids}, deleted)
+        self._report("index", 2, 2)
+
+        manifest.generations = {"bm25": self.bm25.generation, "faiss": self.faiss.generation}
+        manifest.save(self.manifest_path)
+        logger.info(
+            f"Incremental index update: +{len(new_ids)} / -{len(deleted)} chunks "
+            f"({len(added)} added, {len(changed)} changed, {len(removed)} removed files)"
+        )
+        summary.update({"chunks_added": len(new_ids), "chunks_deleted": len(deleted)})
+        return summary
+
+    def _full_build(self, paths: Dict[str, Path], hashes: Dict[str, str]) -> Dict[str, Any]:
+        """Parse and embed every file, rebuild both indexes with contiguous ids."""
+        manifest = IndexManifest()
+        chunks: List[Dict[str, Any]] = []
+        for path, file_chunks in self._parse(list(paths.values())):
+            name = Path(path).name
+            start = len(chunks)
+            chunks.extend(file_chunks)
+            manifest.files[name] = {"sha256": hashes[name], "chunk_range": [start, len(chunks)]}
+        manifest.next_chunk_id = len(chunks)
+        if not chunks:
+            logger.warning(f"No chunks parsed from {len(paths)} files, indexes left unchanged")
+            return {"mode": "full", "files": len(paths), "chunks": 0}
+
+        texts = [c["text"] for c in chunks]
+        embeddings = self._embed(texts)
+        self._report("index", 0, 2)
+        report = self.faiss.build_index(embeddings, chunks, self.faiss.index_path)
+        self._report("index", 1, 2)
+        self.bm25.build_index(texts, self.bm25.index_path)
+        self._report("index", 2, 2)
+
+        manifest.generations = {"bm25": self.bm25.generation, "faiss": self.faiss.generation}
+        Path(self.manifest_path).parent.mkdir(parents=True, exist_ok=True)
+        manifest.save(self.manifest_path)
+        logger.info(f"Full index build: {len(paths)} files, {len(chunks)} chunks")
+        return {
+            "mode": "full",
+            "files": len(paths),
+            "chunks": len(chunks),
+            "faiss_report": report,
+        }
@@ -0,0 +1,389 @@
+import fcntl
+import json
+import multiprocessing
+import os
+import re
+import signal
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Any, Iterator, List, Optional, Tuple
+
+from .generations import build_generation, sortable_id
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+TERMINAL_STATES = ("succeeded", "failed", "cancelled")
+
+STAGE_UNITS = {
+    "scan": "files",
+    "parse": "files",
+    "embed": "chunks",
+    "index": "indexes",
+    "publish": "generations",
+}
+
+_JOB_ID = re.compile(r"[0-9T]+-[0-9a-f]{8}")
+
+# A job whose process never reported its pid is presumed lost after this long
+_START_TIMEOUT_S = 60.0
+
+
+class JobCancelled(BaseException):
+    """
+    Raised in the build process when its job is cancelled.
+
+    Derives from BaseException so per-file ``except Exception`` handlers
+    in the parser do not swallow it on the way out.
+    """
+
+
+def _write_json(path: Path, value: Dict[str, Any]):
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "w") as f:
+        json.dump(value, f, indent=2, default=str)
+    os.replace(tmp, path)
+
+
+def _read_json(path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+class _JobRunner:
+    """Runs one job inside the build process and keeps its status file current."""
+
+    def __init__(self, jobs_path: Path, job_id: str, write_interval_s: float = 0.5):
+        self.jobs_path = jobs_path
+        self.job_id = job_id
+        self.write_interval_s = write_interval_s
+        self.status = _read_json(jobs_path / f"{job_id}.json")
+        self.cancellable = True
+        self.cancel_requested = False
+        self._full = False
+        self._stage_start: Dict[str, Tuple[float, int]] = {}
+        self._written_at = 0.0
+
+    def _write(self):
+        self._written_at = time.monotonic()
+        _write_json(self.jobs_path / f"{self.job_id}.json", self.status)
+
+    def _finish(self, state: str, **fields):
+        self.status.update(status=state, finished_at=time.time(), **fields)
+        self._write()
+        logger.info(f"Index build job {self.job_id} {state}")
+
+    def _on_sigterm(self, signum, frame):
+        self.cancel_requested = True
+        # Once publishing started the new generation goes live regardless
+        if self.cancellable:
+            self.cancellable = False
+            raise JobCancelled()
+
+    def _take_rescan(self, starting_pass: bool = False) -> Optional[str]:
+        """Consume a coalesced submission, returning "full" or "" if there was one."""
+        marker = self.jobs_path / f"{self.job_id}.rescan"
+        try:
+            request = marker.read_text()
+        except FileNotFoundError:
+            return None
+        # A full rebuild request cannot be served by an incremental pass
+        if starting_pass and request == "full" and not self._full:
+            return None
+        marker.unlink(missing_ok=True)
+        return request
+
+    def progress(self, stage: str, done: int, total: int):
+        """Stage progress callback handed to build_generation."""
+        now = time.monotonic()
+        if stage == "scan" and done == 0:
+            # A new pass scans the data directory, which covers every
+            # submission coalesced so far
+            self.status["passes"] += 1
+            self.status["stages"] = {}
+            self._stage_start = {}
+            self._take_rescan(starting_pass=True)
+        if stage == "publish":
+            self.cancellable = False
+
+        started, base = self._stage_start.setdefault(stage, (now, done))
+        elapsed = now - started
+        rate = (done - base) / elapsed if elapsed > 0 and done > base else None
+        self.status["stage"] = stage
+        self.status["stages"][stage] = {
+            "unit": STAGE_UNITS.get(stage, "steps"),
+            "done": done,
+            "total": total,
+            "per_second": round(rate, 1) if rate else None,
+            "eta_s": round((total - done) / rate, 1) if rate else None,
+        }
+        if done in (0, total) or now - self._written_at >= self.write_interval_s:
+            self._write()
+
+    def run(self, config: Dict[str, Any], full: bool, build: Callable):
+        """Run build passes until no coalesced submission is left."""
+        signal.signal(signal.SIGTERM, self._on_sigterm)
+        self.status.update(status="running", pid=os.getpid(), started_at=time.time())
+        self._write()
+        try:
+            if (self.jobs_path / f"{self.job_id}.cancel").exists():
+                raise JobCancelled()
+            self._full = full
+            summary = build(config, full=full, progress=self.progress)
+            while not self.cancel_requested:
+                request = self._take_rescan()
+                if request is None:
+                    break
+                logger.info(f"Index build job {self.job_id} rescanning for coalesced submissions")
+                self.cancellable = True
+                self._full = request == "full"
+                summary = build(config, full=self._full, progress=self.progress)
+        except JobCancelled:
+            self._finish("cancelled")
+            return
+        except Exception as e:
+            logger.error(f"Index build job {self.job_id} failed: {e}")
+            self._finish("failed", error=f"{type(e).__name__}: {e}")
+            return
+        self._finish("succeeded", result=summary)
+
+
+def _run_job(config: Dict[str, Any], jobs_path: str, job_id: str, full: bool, build: Callable):
+    """Build process entry point."""
+    _JobRunner(Path(jobs_path), job_id).run(config, full, build)
+
+
+class IndexJobs:
+    """
+    Index builds submitted as jobs and run in a separate process.
+
+    Parsing, embedding and index writes happen in a spawned worker process,
+    so API workers never block on a build. At most one job runs at a time;
+    a submission while one is running is coalesced into it. If the running
+    job already scanned the data directory, it runs one more incremental
+    pass after publishing so files added meanwhile are picked up.
+
+    State lives in jobs_path so every API worker sees every job:
+        <job_id>.json    - status and stage progress, written by the build process
+        <job_id>.rescan  - coalesced submission not yet covered by a pass
+        <job_id>.cancel  - cancellation requested
+        submit.lock      - serializes submissions across API workers
+
+    Cancelling sends SIGTERM to the build process. The unpublished
+    generation is discarded; finished embedding batches are checkpointed
+    and reused by the next build.
+    """
+
+    def __init__(
+        self,
+        config: Dict[str, Any],
+        jobs_path: str,
+        build: Callable = build_generation,
+        keep: int = 20
+    ):
+        """
+        Initialize job registry.
+
+        Args:
+            config: Configuration dict handed to the build process
+            jobs_path: Directory for job state
+            build: Build function called as build(config, full=, progress=),
+                must be importable by the spawned process
+            keep: Finished jobs whose state is kept on disk
+        """
+        self.config = config
+        self.jobs_path = Path(jobs_path)
+        self.build = build
+        self.keep = keep
+        self._lock = threading.Lock()
+        self._context = multiprocessing.get_context("spawn")
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "IndexJobs":
+        """
+        Create a job registry from the loaded YAML configuration.
+
+        Args:
+            config: Configuration dict
+
+        Returns:
+            IndexJobs keeping state under index_path/jobs
+        """
+        return cls(
+            config,
+            str(Path(config.get("index_path", "./data/index/")) / "jobs"),
+            keep=config.get("index_jobs_keep", 20)
+        )
+
+    def _file(self, job_id: str, suffix: str) -> Path:
+        return self.jobs_path / f"{job_id}.{suffix}"
+
+    @contextmanager
+    def _submit_lock(self) -> Iterator[None]:
+        """Exclusive across threads of this process and across API workers."""
+        self.jobs_path.mkdir(parents=True, exist_ok=True)
+        with self._lock, open(self.jobs_path / "submit.lock", "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _alive(status: Dict[str, Any]) -> bool:
+        """Whether the process of an unfinished job still exists."""
+        pid = status.get("pid")
+        if pid is None:
+            return time.time() - status["submitted_at"] < _START_TIMEOUT_S
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass
+        return True
+
+    def _job_ids(self) -> List[str]:
+        """Known job ids, newest first."""
+        if not self.jobs_path.exists():
+            return []
+        return sorted((p.stem for p in self.jobs_path.glob("*.json")), reverse=True)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Status of a job.
+
+        Args:
+            job_id: Job id
+
+        Returns:
+            Status dict, or None for an unknown job
+        """
+        if not _JOB_ID.fullmatch(job_id):
+            return None
+        status = _read_json(self._file(job_id, "json"))
+        if status is None:
+            return None
+        if status["status"] not in TERMINAL_STATES and not self._alive(status):
+            status.update(status="failed", error="Build process exited without reporting a result")
+        status["cancel_requested"] = self._file(job_id, "cancel").exists()
+        status["rescan_requested"] = self._file(job_id, "rescan").exists()
+        return status
+
+    def active(self) -> Optional[Dict[str, Any]]:
+        """Status of the queued or running job, if any."""
+        for job_id in self._job_ids():
+            status = self.get(job_id)
+            if status is not None and status["status"] not in TERMINAL_STATES:
+                return status
+        return None
+
+    def submit(self, full: bool = False, request_id: Optional[str] = None) -> Tuple[Dict[str, Any], bool]:
+        """
+        Start a build job, or coalesce into the one already running.
+
+        Args:
+            full: Force a full rebuild
+            request_id: Request id recorded on a new job
+
+        Returns:
+            Tuple of (job status, whether the submission was coalesced)
+        """
+        with self._submit_lock():
+            active = self.active()
+            if active is not None:
+                marker = self._file(active["job_id"], "rescan")
+                if full or not marker.exists():
+                    marker.write_text("full" if full else "")
+                active["rescan_requested"] = True
+                logger.info(f"Index build coalesced into running job {active['job_id']}")
+                return active, True
+
+            job_id = sortable_id()
+            status = {
+                "job_id": job_id,
+                "status": "queued",
+                "full": full,
+                "request_id": request_id,
+                "pid": None,
+                "submitted_at": time.time(),
+                "started_at": None,
+                "finished_at": None,
+                "stage": None,
+                "stages": {},
+                "passes": 0,
+                "result": None,
+                "error": None,
+            }
+            _write_json(self._file(job_id, "json"), status)
+            # Spawned, not forked: the API process runs threads and executors
+            process = self._context.Process(
+                target=_run_job,
+                args=(self.config, str(self.jobs_path), job_id, full, self.build),
+                name=f"index-build-{job_id}"
+            )
+            try:
+                process.start()
+            except Exception as e:
+                status.update(status="failed", error=f"{type(e).__name__}: {e}", finished_at=time.time())
+                _write_json(self._file(job_id, "json"), status)
+                raise
+            threading.Thread(
+                target=self._watch, args=(job_id, process), name=f"watch-{job_id}", daemon=True
+            ).start()
+            self._prune()
+        logger.info(f"Index build job {job_id} submitted (full={full})")
+        return status, False
+
+    def _watch(self, job_id: str, process):
+        """Reap the build process and record a result if it died without one."""
+        process.join()
+        status = _read_json(self._file(job_id, "json"))
+        if status is None or status["status"] in TERMINAL_STATES:
+            return
+        cancelled = self._file(job_id, "cancel").exists()
+        status.update(
+            status="cancelled" if cancelled else "failed",
+            error=None if cancelled else f"Build process exited with code {process.exitcode}",
+            finished_at=time.time()
+        )
+        _write_json(self._file(job_id, "json"), status)
+        logger.error(f"Index build job {job_id} process exited with code {process.exitcode}")
+
+    def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Request cancellation of a queued or running job.
+
+        Args:
+            job_id: Job id
+
+        Returns:
+            Job status, unchanged for a finished job; None for an unknown job
+        """
+        status = self.get(job_id)
+        if status is None or status["status"] in TERMINAL_STATES:
+            return status
+        self._file(job_id, "cancel").touch()
+        status["cancel_requested"] = True
+        if status.get("pid") is not None:
+            try:
+                os.kill(status["pid"], signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        logger.info(f"Index build job {job_id} cancellation requested")
+        return status
+
+    def _prune(self):
+        """Delete state of finished jobs beyond the newest keep."""
+        finished = [
+            job_id for job_id in self._job_ids()
+            if (_read_json(self._file(job_id, "json")) or {}).get("status") in TERMINAL_STATES
+        ]
+        for job_id in finished[self.keep:]:
+            for path in self.jobs_path.glob(f"{job_id}.*"):
+                path.unlink(missing_ok=True)
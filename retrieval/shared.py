@@ -0,0 +1,145 @@
+"""Read-only retrieval artefacts shared by forked API workers."""
+import json
+import os
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class ChunkStore:
+    """
+    Immutable chunk metadata packed into one bytes buffer.
+
+    Each chunk is stored as its JSON encoding, located by an int64 offsets
+    array, and decoded on access. Unlike a list of dicts, the store is
+    two objects, so forked workers reading it do not touch (and copy) the
+    pages of thousands of refcounted Python objects. Decoding the top-k
+    chunks of a query costs microseconds.
+    """
+
+    def __init__(self, blob: bytes, offsets: np.ndarray):
+        """
+        Initialize store.
+
+        Args:
+            blob: Concatenated JSON encodings of the chunks
+            offsets: Start of every chunk in blob, followed by len(blob)
+        """
+        self._blob = blob
+        self._offsets = offsets
+
+    @classmethod
+    def from_list(cls, documents: Sequence[Optional[Dict[str, Any]]]) -> "ChunkStore":
+        """
+        Pack chunk metadata.
+
+        Args:
+            documents: Chunk metadata by chunk id, None for deleted ids
+
+        Returns:
+            ChunkStore with the same items
+        """
+        encode = json.JSONEncoder(separators=(",", ":")).encode
+        parts = [encode(document).encode() for document in documents]
+        offsets = np.zeros(len(parts) + 1, dtype=np.int64)
+        np.cumsum([len(part) for part in parts], out=offsets[1:])
+        return cls(b"".join(parts), offsets)
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("chunk id out of range")
+        return json.loads(self._blob[self._offsets[i]:self._offsets[i + 1]])
+
+    def __iter__(self) -> Iterator[Optional[Dict[str, Any]]]:
+        for i in range(len(self)):
+            yield self[i]
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the packed chunks."""
+        return len(self._blob) + self._offsets.nbytes
+
+
+_artefacts: Dict[Tuple[str, str, str], Any] = {}
+_lock = threading.Lock()
+
+
+def _key(kind: str, path: str, generation: str) -> Tuple[str, str, str]:
+    return kind, os.path.realpath(path), generation
+
+
+def register(kind: str, path: str, generation: str, artefacts: Any):
+    """
+    Offer loaded artefacts of an index to later retrievers of this process.
+
+    Retrievers created after a fork inherit the registry, so artefacts
+    registered by the parent are attached to copy-on-write.
+
+    Args:
+        kind: Artefact kind, e.g. "faiss" or "bm25"
+        path: Index directory
+        generation: Index generation the artefacts were loaded from
+        artefacts: Loaded read-only objects
+    """
+    with _lock:
+        _artefacts[_key(kind, path, generation)] = artefacts
+
+
+def attach(kind: str, path: str, generation: str) -> Optional[Any]:
+    """
+    Artefacts registered for an index generation, if any.
+
+    Args:
+        kind: Artefact kind
+        path: Index directory
+        generation: Generation being loaded
+
+    Returns:
+        Registered artefacts, or None to load them from disk
+    """
+    with _lock:
+        return _artefacts.get(_key(kind, path, generation))
+
+
+def release(kind: str, path: str):
+    """Forget every registered generation of an index directory."""
+    path = os.path.realpath(path)
+    with _lock:
+        for key in [k for k in _artefacts if k[0] == kind and k[1] == path]:
+            del _artefacts[key]
+
+
+def shared_encoder(config: Dict[str, Any], create):
+    """
+    One encoder per encoder settings for the whole process.
+
+    Args:
+        config: Configuration dict
+        create: Builds the encoder when none is registered yet
+
+    Returns:
+        The registered encoder
+    """
+    key = (
+        "encoder",
+        config.get("embedding_encoder", "sentence-transformers"),
+        f"{config.get('embedding_model_name', 'all-MiniLM-L6-v2')}/{config.get('embedding_dim', 384)}"
+    )
+    with _lock:
+        if key not in _artefacts:
+            _artefacts[key] = create()
+        return _artefacts[key]
+
+
+def registered() -> List[str]:
+    """Registered artefacts, as "kind:path@generation" strings."""
+    with _lock:
+        return [f"{kind}:{path}@{generation}" for kind, path, generation in _artefacts]
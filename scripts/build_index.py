@@ -4,12 +4,16 @@ Build index script for Winter Garden Legal RAG.
 
 This script:
 1. Loads configuration
-2. Parses documents from data_path
-3. Generates chunks
-4. Creates FAISS and BM25 indexes
-5. Saves indexes to configured paths
+2. Compares PDFs in data_path with the index manifest by content hash
+3. Parses, embeds and adds new or changed PDFs, deletes removed ones
+4. Falls back to a full rebuild of the FAISS and BM25 indexes when there
+   is no manifest, when --full is given, or when enough deletions have
+   piled up to warrant compaction
+5. Writes the result as a new generation under index_path and publishes
+   it by swapping the "current" symlink; running API workers pick it up
 """
 
+import argparse
 import sys
 from pathlib import Path
 
@@ -17,9 +21,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from config.loader import load_config
-from parsers.pdf_parser import PDFParser
-from retrieval.bm25 import BM25Retrieval
-from retrieval.faiss_store import FaissRetrieval
+from retrieval.generations import build_generation
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -27,6 +29,10 @@ logger = get_logger(__name__)
 
 def main():
     """Main index building function."""
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--full", action="store_true", help="Rebuild both indexes from scratch")
+    args = arg_parser.parse_args()
+
     logger.info("Starting index build process")
     
     # Load configuration
@@ -37,36 +43,17 @@ def main():
         sys.exit(1)
     
     data_path = config.get("data_path", "./data/raw_pdfs/")
-    faiss_index_path = config.get("faiss_index_path", "./data/index/faiss/")
-    bm25_index_path = config.get("bm25_index_path", "./data/index/bm25/")
-    chunk_size = config.get("chunk_size", 500)
-    chunk_overlap = config.get("chunk_overlap", 50)
-    
     logger.info(f"Configuration loaded: data_path={data_path}")
     
-    # Create output directories
-    Path(faiss_index_path).mkdir(parents=True, exist_ok=True)
-    Path(bm25_index_path).mkdir(parents=True, exist_ok=True)
-    
-    # Parse documents
-    logger.info("Parsing documents...")
-    parser = PDFParser(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
-    
-    # TODO: Implement parsing
-    # chunks = parser.parse_directory(data_path)
-    # logger.info(f"Parsed {len(chunks)} chunks")
-    
-    # Build FAISS index
-    logger.info("Building FAISS index...")
-    faiss_retriever = FaissRetrieval(faiss_index_path)
-    # TODO: Build and save FAISS index
-    # faiss_retriever.build_index(embeddings, chunks, faiss_index_path)
-    
-    # Build BM25 index
-    logger.info("Building BM25 index...")
-    bm25_retriever = BM25Retrieval(bm25_index_path)
-    # TODO: Build and save BM25 index
-    # bm25_retriever.build_index(documents, bm25_index_path)
+    summary = build_generation(config, full=args.full)
+    logger.info(f"Index build summary: {summary}")
+    if summary["parse_failures"]:
+        logger.warning(
+            f"{len(summary['parse_failures'])} PDFs failed to parse and were skipped: "
+            f"{summary['parse_failures']}"
+        )
+    if summary.get("generation") is None:
+        logger.info("No changes, current generation kept")
     
     logger.info("Index build completed successfully")
 
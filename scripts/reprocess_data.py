@@ -3,11 +3,16 @@
 Reprocess data script for Winter Garden Legal RAG.
 
 This script:
-1. Deletes old processed outputs
-2. Re-runs parsers on raw data
-3. Regenerates processed JSON files
+1. Re-runs parsers on raw data, reusing the content-addressed parse cache
+   for files whose content, parser version and chunk settings are unchanged
+2. Regenerates processed JSON files, one per PDF
+3. Deletes processed outputs and cache entries for PDFs that are gone
+
+Use --force to ignore the cache and rebuild every output from scratch.
 """
 
+import argparse
+import json
 import sys
 import shutil
 from pathlib import Path
@@ -16,6 +21,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from config.loader import load_config
+from parsers.cache import file_sha256
 from parsers.pdf_parser import PDFParser
 from parsers.html_parser import HTMLParser
 from utils.logger import get_logger
@@ -23,25 +29,34 @@ from utils.logger import get_logger
 logger = get_logger(__name__)
 
 
-def clean_outputs(processed_path: str):
+def clean_outputs(processed_path: str, keep=None):
     """
     Delete old processed data.
     
     Args:
         processed_path: Path to processed data directory
+        keep: Output file names to keep; None deletes everything
     """
     logger.info(f"Cleaning old outputs from: {processed_path}")
     
     path = Path(processed_path)
-    if path.exists():
-        shutil.rmtree(path)
-        logger.info("Old outputs deleted")
+    if keep is None:
+        if path.exists():
+            shutil.rmtree(path)
+            logger.info("Old outputs deleted")
+        path.mkdir(parents=True, exist_ok=True)
+        logger.info("Output directory recreated")
+        return
     
-    path.mkdir(parents=True, exist_ok=True)
-    logger.info("Output directory recreated")
+    removed = 0
+    for output in path.glob("*.json"):
+        if output.name not in keep:
+            output.unlink()
+            removed += 1
+    logger.info(f"Deleted {removed} outputs without a source PDF")
 
 
-def reprocess_pdfs(data_path: str, output_path: str, config: dict):
+def reprocess_pdfs(data_path: str, output_path: str, config: dict, force: bool = False):
     """
     Reprocess PDF documents.
     
@@ -49,23 +64,39 @@ def reprocess_pdfs(data_path: str, output_path: str, config: dict):
         data_path: Path to raw PDFs
         output_path: Path to save processed data
         config: Configuration dict
+        force: Bypass the parse cache
+    
+    Returns:
+        Set of output file names written
     """
     logger.info(f"Reprocessing PDFs from: {data_path}")
     
-    parser = PDFParser(
-        chunk_size=config.get("chunk_size", 500),
-        chunk_overlap=config.get("chunk_overlap", 50)
-    )
+    parser = PDFParser.from_config(config, refresh_cache=force)
+    pdf_paths = sorted(Path(data_path).glob("*.pdf"))
+    Path(output_path).mkdir(parents=True, exist_ok=True)
+    
+    written = set()
+    for path, chunks in parser.parse_files(pdf_paths):
+        output = Path(output_path) / f"{Path(path).stem}.json"
+        with open(output, "w") as f:
+            json.dump({"pdf_file": Path(path).name, "chunks": chunks}, f)
+        written.add(output.name)
     
-    # TODO: Implement PDF reprocessing
-    # chunks = parser.parse_directory(data_path)
-    # Save chunks to JSON in output_path
+    if parser.failures:
+        logger.warning(f"{len(parser.failures)} PDFs failed to parse: {sorted(parser.failures)}")
+    if parser.cache is not None:
+        parser.cache.gc(file_sha256(str(p)) for p in pdf_paths)
     
-    logger.info("PDF reprocessing completed")
+    logger.info(f"PDF reprocessing completed: {len(written)} of {len(pdf_paths)} files")
+    return written
 
 
 def main():
     """Main reprocessing function."""
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--force", action="store_true", help="Bypass the parse cache")
+    args = arg_parser.parse_args()
+
     logger.info("Starting data reprocessing")
     
     # Load configuration
@@ -78,11 +109,15 @@ def main():
     data_path = config.get("data_path", "./data/raw_pdfs/")
     processed_path = config.get("processed_path", "./data/processed/")
     
-    # Clean old outputs
-    clean_outputs(processed_path)
+    # A forced run starts from an empty output directory
+    if args.force:
+        clean_outputs(processed_path)
     
     # Reprocess documents
-    reprocess_pdfs(data_path, processed_path, config)
+    written = reprocess_pdfs(data_path, processed_path, config, force=args.force)
+    
+    # Drop outputs of PDFs that were removed or no longer parse
+    clean_outputs(processed_path, keep=written)
     
     logger.info("Data reprocessing completed successfully")
 
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Serve the RAG API from forked workers sharing one copy of indexes and model.
+
+This script:
+1. Imports the app with shared_artefacts on and loads the published index
+   generation (FAISS index, chunk store, BM25 vocabulary and arrays) and
+   the embedding model once, in this parent process
+2. Binds the listening socket and forks the workers; each worker runs
+   uvicorn on the shared socket and its retrievers attach to the
+   parent's artefacts, whose pages stay shared copy-on-write
+3. Restarts workers that die, forwards SIGTERM/SIGINT for a graceful
+   shutdown, and logs the unique (USS), proportional (PSS) and resident
+   memory of every worker
+
+``uvicorn --workers`` spawns fresh interpreters, so each of its workers
+imports the app and loads the indexes and model privately. Generations
+published while serving are loaded by each worker on its own; restart
+the server to share them again.
+
+Example:
+    python scripts/serve.py --workers 4 --port 8000
+"""
+
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.logger import get_logger
+from utils.memory import process_memory
+
+logger = get_logger(__name__)
+
+MIB = 1024 * 1024
+
+
+def preload(routes):
+    """
+    Load the published generation and the embedding model into this process.
+
+    Nothing is searched or encoded here: thread pools of FAISS (OpenMP),
+    torch and the retriever executor do not survive fork, so the first
+    inference has to happen in the workers.
+
+    Args:
+        routes: The imported api.routes module
+
+    Returns:
+        The loaded retriever, kept referenced so its artefacts stay registered
+    """
+    from retrieval.hybrid import HybridRetrieval
+
+    routes.config["shared_artefacts"] = True
+    store = routes.retrievers.store
+    published = store.current_id()
+    retriever = HybridRetrieval.from_config(
+        routes.config, store.path(published) if published is not None else None
+    )
+    retriever.faiss.encoder.load()
+    logger.info(f"Preloaded index generation {published} for sharing")
+    return retriever
+
+
+def bind(host: str, port: int, backlog: int) -> socket.socket:
+    """Open the listening socket every worker accepts on."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def spawn_worker(app, sock: socket.socket, args) -> int:
+    """
+    Fork one uvicorn worker serving app on sock.
+
+    Returns:
+        Worker pid
+    """
+    pid = os.fork()
+    if pid:
+        return pid
+
+    import uvicorn
+    from utils.logger import _stop_pipeline
+
+    # Signals reach workers only through the parent, once: a second
+    # signal makes uvicorn skip the graceful shutdown
+    os.setpgid(0, 0)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    code = 0
+    try:
+        server = uvicorn.Server(uvicorn.Config(
+            app,
+            log_level=args.log_level,
+            timeout_graceful_shutdown=args.graceful_timeout
+        ))
+        server.run(sockets=[sock])
+    except BaseException:
+        logger.exception("Worker failed")
+        code = 1
+    finally:
+        # os._exit skips atexit, flush the log queue first
+        _stop_pipeline()
+        os._exit(code)
+
+
+def log_memory(workers):
+    """Log the memory of the parent and every worker."""
+    total_pss = 0
+    for pid in [os.getpid(), *sorted(workers)]:
+        memory = process_memory(pid)
+        if not memory:
+            return
+        total_pss += memory["pss"]
+        logger.info(
+            "Memory of %s %d: uss=%.1f MiB pss=%.1f MiB rss=%.1f MiB",
+            "worker" if pid in workers else "parent", pid,
+            memory["uss"] / MIB, memory["pss"] / MIB, memory["rss"] / MIB
+        )
+    logger.info("Memory of all processes: pss=%.1f MiB", total_pss / MIB)
+
+
+def main():
+    """Preload, fork the workers and supervise them until told to stop."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=2, help="Worker processes to fork")
+    parser.add_argument("--backlog", type=int, default=2048, help="Listen backlog of the shared socket")
+    parser.add_argument("--log-level", default="warning", help="uvicorn log level")
+    parser.add_argument("--graceful-timeout", type=float, default=30.0,
+                        help="Seconds workers wait for open requests on shutdown")
+    parser.add_argument("--memory-interval", type=float, default=60.0,
+                        help="Seconds between worker memory reports, 0 to disable")
+    args = parser.parse_args()
+
+    from api import routes
+
+    start = time.perf_counter()
+    retriever = preload(routes)
+    # Keep the GC from writing to (and so copying) the preloaded objects
+    gc.collect()
+    gc.freeze()
+    logger.info(f"Preloaded in {time.perf_counter() - start:.2f}s, forking {args.workers} workers")
+
+    sock = bind(args.host, args.port, args.backlog)
+    workers = {}
+    stopping = []
+
+    def stop(signum, frame):
+        stopping.append(signum)
+        for pid in workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for _ in range(args.workers):
+        workers[spawn_worker(routes.app, sock, args)] = time.monotonic()
+    logger.info(f"Serving on http://{args.host}:{args.port} with workers {sorted(workers)}")
+
+    reported_at = time.monotonic()
+    while workers:
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            break
+        if pid == 0:
+            now = time.monotonic()
+            if args.memory_interval and now - reported_at >= args.memory_interval and not stopping:
+                log_memory(workers)
+                reported_at = now
+            time.sleep(0.2)
+            continue
+
+        started_at = workers.pop(pid)
+        if stopping:
+            continue
+        logger.warning(f"Worker {pid} exited with status {os.waitstatus_to_exitcode(status)}, restarting")
+        # Avoid a tight loop when workers crash on startup
+        if time.monotonic() - started_at < 1.0:
+            time.sleep(1.0)
+        workers[spawn_worker(routes.app, sock, args)] = time.monotonic()
+
+    sock.close()
+    retriever.close()
+    logger.info("All workers stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import time
+
+import numpy as np
+
+from llm.answer_cache import SemanticAnswerCache
+
+CHUNKS = [{"chunk_id": 7, "text": "Sidewalk cafes require a permit."}, {"chunk_id": 9, "text": "Fees apply."}]
+RESULT = {"answer": "A permit is required. [1]", "citations": [{"id": 1, "chunk_id": 7}], "ttft_ms": 12.0}
+
+
+def unit(*values):
+    vector = np.array(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def test_paraphrase_hits_only_with_identical_context():
+    cache = SemanticAnswerCache(similarity=0.9)
+    cache.put("Do cafes need a permit?", CHUNKS, "g1", RESULT, unit(1, 0, 0))
+
+    hit = cache.get("Is a permit needed for a cafe?", CHUNKS, "g1", unit(1, 0.2, 0))
+    assert hit["answer"] == RESULT["answer"]
+    assert 0.9 < hit["similarity"] < 1.0
+    # Different query meaning, different chunk set or order: miss
+    assert cache.get("Noise limits?", CHUNKS, "g1", unit(0, 1, 0)) is None
+    assert cache.get("Do cafes need a permit?", CHUNKS[:1], "g1", unit(1, 0, 0)) is None
+    assert cache.get("Do cafes need a permit?", CHUNKS[::-1], "g1", unit(1, 0, 0)) is None
+    # Without an embedding only the normalized query matches
+    assert cache.get("  do CAFES need a permit? ", CHUNKS, "g1")["similarity"] == 1.0
+    assert cache.stats()["similar_hits"] == 1
+
+
+def test_new_generation_invalidates_older_ones():
+    cache = SemanticAnswerCache()
+    cache.put("q", CHUNKS, "g1", RESULT)
+    assert cache.get("q", CHUNKS, "g2") is None
+    assert len(cache) == 0
+    assert cache.stats()["invalidations"] == 1
+    # A late request still on the replaced generation is not cached
+    cache.put("q", CHUNKS, "g1", RESULT)
+    assert cache.get("q", CHUNKS, "g1") is None
+    assert len(cache) == 0
+
+
+def test_lru_and_ttl_eviction(monkeypatch):
+    cache = SemanticAnswerCache(maxsize=2, ttl_seconds=10)
+    for query in ("a", "b", "c"):
+        cache.put(query, CHUNKS, "g1", RESULT)
+    assert cache.get("a", CHUNKS, "g1") is None
+    assert cache.stats()["evictions"] == 1
+
+    now = time.time()
+    monkeypatch.setattr("llm.answer_cache.time.time", lambda: now + 11)
+    assert cache.get("c", CHUNKS, "g1") is None
+    assert cache.stats()["expirations"] == 2
+    assert len(cache) == 0
+
+
+def test_persists_across_restarts(tmp_path):
+    path = tmp_path / "answers.npz"
+    cache = SemanticAnswerCache(path=str(path), namespace="fake:m")
+    cache.put("Do cafes need a permit?", CHUNKS, "g1", RESULT, unit(1, 0, 0))
+    cache.put("no vector", CHUNKS, "g1", RESULT)
+    cache.save()
+
+    restored = SemanticAnswerCache(path=str(path), namespace="fake:m")
+    assert len(restored) == 2
+    hit = restored.get("Cafe permit needed?", CHUNKS, "g1", unit(1, 0.1, 0))
+    assert hit["citations"] == RESULT["citations"]
+    assert "ttft_ms" not in hit
+    # Answers of another model are not reused
+    assert len(SemanticAnswerCache(path=str(path), namespace="openai:m")) == 0
@@ -1,16 +1,102 @@
 from fastapi.testclient import TestClient
+import json
+import time
 import pytest
 
+import api.routes as api_routes
 from api.routes import app
+from llm.client import LLMClient, LLMProvider
 
 client = TestClient(app)
 
 
+@pytest.fixture(autouse=True)
+def started(monkeypatch):
+    """The module client skips the lifespan; treat startup loading as done."""
+    monkeypatch.setitem(api_routes.startup, "loading", False)
+
+
 def test_health():
     """Test health endpoint."""
     response = client.get("/health")
     assert response.status_code == 200
-    assert response.json() == {"status": "ok"}
+    assert response.json()["status"] == "ok"
+    assert "generation" in response.json()
+
+
+def test_ready_reports_loading(monkeypatch):
+    """Test readiness stays false until startup loading is done."""
+    monkeypatch.setattr("api.routes.startup", {"loading": True, "error": None})
+    response = client.get("/ready")
+    assert response.status_code == 503
+    assert response.json()["ready"] is False
+
+
+def test_ready_after_warm_up(tmp_path, monkeypatch):
+    """Test the lifespan loads the published generation and runs the warm-up query."""
+    from retrieval.bm25 import BM25Retrieval
+    from retrieval.encoders import HashingEncoder
+    from retrieval.faiss_store import FaissRetrieval
+    from retrieval.generations import GenerationManager, GenerationStore
+    from retrieval.hybrid import HybridRetrieval
+
+    texts = ["Sidewalk cafes require a permit.", "Noise is limited after 10 p.m."]
+    documents = [{"text": t, "pdf_file": "a.pdf", "page": 1} for t in texts]
+    encoder = HashingEncoder(dim=32)
+    store = GenerationStore(str(tmp_path))
+    generation_id, path = store.new_generation()
+    BM25Retrieval(str(path / "bm25")).build_index(texts, str(path / "bm25"))
+    FaissRetrieval(str(path / "faiss"), encoder=encoder).build_index(encoder.encode(texts), documents, str(path / "faiss"))
+    store.publish(generation_id)
+    manager = GenerationManager(store, lambda p: HybridRetrieval(
+        "", "", bm25=BM25Retrieval(str(p / "bm25")), faiss=FaissRetrieval(str(p / "faiss"), encoder=encoder)
+    ))
+
+    monkeypatch.setattr("api.routes.retrievers", manager)
+    monkeypatch.setattr("api.routes.startup", {**api_routes.startup, "loading": True, "error": None})
+    monkeypatch.setitem(api_routes.config, "warmup_query", "sidewalk cafe permit")
+    with TestClient(app) as live:
+        for _ in range(200):
+            data = live.get("/ready").json()
+            if not data["loading"]:
+                break
+            time.sleep(0.01)
+        assert data["ready"] is True
+        assert data["generation"] == generation_id
+        assert data["load_s"] is not None and data["warmup_s"] is not None
+        assert data["import_s"] > 0
+
+
+def test_health_answers_during_slow_warm_up(tmp_path, monkeypatch):
+    """Test queries get 503 without stalling the event loop while the warm-up loads."""
+    from retrieval.generations import GenerationManager, GenerationStore
+
+    class Retriever:
+        generation = ""
+        faiss = bm25 = type("Index", (), {"is_loaded": False})()
+
+    def slow_factory(path):
+        time.sleep(1.5)
+        return Retriever()
+
+    monkeypatch.setattr("api.routes.retrievers", GenerationManager(GenerationStore(str(tmp_path)), slow_factory))
+    monkeypatch.setattr("api.routes.startup", {**api_routes.startup, "loading": True, "error": None})
+    monkeypatch.setitem(api_routes.config, "warmup_query", "")
+    with TestClient(app) as live:
+        start = time.perf_counter()
+        response = live.post("/query", json={"query": "test query"})
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
+        assert live.post("/query/batch", json={"queries": ["a"]}).status_code == 503
+        assert live.get("/health").status_code == 200
+        assert live.get("/ready").status_code == 503
+        assert time.perf_counter() - start < 1.0
+        for _ in range(300):
+            data = live.get("/ready").json()
+            if not data["loading"]:
+                break
+            time.sleep(0.01)
+        assert data["load_s"] >= 1.5
 
 
 def test_query_endpoint():
@@ -39,14 +125,129 @@ def test_query_with_request_id():
     assert response.json()["request_id"] == test_id
 
 
-def test_index_endpoint():
-    """Test index rebuild endpoint."""
+def test_index_endpoint(monkeypatch):
+    """Test index rebuild endpoint submits a job."""
+    monkeypatch.setattr(
+        "api.routes.index_jobs.submit",
+        lambda full, request_id: ({"job_id": "20250101T000000000000-0123abcd", "status": "queued"}, False)
+    )
     response = client.post("/index")
     assert response.status_code == 200
-    assert "status" in response.json()
+    assert response.json()["status"] == "queued"
+    assert response.json()["job_id"] == "20250101T000000000000-0123abcd"
     assert "request_id" in response.json()
 
 
+def test_index_job_unknown():
+    """Test job status and cancellation of an unknown job."""
+    assert client.get("/index/20250101T000000000000-0123abcd").status_code == 404
+    assert client.delete("/index/20250101T000000000000-0123abcd").status_code == 404
+
+
+def parse_sse(body):
+    """Split a server-sent event stream into (event, data) pairs."""
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_query_stream_endpoint(monkeypatch):
+    """Test streaming endpoint sends citations, tokens, then done."""
+    chunks = [{"text": "Sidewalk cafes require a permit.", "pdf_file": "a.pdf", "page": 3, "chunk_id": 7}]
+
+    async def retrieve_chunks(request, request_id):
+        return chunks, "gen-stream", None
+
+    monkeypatch.setattr("api.routes.retrieve_chunks", retrieve_chunks)
+    monkeypatch.setattr("api.routes.llm_client", LLMClient(provider=LLMProvider.FAKE))
+    monkeypatch.setattr("api.routes.answer_cache", None)
+    response = client.post(
+        "/query/stream",
+        json={"query": "Do sidewalk cafes need a permit?"},
+        headers={"X-Request-ID": "stream-1"}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = parse_sse(response.text)
+    assert events[0] == ("citations", {"request_id": "stream-1", "citations": events[0][1]["citations"]})
+    assert events[0][1]["citations"][0]["chunk_id"] == 7
+    tokens = [data["text"] for event, data in events if event == "token"]
+    assert "".join(tokens).endswith("[1]")
+    assert events[-1][0] == "done"
+    assert events[-1][1]["ttft_ms"] <= events[-1][1]["latency_ms"]
+
+
+def test_query_answer_cache_header(monkeypatch):
+    """Test a repeated query is answered from the answer cache."""
+    from llm.answer_cache import SemanticAnswerCache
+
+    chunks = [{"text": "Sidewalk cafes require a permit.", "pdf_file": "a.pdf", "page": 3, "chunk_id": 7}]
+
+    async def retrieve_chunks(request, request_id):
+        return chunks, "gen-cache", None
+
+    monkeypatch.setattr("api.routes.retrieve_chunks", retrieve_chunks)
+    monkeypatch.setattr("api.routes.llm_client", LLMClient(provider=LLMProvider.FAKE))
+    monkeypatch.setattr("api.routes.answer_cache", SemanticAnswerCache())
+    first = client.post("/query", json={"query": "Do sidewalk cafes need a permit?"})
+    second = client.post("/query", json={"query": "do sidewalk cafes  need a permit?"})
+    assert first.headers["X-Answer-Cache"] == "miss"
+    assert second.headers["X-Answer-Cache"] == "hit"
+    assert second.json()["answer"] == first.json()["answer"]
+    assert second.json()["citations"] == first.json()["citations"]
+
+
+def test_query_timings_and_grounding(monkeypatch):
+    """Test the per-stage breakdown and grounding check of /query."""
+    chunks = [{"text": "Sidewalk cafes require a permit.", "pdf_file": "a.pdf", "page": 3, "chunk_id": 7}]
+
+    async def retrieve_chunks(request, request_id):
+        return chunks, "gen-timings", None
+
+    monkeypatch.setattr("api.routes.retrieve_chunks", retrieve_chunks)
+    monkeypatch.setattr("api.routes.llm_client", LLMClient(provider=LLMProvider.FAKE))
+    monkeypatch.setattr("api.routes.answer_cache", None)
+    data = client.post("/query", json={"query": "Do sidewalk cafes need a permit?", "include_timings": True}).json()
+    assert {"context", "generation", "generation.first_token", "grounding"} <= set(data["timings"])
+    assert data["grounding"]["citations_valid"]
+    assert client.post("/query", json={"query": "Do sidewalk cafes need a permit?"}).json()["timings"] is None
+
+
+def test_metrics_endpoint():
+    """Test Prometheus metrics exposition."""
+    client.get("/health")
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'rag_http_requests_total{route="/health",method="GET",status="200"}' in response.text
+    assert "# TYPE rag_stage_duration_seconds histogram" in response.text
+    assert "# TYPE rag_cache_hits_total counter" in response.text
+
+
+def test_stats_endpoint():
+    """Test stats endpoint exposes cache counters."""
+    response = client.get("/stats")
+    assert response.status_code == 200
+    assert "caches" in response.json()
+
+
+def test_query_batch_endpoint():
+    """Test batch query endpoint returns one item per query."""
+    response = client.post(
+        "/query/batch",
+        json={"queries": ["permit fees", "noise ordinance"]},
+        headers={"X-Request-ID": "batch-1"}
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["request_id"] == "batch-1"
+    assert [item["request_id"] for item in data["results"]] == ["batch-1-0", "batch-1-1"]
+    assert [item["query"] for item in data["results"]] == ["permit fees", "noise ordinance"]
+    assert "retrieval_ms" in data
+    assert "latency_ms" in data
+
+
 # TODO: Add integration tests
 # TODO: Add tests for retrieval modules
-# TODO: Add tests for validators
@@ -0,0 +1,52 @@
+import asyncio
+
+from retrieval.batching import MicroBatcher
+
+
+def test_concurrent_submits_share_a_batch():
+    calls = []
+
+    def double(items):
+        calls.append(list(items))
+        return [item * 2 for item in items]
+
+    async def run():
+        batcher = MicroBatcher(double, max_batch_size=8, max_wait_ms=50)
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+        await batcher.close()
+        return batcher, results
+
+    batcher, results = asyncio.run(run())
+    assert results == [0, 2, 4, 6, 8]
+    assert calls == [[0, 1, 2, 3, 4]]
+    stats = batcher.stats()
+    assert stats["batches"] == 1
+    assert stats["batch_size_histogram"] == {"8": 1}
+
+
+def test_batches_are_capped_at_max_size():
+    async def run():
+        batcher = MicroBatcher(lambda items: items, max_batch_size=2, max_wait_ms=50)
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+        await batcher.close()
+        return batcher, results
+
+    batcher, results = asyncio.run(run())
+    assert results == list(range(5))
+    assert batcher.stats()["batches"] == 3
+
+
+def test_batch_failure_reaches_every_caller():
+    def fail(items):
+        raise RuntimeError("encoder down")
+
+    async def run():
+        batcher = MicroBatcher(fail, max_wait_ms=10)
+        results = await asyncio.gather(
+            batcher.submit("a"), batcher.submit("b"), return_exceptions=True
+        )
+        await batcher.close()
+        return results
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, RuntimeError) for r in results)
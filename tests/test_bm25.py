@@ -0,0 +1,113 @@
+import math
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from retrieval.bm25 import BM25Retrieval, tokenize
+
+
+DOCUMENTS = [
+    "The city shall issue a building permit before construction begins.",
+    "Noise ordinance: no amplified sound after 10 p.m. within city limits.",
+    "Setback requirements for residential lots are defined in section 118-5.2.",
+    "The city commission shall set permit fees by resolution.",
+    "Fences shall not exceed six feet in height in residential districts.",
+    "Section 18-123 governs sidewalk cafe permits and permit fees.",
+]
+
+
+def reference_scores(documents, query, k1=1.5, b=0.75):
+    """Plain Python BM25 used as ground truth."""
+    docs = [Counter(tokenize(d)) for d in documents]
+    lens = [sum(d.values()) for d in docs]
+    avgdl = sum(lens) / len(lens)
+    n = len(docs)
+    scores = []
+    for doc, dl in zip(docs, lens):
+        score = 0.0
+        for term, qtf in Counter(tokenize(query)).items():
+            df = sum(1 for d in docs if term in d)
+            if df == 0:
+                continue
+            idf = math.log1p((n - df + 0.5) / (df + 0.5))
+            tf = doc[term]
+            score += qtf * idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * dl / avgdl))
+        scores.append(score)
+    return scores
+
+
+@pytest.fixture
+def retriever(tmp_path):
+    bm25 = BM25Retrieval(str(tmp_path))
+    bm25.build_index(DOCUMENTS, str(tmp_path))
+    return bm25
+
+
+def test_tokenize_keeps_section_numbers():
+    assert tokenize("See Sec. 18-123 and 5.2.") == ["see", "sec", "18-123", "and", "5.2"]
+
+
+def test_scores_match_reference(retriever):
+    query = "city permit fees"
+    expected = reference_scores(DOCUMENTS, query)
+    ids, scores = retriever.search(query, top_k=len(DOCUMENTS))
+    for chunk_id, score in zip(ids, scores):
+        assert score == pytest.approx(expected[chunk_id], rel=1e-5)
+    assert list(ids) == sorted(
+        (i for i, s in enumerate(expected) if s > 0), key=lambda i: (-expected[i], i)
+    )
+
+
+def test_index_is_memory_mapped(tmp_path, retriever):
+    reloaded = BM25Retrieval(str(tmp_path))
+    assert isinstance(reloaded._doc_ids.base, np.memmap)
+    assert reloaded.retrieve("noise", top_k=1)[0]["chunk_id"] == 1
+
+
+def test_missing_index_returns_empty(tmp_path):
+    bm25 = BM25Retrieval(str(tmp_path / "missing"))
+    assert bm25.retrieve("permit") == []
+    assert bm25.retrieve("unknownterm") == []
+
+
+def test_pruned_matches_exhaustive(tmp_path):
+    rng = np.random.default_rng(7)
+    vocab = ["city", "shall", "section", "permit"] + [f"term{i}" for i in range(300)]
+    weights = np.r_[[8.0] * 4, 1.0 / np.arange(1, 301)]
+    weights /= weights.sum()
+    documents = [
+        " ".join(rng.choice(vocab, size=int(rng.integers(5, 80)), p=weights))
+        for _ in range(3000)
+    ]
+    bm25 = BM25Retrieval(str(tmp_path), block_size=16)
+    bm25.build_index(documents, str(tmp_path))
+
+    for _ in range(100):
+        query = " ".join(rng.choice(vocab[:60], size=int(rng.integers(1, 10))))
+        for top_k in (1, 5, 20):
+            exhaustive = bm25.search(query, top_k, pruned=False)
+            pruned = bm25.search(query, top_k, pruned=True)
+            np.testing.assert_array_equal(exhaustive[0], pruned[0])
+            np.testing.assert_array_equal(exhaustive[1], pruned[1])
+
+
+def test_search_batch_matches_search(retriever):
+    queries = ["city permit fees", "noise", "residential setback section 118-5.2", "zzz"]
+    batch = retriever.search_batch(queries, top_k=3)
+    for query, (ids, scores) in zip(queries, batch):
+        expected_ids, expected_scores = retriever.search(query, top_k=3)
+        np.testing.assert_array_equal(ids, expected_ids)
+        np.testing.assert_allclose(scores, expected_scores, rtol=1e-6)
+
+
+def test_query_terms_left_without_postings_by_deletes(tmp_path):
+    bm25 = BM25Retrieval(str(tmp_path))
+    bm25.build_index(DOCUMENTS[:3], str(tmp_path))
+    # Chunk 1 is the only one containing "noise"
+    bm25.update_index({}, [1])
+
+    for pruned in (True, False):
+        ids, _ = bm25.search("permit noise", top_k=3, pruned=pruned)
+        assert ids.tolist() == [0]
+    assert bm25.search("noise", top_k=3)[0].tolist() == []
@@ -0,0 +1,64 @@
+import numpy as np
+
+from retrieval.bm25 import BM25Retrieval
+from retrieval.cache import LRUCache, normalize_query
+from retrieval.faiss_store import FaissRetrieval
+
+
+def test_lru_eviction_and_stats():
+    cache = LRUCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    stats = cache.stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+    assert stats["evictions"] == 1
+    assert stats["size"] == 2
+
+
+def test_ttl_expiry(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("retrieval.cache.time.monotonic", lambda: now[0])
+    cache = LRUCache(maxsize=4, ttl_seconds=10)
+    cache.put("a", 1)
+    now[0] += 11
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_normalize_query():
+    assert normalize_query("  Permit   FEES\n") == "permit fees"
+
+
+def test_result_cache_invalidated_by_rebuild(tmp_path):
+    cache = LRUCache(maxsize=16)
+    bm25 = BM25Retrieval(str(tmp_path), result_cache=cache)
+    bm25.build_index(["noise ordinance", "permit fees"], str(tmp_path))
+
+    first = bm25.search("Noise", top_k=1)
+    second = bm25.search("noise ", top_k=1)
+    assert first is second
+    assert cache.stats()["hits"] == 1
+
+    bm25.build_index(["permit fees", "noise ordinance"], str(tmp_path))
+    ids, _ = bm25.search("noise", top_k=1)
+    assert list(ids) == [1]
+    assert cache.stats()["hits"] == 1
+
+
+def test_embedding_cache_skips_encoder(tmp_path):
+    embeddings = np.eye(4, dtype=np.float32)
+    faiss = FaissRetrieval(str(tmp_path), embedding_cache=LRUCache(maxsize=16))
+    faiss.build_index(embeddings, [{}] * 4, str(tmp_path))
+    calls = []
+    faiss.encode = lambda texts: calls.append(texts) or embeddings[[2]]
+
+    for query in ("Setbacks", "setbacks", "SETBACKS  "):
+        ids, _ = faiss.search(query, top_k=1)
+        assert list(ids) == [2]
+    assert calls == [["setbacks"]]
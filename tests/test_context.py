@@ -0,0 +1,96 @@
+import pytest
+
+from llm.client import LLMClient, LLMProvider
+from llm.context import ContextPacker, _estimate_tokens, count_tokens
+from parsers.pdf_parser import PDFParser
+
+PAGE = " ".join(
+    f"Sec. 18-{n}. Sidewalk cafes shall obtain permit number {n} from the city before operating." for n in range(12)
+)
+
+
+def page_chunks(pdf_file="code.pdf", page=4, first_id=0):
+    windows = PDFParser(chunk_size=120, chunk_overlap=30).split_text(PAGE)
+    return [
+        {"text": text, "pdf_file": pdf_file, "page": page, "char_start": start, "char_end": end,
+         "chunk_id": first_id + i, "score": 1.0 / (i + 1)}
+        for i, (start, end, text) in enumerate(windows)
+    ]
+
+
+def test_overlapping_chunks_merge_into_page_text():
+    chunks = page_chunks()
+    # Retrieved out of order, with a gap between chunks 2 and 4
+    retrieved = [chunks[1], chunks[0], chunks[4], chunks[2]]
+    passages = ContextPacker(max_tokens=0).pack(retrieved)
+
+    assert [p["chunk_ids"] for p in passages] == [[0, 1, 2], [4]]
+    merged = passages[0]
+    assert merged["text"] == PAGE[merged["char_start"]:merged["char_end"]]
+    assert merged["chunk_id"] == 0 and merged["score"] == 1.0
+    for span, chunk in zip(merged["spans"], chunks):
+        assert merged["text"][span["start"]:span["end"]] == chunk["text"]
+    assert count_tokens(merged["text"]) < sum(count_tokens(c["text"]) for c in chunks[:3])
+
+
+def test_near_duplicates_are_dropped():
+    original = page_chunks()[:1]
+    copy = [dict(original[0], pdf_file="copy.pdf", chunk_id=99, score=0.1)]
+    passages = ContextPacker(max_tokens=0).pack(copy + original)
+    assert [p["chunk_id"] for p in passages] == [0]
+    assert passages[0]["duplicates"] == [99]
+
+
+def test_budget_is_filled_greedily_by_score():
+    long_chunk = {"text": PAGE, "pdf_file": "a.pdf", "page": 1, "chunk_id": 1, "score": 0.8}
+    short = {"text": "Noise is limited after 10 p.m.", "pdf_file": "b.pdf", "page": 2, "chunk_id": 2, "score": 0.5}
+    best = {"text": "Fees are set by resolution.", "pdf_file": "c.pdf", "page": 3, "chunk_id": 3, "score": 0.9}
+    passages = ContextPacker(max_tokens=50).pack([long_chunk, short, best])
+    assert [p["chunk_id"] for p in passages] == [3, 2]
+    assert sum(p["tokens"] for p in passages) <= 50
+
+    # The best passage alone over budget is truncated rather than dropped
+    passages = ContextPacker(max_tokens=40).pack([long_chunk])
+    assert passages[0]["truncated"] and passages[0]["tokens"] <= 40
+    assert PAGE.startswith(passages[0]["text"])
+
+
+def test_client_cites_packed_passages():
+    client = LLMClient(provider=LLMProvider.FAKE, packer=ContextPacker(max_tokens=0))
+    chunks = page_chunks()
+    result = client.generate_with_citations([chunks[1], chunks[0]], "Do sidewalk cafes need a permit?")
+    assert result["answer"].endswith("[1]")
+    assert len(result["citations"]) == 1
+    assert result["citations"][0]["chunk_ids"] == [0, 1]
+
+
+# Parsed ordinance chunks: prose, section headings, a table of contents
+# page and an all-caps table, the last two being the hardest to estimate
+ORDINANCE_SAMPLES = [
+    "water utility fees. A rate study shall be conducted periodically to ensure the equity of the service "
+    "charges. (Code 1988, \u00a7 25-23; Ord. No. 20-46, \u00a7 2, 10-22- 20) Sec. 78-204. Fee imposed. (a) A "
+    "stormwater management utility fee is imposed upon each lot and parcel within the city for services and "
+    "facilities provided by the storm- water management utility system.",
+    "Streets. Sec. 110-202. Alleys. Sec. 110-203. Easements. WINTER GARDEN CODE CD110:2Supp. No. 22",
+    "CDi:39, CDi:40 25 CDi:41, CDi:42 25 CDi:43, CDi:44 25 CDi:45, CDi:46 25 CDi:47, CDi:48 25 Page No. "
+    "Supp. No. CDi:69, CDi:70 25 CDi:71, CDi:72 25 CDi:73 25",
+    "TABLE 1: SIGNS IN RESIDENTIAL DISTRICTS TYPES OF SIGNS AL- LOWED NUMBER OF SIGNS AL- LOWED PERMITTED "
+    "SIGN AREA MAXIMUM HEIGHT (IF APPLICABLE) RESIDENTIAL AND PUD SUBDIVISIONS, APART- MENTS AND "
+    "CONDOMINIUM COMPLEXES, MULTI-FAMILY DWELLINGS FREESTAND- ING ONE PER EN- TRANCE/EXIT 32 SQUARE FEET",
+]
+
+
+@pytest.mark.parametrize("encoding", ["cl100k_base", "o200k_base"])
+def test_token_estimate_stays_close_to_bpe(encoding):
+    tiktoken = pytest.importorskip("tiktoken")
+    try:
+        bpe = tiktoken.get_encoding(encoding)
+    except Exception as e:
+        pytest.skip(f"{encoding} not available: {e}")
+
+    real = [len(bpe.encode_ordinary(text)) for text in ORDINANCE_SAMPLES]
+    estimated = [_estimate_tokens(text) for text in ORDINANCE_SAMPLES]
+    for r, e in zip(real, estimated):
+        assert 0.9 * r <= e <= 1.5 * r
+    # A packed context must not come out under the provider's count
+    assert sum(estimated) >= sum(real)
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from retrieval.embeddings import EmbeddingStage
+from retrieval.encoders import HashingEncoder, l2_normalize
+
+TEXTS = [f"section {i} permit fees noise ordinance {i * 7 % 13}" for i in range(50)]
+
+
+class FlakyEncoder(HashingEncoder):
+    """Fails on the n-th call, counting every text it encodes."""
+
+    def __init__(self, fail_on_call=None):
+        super().__init__(dim=32)
+        self.fail_on_call = fail_on_call
+        self.calls = 0
+        self.encoded = 0
+
+    def encode(self, texts):
+        self.calls += 1
+        if self.calls == self.fail_on_call:
+            raise RuntimeError("interrupted")
+        self.encoded += len(texts)
+        return super().encode(texts)
+
+
+def test_hashing_encoder_is_deterministic():
+    a = HashingEncoder(dim=64).encode(TEXTS[:3])
+    b = HashingEncoder(dim=64).encode(TEXTS[:3])
+    assert a.shape == (3, 64)
+    np.testing.assert_array_equal(a, b)
+
+
+def test_interrupted_run_resumes_from_checkpoint(tmp_path):
+    flaky = FlakyEncoder(fail_on_call=3)
+    with pytest.raises(RuntimeError):
+        EmbeddingStage(str(tmp_path), flaky, batch_size=10).run(TEXTS)
+    assert flaky.encoded == 20
+
+    resumed = FlakyEncoder()
+    vectors = EmbeddingStage(str(tmp_path), resumed, batch_size=10).run(TEXTS)
+    assert resumed.encoded == 30
+    np.testing.assert_allclose(vectors, l2_normalize(HashingEncoder(dim=32).encode(TEXTS)), rtol=1e-6)
+
+    # Different inputs start over instead of reusing stale rows
+    changed = FlakyEncoder()
+    EmbeddingStage(str(tmp_path), changed, batch_size=10).run(TEXTS[:-1])
+    assert changed.encoded == 49
+
+
+@pytest.mark.parametrize("dtype,itemsize,tolerance", [("float16", 2, 1e-3), ("int8", 1, 2e-2)])
+def test_quantized_storage(tmp_path, dtype, itemsize, tolerance):
+    encoder = HashingEncoder(dim=32)
+    vectors = EmbeddingStage(str(tmp_path), encoder, dtype=dtype).run(TEXTS)
+    exact = l2_normalize(encoder.encode(TEXTS))
+
+    stored = np.load(tmp_path / "vectors.npy", mmap_mode="r")
+    assert stored.dtype.itemsize == itemsize
+    assert vectors.dtype == np.float32
+    np.testing.assert_allclose(np.sum(vectors * exact, axis=1), 1.0, atol=tolerance)
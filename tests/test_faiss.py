@@ -0,0 +1,110 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from retrieval.faiss_store import FaissRetrieval
+
+
+def clustered_embeddings(n=2000, dim=32, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(20, dim))
+    return (centers[rng.integers(0, 20, n)] + 0.2 * rng.normal(size=(n, dim))).astype(np.float32)
+
+
+@pytest.mark.parametrize("index_type,params", [
+    ("flat", {}),
+    ("ivf_flat", {"nlist": 16}),
+    ("ivf_pq", {"nlist": 16, "pq_m": 8, "pq_nbits": 6}),
+    ("hnsw", {"hnsw_m": 16}),
+])
+def test_build_report_and_reload(tmp_path, index_type, params):
+    embeddings = clustered_embeddings()
+    documents = [{"text": f"chunk {i}", "pdf_file": "a.pdf"} for i in range(len(embeddings))]
+
+    retriever = FaissRetrieval(str(tmp_path), index_type=index_type, index_params=params)
+    report = retriever.build_index(embeddings, documents, str(tmp_path))
+
+    assert report["index_type"] == index_type
+    assert report["index_bytes"] > 0
+    assert 0.0 <= report["recall_at_k"]["10"] <= 1.0
+    if index_type == "flat":
+        assert report["recall_at_k"]["10"] == 1.0
+
+    reloaded = FaissRetrieval(str(tmp_path))
+    assert reloaded.index_type == index_type
+    ids, scores = reloaded.search_vectors(embeddings[:3], top_k=5, nprobe=16, ef_search=128)
+    assert ids.shape == (3, 5)
+    assert list(ids[:, 0]) == [0, 1, 2] or index_type == "ivf_pq"
+
+
+def test_retrieve_attaches_metadata(tmp_path):
+    embeddings = clustered_embeddings(n=100)
+    documents = [{"text": f"chunk {i}", "page": i} for i in range(100)]
+    retriever = FaissRetrieval(str(tmp_path))
+    retriever.build_index(embeddings, documents, str(tmp_path))
+    retriever.encode = lambda texts: embeddings[[7]]
+
+    results = retriever.retrieve("setback rules", top_k=2)
+    assert results[0]["chunk_id"] == 7
+    assert results[0]["page"] == 7
+
+
+def test_unknown_index_type(tmp_path):
+    with pytest.raises(ValueError):
+        FaissRetrieval(str(tmp_path), index_type="lsh")
+
+
+def test_search_batch_encodes_once(tmp_path):
+    embeddings = clustered_embeddings(n=100)
+    retriever = FaissRetrieval(str(tmp_path))
+    retriever.build_index(embeddings, [{}] * 100, str(tmp_path))
+    calls = []
+
+    def fake_encode(texts):
+        calls.append(list(texts))
+        return embeddings[[int(t) for t in texts]]
+
+    retriever.encode = fake_encode
+    results = retriever.search_batch(["3", "5", "3"], top_k=1)
+    assert [int(ids[0]) for ids, _ in results] == [3, 5, 3]
+    assert calls == [["3", "5"]]
+
+
+LOAD_AND_MEASURE = """
+import json, sys
+import faiss, numpy as np
+from retrieval.faiss_store import _mmap_flags
+from utils.memory import process_memory
+query = np.zeros((1, int(sys.argv[2])), dtype=np.float32)
+before = process_memory()["anonymous"]
+index = faiss.read_index(sys.argv[1], *(_mmap_flags()[:1] if sys.argv[3] == "1" else []))
+index.search(query, 10)
+print(json.dumps(process_memory()["anonymous"] - before))
+"""
+
+
+@pytest.mark.parametrize("index_type", ["flat", "hnsw"])
+def test_loaded_vectors_are_file_backed(tmp_path, index_type):
+    from utils.memory import process_memory
+
+    if not process_memory():
+        pytest.skip("needs /proc/self/smaps_rollup")
+    embeddings = clustered_embeddings(n=40000, dim=64)
+    documents = [{"text": f"chunk {i}"} for i in range(len(embeddings))]
+    FaissRetrieval(str(tmp_path), index_type=index_type).build_index(embeddings, documents, str(tmp_path))
+
+    def heap_growth(mmap):
+        # A fresh process, so freed memory of earlier loads is not reused
+        out = subprocess.run(
+            [sys.executable, "-c", LOAD_AND_MEASURE, str(tmp_path / "index.faiss"), "64", "1" if mmap else "0"],
+            cwd=Path(__file__).parent.parent, capture_output=True, text=True, check=True
+        ).stdout
+        return json.loads(out.strip().splitlines()[-1])
+
+    # The mapped load keeps the ~10 MB of vectors out of the heap
+    saved = heap_growth(mmap=False) - heap_growth(mmap=True)
+    assert saved > 0.75 * len(embeddings) * 64 * 4
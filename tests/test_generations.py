@@ -0,0 +1,107 @@
+import threading
+import time
+
+from retrieval.generations import GenerationManager, GenerationStore
+
+
+class FakeRetriever:
+    def __init__(self, path):
+        self.path = path
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def publish_new(store):
+    generation_id, path = store.new_generation()
+    (path / "marker").write_text(generation_id)
+    store.publish(generation_id)
+    return generation_id
+
+
+def test_publish_copies_previous_generation(tmp_path):
+    store = GenerationStore(str(tmp_path), keep=2)
+    assert store.current_id() is None
+
+    first = publish_new(store)
+    second_id, second_path = store.new_generation()
+    assert (second_path / "marker").read_text() == first
+    assert store.current_id() == first
+
+    store.publish(second_id)
+    assert store.current_id() == second_id
+    publish_new(store)
+    store.prune()
+    assert not store.path(first).exists()
+    assert store.path(second_id).exists()
+
+
+def test_old_generation_closes_after_last_request(tmp_path):
+    store = GenerationStore(str(tmp_path))
+    first = publish_new(store)
+    manager = GenerationManager(store, FakeRetriever, check_interval_s=0)
+
+    with manager.acquire() as old:
+        assert old.path == store.path(first)
+        second = publish_new(store)
+        # The new generation loads in the background, the old one serves meanwhile
+        with manager.acquire() as current:
+            assert current is old or current.path == store.path(second)
+        for _ in range(200):
+            if manager.generation_id == second:
+                break
+            time.sleep(0.01)
+        with manager.acquire() as new:
+            assert new.path == store.path(second)
+        assert manager.generation_id == second
+        assert not old.closed
+    assert old.closed
+    assert not new.closed
+
+
+def test_concurrent_requests_share_one_load(tmp_path):
+    store = GenerationStore(str(tmp_path))
+    publish_new(store)
+    loads = []
+
+    def factory(path):
+        loads.append(path)
+        return FakeRetriever(path)
+
+    manager = GenerationManager(store, factory, check_interval_s=0)
+
+    def request():
+        with manager.acquire():
+            pass
+
+    threads = [threading.Thread(target=request) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(loads) == 1
+
+
+def test_requests_keep_old_generation_while_new_one_loads(tmp_path):
+    store = GenerationStore(str(tmp_path))
+    first = publish_new(store)
+
+    def slow_factory(path):
+        if path != store.path(first):
+            time.sleep(0.5)
+        return FakeRetriever(path)
+
+    manager = GenerationManager(store, slow_factory, check_interval_s=0)
+    with manager.acquire():
+        pass
+    second = publish_new(store)
+
+    start = time.perf_counter()
+    with manager.acquire() as retriever:
+        assert retriever.path == store.path(first)
+    assert time.perf_counter() - start < 0.2
+    while manager.generation_id != second and time.perf_counter() - start < 5:
+        time.sleep(0.01)
+    with manager.acquire() as retriever:
+        assert retriever.path == store.path(second)
@@ -0,0 +1,100 @@
+from llm.client import format_citations
+from llm.context import ContextPacker
+from validators.grounding import (
+    CitationTable,
+    ShingleIndex,
+    fingerprint,
+    split_sentences,
+    validate_answer,
+    validate_citations,
+    validate_citations_batch,
+)
+
+CHUNKS = [
+    {"chunk_id": 7, "text": "Sidewalk cafes shall obtain an annual permit from the city manager."},
+    {"chunk_id": 12, "text": "Amplified noise is prohibited after 10 p.m. in residential districts."},
+]
+
+
+def test_split_sentences_keeps_citations_with_their_sentence():
+    answer = "Cafes need a permit. [1] Noise ends at 10 p.m. [2]\nSee the code."
+    assert split_sentences(answer) == ["Cafes need a permit. [1]", "Noise ends at 10 p.m. [2]", "See the code."]
+
+
+def test_supported_answer_is_valid():
+    answer = (
+        "Sidewalk cafes shall obtain an annual permit. [1] "
+        "Amplified noise is prohibited after 10 p.m. [2]"
+    )
+    result = validate_answer(answer, "", CHUNKS)
+    assert result["is_valid"]
+    assert result["issues"] == []
+    assert result["confidence"] == 1.0
+    assert [s["chunk_ids"] for s in result["sentences"]] == [[7], [12]]
+
+
+def test_unsupported_sentence_is_reported():
+    answer = "Sidewalk cafes shall obtain an annual permit. [1] Food trucks may park anywhere downtown. [1]"
+    result = validate_answer(answer, "", CHUNKS)
+    assert not result["is_valid"]
+    assert len(result["issues"]) == 1 and result["issues"][0].startswith("Sentence 2")
+    assert result["sentences"][1]["support"] == 0.0
+    assert 0.4 < result["confidence"] < 0.6
+
+
+def test_context_only_and_packed_passages():
+    assert validate_answer("Noise is prohibited after 10 p.m.", CHUNKS[1]["text"], [])["is_valid"]
+
+    chunks = [
+        {"chunk_id": 1, "text": "Permits expire on", "pdf_file": "a.pdf", "page": 1, "char_start": 0,
+         "char_end": 17, "score": 0.9},
+        {"chunk_id": 2, "text": "expire on September 30 of each year.", "pdf_file": "a.pdf", "page": 1,
+         "char_start": 8, "char_end": 44, "score": 0.5},
+    ]
+    passages = ContextPacker(max_tokens=0).pack(chunks)
+    support, chunk_ids = ShingleIndex.from_chunks(passages).support("They expire on September 30 of each year.")
+    assert chunk_ids == [2]
+    assert support > 0.8
+
+
+def citation(n, chunk, **overrides):
+    entry = {"id": n, "chunk_id": chunk["chunk_id"], "pdf_file": chunk.get("pdf_file"), "page": chunk.get("page"),
+             "char_start": chunk.get("char_start"), "char_end": chunk.get("char_end")}
+    entry.update(overrides)
+    return entry
+
+
+def test_validate_citations_checks_id_location_and_quote():
+    chunks = [dict(c, pdf_file="a.pdf", page=3, char_start=100 * i, char_end=100 * i + 70) for i, c in enumerate(CHUNKS)]
+    table = CitationTable.from_chunks(chunks)
+    assert validate_citations([citation(1, chunks[0]), citation(2, chunks[1])], chunks)
+    assert table.check(citation(1, chunks[0], quote="an ANNUAL  permit")) == []
+    assert table.check(citation(1, chunks[0], fingerprint=fingerprint(chunks[0]["text"].upper()))) == []
+
+    assert "not retrieved" in table.check(citation(1, chunks[0], chunk_id=99))[0]
+    assert "page" in table.check(citation(1, chunks[0], page=4))[0]
+    assert "ends at" in table.check(citation(1, chunks[0], char_end=90))[0]
+    assert "quote" in table.check(citation(1, chunks[0], quote="annual fee"))[0]
+    assert not validate_citations([citation(1, chunks[0], pdf_file="b.pdf")], chunks)
+
+
+def test_packed_passage_citations_resolve_to_chunks():
+    chunks = [
+        {"chunk_id": 1, "text": "Permits expire on", "pdf_file": "a.pdf", "page": 1, "char_start": 0, "char_end": 17},
+        {"chunk_id": 2, "text": "expire on September 30.", "pdf_file": "a.pdf", "page": 1, "char_start": 8,
+         "char_end": 31},
+    ]
+    passages = ContextPacker(max_tokens=0).pack(chunks)
+    citations = format_citations(passages)
+    assert citations[0]["chunk_ids"] == [1, 2]
+    assert validate_citations([dict(citations[0], quote="expire on September 30")], passages)
+
+
+def test_batch_only_accepts_chunks_of_the_same_query():
+    first = [dict(CHUNKS[0], pdf_file="a.pdf", page=1)]
+    second = [dict(CHUNKS[1], pdf_file="b.pdf", page=2)]
+    results = validate_citations_batch(
+        [[citation(1, first[0])], [citation(1, first[0])], [citation(1, second[0])]],
+        [first, second, second]
+    )
+    assert results == [True, False, True]
@@ -0,0 +1,99 @@
+import time
+
+import numpy as np
+import pytest
+
+from retrieval.fusion import reciprocal_rank_fusion, weighted_score_fusion
+from retrieval.hybrid import HybridRetrieval
+
+
+class FakeRetriever:
+    """Stand-in retriever returning fixed arrays after an optional delay."""
+
+    def __init__(self, ids, scores, delay=0.0, documents=None):
+        self.ids = np.array(ids, dtype=np.int64)
+        self.scores = np.array(scores, dtype=np.float32)
+        self.delay = delay
+        self.documents = documents or []
+
+    def search(self, query, top_k=5, *knobs):
+        time.sleep(self.delay)
+        return self.ids[:top_k], self.scores[:top_k]
+
+    def search_batch(self, queries, top_k=5, *knobs):
+        return [self.search(q, top_k) for q in queries]
+
+
+def make_hybrid(bm25, faiss, **kwargs):
+    return HybridRetrieval("unused", "unused", bm25=bm25, faiss=faiss, **kwargs)
+
+
+def test_rrf_matches_formula():
+    ids, scores = reciprocal_rank_fusion(
+        [np.array([1, 2, 3]), np.array([3, 1])], [1.0, 1.0], top_k=3, k=60
+    )
+    expected = {
+        1: 1 / 61 + 1 / 62,
+        2: 1 / 62,
+        3: 1 / 63 + 1 / 61,
+    }
+    assert list(ids) == sorted(expected, key=lambda i: -expected[i])
+    assert scores == pytest.approx([expected[i] for i in ids])
+
+
+def test_weighted_fusion_normalizes_scores():
+    ids, scores = weighted_score_fusion(
+        [np.array([10, 11]), np.array([11, 12])],
+        [np.array([12.0, 3.0]), np.array([0.9, 0.1])],
+        [0.3, 0.7],
+        top_k=3
+    )
+    assert list(ids) == [11, 10, 12]
+    assert scores == pytest.approx([0.7, 0.3, 0.0])
+
+
+def test_fusion_handles_empty_lists():
+    ids, scores = reciprocal_rank_fusion([np.array([]), np.array([])], [1.0, 1.0], top_k=5)
+    assert len(ids) == 0 and len(scores) == 0
+
+
+def test_retrieve_attaches_metadata():
+    documents = [{"text": f"chunk {i}"} for i in range(5)]
+    hybrid = make_hybrid(
+        FakeRetriever([1, 2], [5.0, 4.0]),
+        FakeRetriever([2, 4], [0.9, 0.8], documents=documents)
+    )
+    results = hybrid.retrieve("permit fees", top_k=2)
+    assert [r["chunk_id"] for r in results] == [2, 1]
+    assert results[0]["text"] == "chunk 2"
+
+
+def test_late_retriever_returns_partial_results():
+    hybrid = make_hybrid(
+        FakeRetriever([1, 2], [5.0, 4.0]),
+        FakeRetriever([7, 8], [0.9, 0.8], delay=0.5),
+        timeout_ms=50
+    )
+    start = time.perf_counter()
+    ids, _ = hybrid.search("noise ordinance", top_k=2)
+    assert time.perf_counter() - start < 0.4
+    assert list(ids) == [1, 2]
+
+
+def test_failing_retriever_returns_partial_results():
+    failing = FakeRetriever([], [])
+    failing.search = lambda *args: 1 / 0
+    hybrid = make_hybrid(failing, FakeRetriever([3], [0.5]))
+    ids, _ = hybrid.search("setbacks", top_k=2)
+    assert list(ids) == [3]
+
+
+def test_search_batch_matches_single_queries():
+    hybrid = make_hybrid(
+        FakeRetriever([1, 2, 3], [5.0, 4.0, 3.0]),
+        FakeRetriever([3, 4], [0.9, 0.8])
+    )
+    batch = hybrid.search_batch(["a", "b"], top_k=3)
+    single = hybrid.search("a", top_k=3)
+    assert len(batch) == 2
+    np.testing.assert_array_equal(batch[0][0], single[0])
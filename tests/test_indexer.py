@@ -0,0 +1,103 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from parsers.pdf_parser import PDFParser
+from retrieval.bm25 import BM25Retrieval
+from retrieval.encoders import HashingEncoder
+from retrieval.faiss_store import FaissRetrieval
+from retrieval.indexer import IncrementalIndexer, IndexManifest
+
+
+class LineParser(PDFParser):
+    """Reads plain text files, one page per line, and records what it parsed."""
+
+    def __init__(self):
+        super().__init__(workers=1)
+        self.parsed = []
+
+    def extract_pages(self, pdf_path):
+        self.parsed.append(Path(pdf_path).name)
+        with open(pdf_path) as f:
+            return [line for line in f if line.strip()]
+
+
+@pytest.fixture
+def setup(tmp_path):
+    data = tmp_path / "pdfs"
+    data.mkdir()
+    (data / "noise.pdf").write_text("noise ordinance after 10 pm\namplified sound limits\n")
+    (data / "permits.pdf").write_text("building permit fees\nsidewalk cafe permits\n")
+    (data / "fences.pdf").write_text("fence height six feet\n")
+
+    parser = LineParser()
+    bm25 = BM25Retrieval(str(tmp_path / "bm25"))
+    faiss = FaissRetrieval(str(tmp_path / "faiss"), index_type="hnsw", encoder=HashingEncoder(dim=16))
+    indexer = IncrementalIndexer(
+        parser, bm25, faiss, str(tmp_path / "manifest.json"), compaction_ratio=0.9
+    )
+    return data, parser, bm25, faiss, indexer
+
+
+def test_only_changed_files_are_reparsed(setup):
+    data, parser, bm25, faiss, indexer = setup
+    assert indexer.run(str(data))["mode"] == "full"
+    before = IndexManifest.load(indexer.manifest_path)
+    stale = set(before.chunk_ids("permits.pdf")) | set(before.chunk_ids("fences.pdf"))
+
+    parser.parsed.clear()
+    (data / "permits.pdf").write_text("building permit fees doubled\n")
+    (data / "fences.pdf").unlink()
+    (data / "trees.pdf").write_text("tree removal permit\n")
+    summary = indexer.run(str(data))
+
+    assert summary["mode"] == "incremental"
+    assert sorted(parser.parsed) == ["permits.pdf", "trees.pdf"]
+    assert summary["removed"] == ["fences.pdf"]
+
+    manifest = IndexManifest.load(indexer.manifest_path)
+    assert manifest.files["noise.pdf"] == before.files["noise.pdf"]
+    assert manifest.n_deleted == 3
+    live_texts = {faiss.documents[i]["text"] for i in range(manifest.next_chunk_id) if faiss.documents[i]}
+    assert "fence height six feet" not in live_texts
+    assert "building permit fees doubled" in live_texts
+
+    # Deleted chunks never come back from either retriever
+    ids, _ = bm25.search("fence", top_k=5)
+    assert len(ids) == 0
+    ids, _ = faiss.search("fence height six feet", top_k=10)
+    assert set(ids.tolist()).isdisjoint(stale)
+
+
+def test_bm25_update_matches_fresh_build(tmp_path):
+    texts = ["permit fees", "noise ordinance", "permit noise limits", "fence height"]
+    bm25 = BM25Retrieval(str(tmp_path / "a"))
+    bm25.build_index(texts, str(tmp_path / "a"))
+    bm25.update_index({4: "sidewalk permit fees"}, [1])
+
+    fresh = BM25Retrieval(str(tmp_path / "b"))
+    fresh.build_index([texts[0], texts[2], texts[3], "sidewalk permit fees"], str(tmp_path / "b"))
+    remap = {0: 0, 2: 1, 3: 2, 4: 3}
+
+    for query in ["permit fees", "noise", "fence height permit"]:
+        for pruned in (True, False):
+            ids, scores = bm25.search(query, top_k=4, pruned=pruned)
+            fresh_ids, fresh_scores = fresh.search(query, top_k=4, pruned=pruned)
+            assert [remap[i] for i in ids.tolist()] == fresh_ids.tolist()
+            np.testing.assert_allclose(scores, fresh_scores, rtol=1e-5)
+
+
+def test_compaction_rebuilds_contiguous_ids(setup):
+    data, parser, bm25, faiss, indexer = setup
+    indexer.compaction_ratio = 0.1
+    indexer.run(str(data))
+    (data / "noise.pdf").unlink()
+
+    summary = indexer.run(str(data))
+    assert summary["mode"] == "full"
+    assert summary["compacted"]
+    manifest = IndexManifest.load(indexer.manifest_path)
+    assert manifest.n_deleted == 0
+    assert manifest.next_chunk_id == 3
+    assert faiss.tombstones == []
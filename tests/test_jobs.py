@@ -0,0 +1,69 @@
+import time
+
+from retrieval.generations import GenerationStore
+from retrieval.jobs import TERMINAL_STATES, IndexJobs
+from tests.test_pdf_parser import write_pdf
+
+
+def slow_build(config, full=False, progress=None):
+    """Build stand-in that reports parse progress for several seconds."""
+    progress("scan", 0, 1)
+    progress("scan", 1, 1)
+    for done in range(100):
+        progress("parse", done, 100)
+        time.sleep(0.1)
+    return {"mode": "full"}
+
+
+def wait_for(jobs, job_id, condition, timeout_s=60.0):
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        job = jobs.get(job_id)
+        if condition(job):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"Timed out waiting for job {job_id}: {jobs.get(job_id)}")
+
+
+def test_build_job_reports_stage_progress(tmp_path):
+    data = tmp_path / "pdfs"
+    data.mkdir()
+    write_pdf(data / "a.pdf", ["Section 18-123 sidewalk cafes", "Noise ordinance"])
+    write_pdf(data / "b.pdf", ["Building permit fees"])
+    config = {
+        "data_path": str(data),
+        "index_path": str(tmp_path / "index"),
+        "embedding_encoder": "hashing",
+        "embedding_dim": 16,
+        "embedding_store_path": str(tmp_path / "embeddings"),
+        "parse_cache_enabled": False,
+        "parse_workers": 1,
+    }
+    jobs = IndexJobs.from_config(config)
+
+    job, coalesced = jobs.submit()
+    assert not coalesced
+    job = wait_for(jobs, job["job_id"], lambda j: j["status"] in TERMINAL_STATES)
+
+    assert job["status"] == "succeeded", job
+    assert job["stages"]["parse"]["done"] == job["stages"]["parse"]["total"] == 2
+    assert job["stages"]["parse"]["unit"] == "files"
+    assert job["stages"]["embed"]["done"] == 3
+    assert job["result"]["generation"] == GenerationStore(config["index_path"]).current_id()
+
+
+def test_submissions_coalesce_and_cancel(tmp_path):
+    jobs = IndexJobs({}, str(tmp_path / "jobs"), build=slow_build)
+
+    job, _ = jobs.submit()
+    wait_for(jobs, job["job_id"], lambda j: j["stage"] == "parse")
+
+    again, coalesced = jobs.submit()
+    assert coalesced
+    assert again["job_id"] == job["job_id"]
+    assert jobs.get(job["job_id"])["rescan_requested"]
+
+    jobs.cancel(job["job_id"])
+    job = wait_for(jobs, job["job_id"], lambda j: j["status"] in TERMINAL_STATES)
+    assert job["status"] == "cancelled"
+    assert jobs.active() is None
@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+from llm.client import NO_CONTEXT_ANSWER, LLMClient, LLMProvider
+from llm.fake import FakeLLM
+from llm.providers import AnthropicAdapter, LLMError, OllamaAdapter, OpenAIAdapter
+
+CHUNKS = [
+    {"text": "Sidewalk cafes require a permit. Fees are set by resolution.", "pdf_file": "a.pdf",
+     "page": 3, "chunk_id": 7, "char_start": 0, "char_end": 60, "score": 0.9},
+    {"text": "Noise is limited after 10 p.m.", "pdf_file": "b.pdf",
+     "page": 1, "chunk_id": 12, "char_start": 40, "char_end": 70, "score": 0.5},
+]
+
+
+def test_fake_provider_streams_cited_answer():
+    client = LLMClient(provider=LLMProvider.FAKE, fake=FakeLLM(first_token_ms=5, token_ms=1))
+
+    async def run():
+        tokens = [t async for t in client.stream("[1] a.pdf, page 3\nSidewalk cafes require a permit.", "q")]
+        result = await client.agenerate_with_citations(CHUNKS, "Do sidewalk cafes need a permit?")
+        return tokens, result
+
+    tokens, result = asyncio.run(run())
+    assert len(tokens) > 1
+    assert "".join(tokens) == "According to the ordinance text, Sidewalk cafes require a permit. [1]"
+    assert result["answer"].endswith("[1]")
+    assert result["ttft_ms"] >= 5
+    assert [(c["id"], c["chunk_id"], c["page"]) for c in result["citations"]] == [(1, 7, 3), (2, 12, 1)]
+
+
+def test_fake_provider_latency_and_errors():
+    fake = FakeLLM(first_token_ms=10, jitter=1.0, seed=3)
+    delays = [fake._delay_s(10) for _ in range(2000)]
+    assert min(delays) < 0.005 < 0.02 < max(delays)
+    assert 0.008 < sorted(delays)[1000] < 0.012
+
+    failing = LLMClient(provider=LLMProvider.FAKE, fake=FakeLLM(error_rate=1.0))
+    with pytest.raises(LLMError):
+        failing.generate_with_citations(CHUNKS, "Do sidewalk cafes need a permit?")
+
+
+def test_no_chunks_skips_provider():
+    client = LLMClient(provider=LLMProvider.OPENAI)
+    # Without an API key any provider call raises
+    client.api_key = None
+    result = client.generate_with_citations([], "anything")
+    assert result == {"answer": NO_CONTEXT_ANSWER, "citations": [], "ttft_ms": None, "passages": []}
+    with pytest.raises(LLMError):
+        client.generate_with_citations(CHUNKS, "anything")
+
+
+def test_provider_stream_lines():
+    openai = OpenAIAdapter()
+    assert openai.parse_line('data: {"choices": [{"delta": {"content": "Hel"}}]}') == "Hel"
+    assert openai.parse_line("data: [DONE]") is None
+    assert openai.parse_line(": keep-alive") is None
+
+    anthropic = AnthropicAdapter()
+    assert anthropic.parse_line("event: content_block_delta") is None
+    assert anthropic.parse_line(
+        'data: {"type": "content_block_delta", "delta": {"type": "text_delta", "text": "lo"}}'
+    ) == "lo"
+    assert anthropic.parse_line('data: {"type": "message_stop"}') is None
+    with pytest.raises(LLMError):
+        anthropic.parse_line('data: {"type": "error", "error": {"type": "overloaded_error"}}')
+
+    ollama = OllamaAdapter()
+    assert ollama.parse_line('{"message": {"role": "assistant", "content": "!"}, "done": false}') == "!"
+    assert ollama.parse_line('{"done": true}') is None
+
+
+@pytest.mark.parametrize("adapter, line", [
+    (OpenAIAdapter(), "data: {\"choices\": [" + "x" * 500),
+    (AnthropicAdapter(), "data: <html>Bad Gateway</html>"),
+    (OllamaAdapter(), "not json"),
+])
+def test_malformed_stream_line_raises_llm_error(adapter, line):
+    with pytest.raises(LLMError, match="Malformed") as info:
+        adapter.parse_line(line)
+    assert len(str(info.value)) < 300
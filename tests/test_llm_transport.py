@@ -0,0 +1,148 @@
+import asyncio
+import time
+
+import pytest
+
+from llm.client import LLMClient, LLMProvider
+from llm.providers import LLMError
+from llm.stub_server import StubProvider, serve
+from llm.transport import ProviderTransport, TokenBucket
+
+CHUNKS = [{"text": "Sidewalk cafes require a permit.", "pdf_file": "a.pdf", "page": 3, "chunk_id": 7}]
+ANSWER = "According to the ordinance text, Sidewalk cafes require a permit. [1]"
+
+
+def client_for(base_url, provider=LLMProvider.OPENAI, **transport_args):
+    transport = ProviderTransport(base_url, backoff_base_ms=1, **transport_args)
+    return LLMClient(provider=provider, api_key="test-key", base_url=base_url, transport=transport)
+
+
+@pytest.mark.parametrize("provider", [LLMProvider.OPENAI, LLMProvider.ANTHROPIC, LLMProvider.OLLAMA])
+def test_streams_every_provider_over_one_connection(provider):
+    stub = StubProvider(first_token_ms=0, token_ms=0)
+    with serve(stub) as base_url:
+        client = client_for(base_url, provider)
+
+        async def run():
+            return [await client.agenerate_with_citations(CHUNKS, "q") for _ in range(3)]
+
+        results = asyncio.run(run())
+    assert [r["answer"] for r in results] == [ANSWER] * 3
+    # Keep-alive: sequential requests reuse the pooled connection
+    assert len(stub.client_ports) == 1
+
+
+def test_retries_rate_limited_and_server_errors():
+    stub = StubProvider(first_token_ms=0, token_ms=0, fail_first=2, error_status=429, retry_after_s=0)
+    with serve(stub) as base_url:
+        client = client_for(base_url)
+        result = asyncio.run(client.agenerate_with_citations(CHUNKS, "q"))
+    assert result["answer"] == ANSWER
+    assert client.stats()["retries"] == 2
+    assert stub.requests == 3
+
+
+def test_client_errors_are_not_retried():
+    stub = StubProvider(fail_first=1, error_status=400)
+    with serve(stub) as base_url:
+        client = client_for(base_url)
+        with pytest.raises(LLMError):
+            asyncio.run(client.agenerate_with_citations(CHUNKS, "q"))
+    assert stub.requests == 1
+
+
+def test_slow_first_byte_is_hedged():
+    stub = StubProvider(first_token_ms=0, token_ms=0, slow_first=1, slow_ms=3000)
+    with serve(stub) as base_url:
+        client = client_for(base_url, hedge_after_ms=50)
+        start = time.perf_counter()
+        result = asyncio.run(client.agenerate_with_citations(CHUNKS, "q"))
+        elapsed = time.perf_counter() - start
+    assert result["answer"] == ANSWER
+    assert elapsed < 2
+    assert client.stats()["hedges"] == 1
+    assert client.stats()["hedge_wins"] == 1
+
+
+def test_concurrency_is_capped():
+    stub = StubProvider(first_token_ms=20, token_ms=2)
+    with serve(stub) as base_url:
+        client = client_for(base_url, max_concurrency=2)
+
+        async def run():
+            await asyncio.gather(*(client.agenerate_with_citations(CHUNKS, "q") for _ in range(6)))
+
+        asyncio.run(run())
+    assert stub.requests == 6
+    assert stub.max_active == 2
+
+
+def test_token_bucket_paces_requests():
+    bucket = TokenBucket(rate_per_s=50, burst=2)
+
+    async def run():
+        start = time.perf_counter()
+        for _ in range(7):
+            await bucket.acquire()
+        return time.perf_counter() - start
+
+    # Two tokens from the burst, five refilled at 20ms each
+    assert asyncio.run(run()) == pytest.approx(0.1, abs=0.05)
+
+
+def test_hedge_finishing_with_primary_releases_both_slots():
+    transport = ProviderTransport("http://127.0.0.1:1", max_concurrency=4, hedge_after_ms=10)
+
+    async def run():
+        await transport._bind()
+        both_sent = asyncio.Event()
+        opened = []
+
+        async def open_together(make_request, attempt):
+            opened.append(attempt)
+            if len(opened) == 2:
+                both_sent.set()
+            await both_sent.wait()
+            return attempt
+
+        transport._open = open_together
+        winner = await transport._open_hedged(lambda: None)
+        await winner.close()
+        return transport._semaphore._value
+
+    assert asyncio.run(run()) == 4
+
+
+def test_rebinding_to_a_new_loop_closes_the_old_client():
+    stub = StubProvider(first_token_ms=0, token_ms=0)
+    with serve(stub) as base_url:
+        client = client_for(base_url)
+        # Blocking calls close their connections before their loop ends
+        assert client.generate_with_citations(CHUNKS, "q")["answer"] == ANSWER
+        assert client.transport._client is None
+
+        transport = client.transport
+
+        async def bind():
+            await transport._bind()
+            return transport._client
+
+        first = asyncio.run(bind())
+        second = asyncio.run(bind())
+    assert first.is_closed and not second.is_closed
+
+
+def test_caller_cancelled_in_hedge_window_releases_its_slot():
+    stub = StubProvider(first_token_ms=300, token_ms=0)
+    with serve(stub) as base_url:
+        client = client_for(base_url, max_concurrency=1, hedge_after_ms=100)
+
+        async def run():
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(client.agenerate_with_citations(CHUNKS, "q"), timeout=0.03)
+            # Let the abandoned request reach its first byte
+            await asyncio.sleep(0.5)
+            assert not client.transport._semaphore.locked()
+            return await asyncio.wait_for(client.agenerate_with_citations(CHUNKS, "q"), timeout=2)
+
+        assert asyncio.run(run())["answer"] == ANSWER
@@ -0,0 +1,67 @@
+import io
+import json
+import logging
+import queue
+from datetime import datetime, timezone
+
+from utils.logger import (
+    DroppingQueueHandler,
+    JSONFormatter,
+    SamplingFilter,
+    _DropReportingHandler,
+    get_logger,
+    logging_stats,
+)
+
+
+def make_record(msg, *args, level=logging.INFO, **extra):
+    record = logging.LogRecord("test", level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_format_matches_previous_fields():
+    record = make_record("Retrieved %d chunks", 5, request_id="r1", latency_ms=1.5)
+    data = json.loads(JSONFormatter().format(record))
+    expected = datetime.fromtimestamp(record.created, timezone.utc).replace(tzinfo=None).isoformat(timespec="microseconds")
+    assert data["timestamp"][:23] == expected[:23]
+    assert data["message"] == "Retrieved 5 chunks"
+    assert data["request_id"] == "r1" and data["latency_ms"] == 1.5
+    assert "query" not in data
+
+
+def test_full_queue_drops_and_reports():
+    handler = DroppingQueueHandler(queue.Queue(maxsize=1))
+    for i in range(3):
+        handler.handle(make_record("record %d", i))
+    assert handler.dropped == 2
+
+    stream = io.StringIO()
+    writer = _DropReportingHandler(stream, handler)
+    writer.setFormatter(JSONFormatter())
+    writer.handle(handler.queue.get_nowait())
+    lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert lines[0]["level"] == "WARNING" and "Dropped 2 log records" in lines[0]["message"]
+    assert lines[1]["message"] == "record 0"
+
+
+def test_records_are_formatted_by_the_writer():
+    handler = DroppingQueueHandler(queue.Queue())
+    handler.handle(make_record("query: %s", "permit fees"))
+    record = handler.queue.get_nowait()
+    # Still unrendered when it leaves the request thread
+    assert record.msg == "query: %s" and record.args == ("permit fees",)
+
+
+def test_sampling_keeps_warnings():
+    sampler = SamplingFilter(0.0)
+    assert not sampler.filter(make_record("hot path"))
+    assert sampler.filter(make_record("problem", level=logging.WARNING))
+    assert sampler.sampled_out == 1
+
+
+def test_get_logger_uses_shared_queue():
+    logger = get_logger("tests.logger")
+    assert isinstance(logger.handlers[0], DroppingQueueHandler)
+    assert get_logger("tests.other").handlers[0] is logger.handlers[0]
+    assert set(logging_stats()) == {"queued", "dropped", "sampled_out"}
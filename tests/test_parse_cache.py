@@ -0,0 +1,45 @@
+from parsers.cache import ParseCache, file_sha256
+from parsers.pdf_parser import PARSER_VERSION, PDFParser
+from tests.test_pdf_parser import write_pdf
+
+
+class CountingParser(PDFParser):
+    def __init__(self, cache, **kwargs):
+        super().__init__(workers=1, cache=cache, **kwargs)
+        self.extracted = 0
+
+    def extract_pages(self, pdf_path):
+        self.extracted += 1
+        return super().extract_pages(pdf_path)
+
+
+def test_unchanged_file_is_served_from_cache(tmp_path):
+    write_pdf(tmp_path / "a.pdf", ["Noise ordinance after 10 pm"])
+    cache = ParseCache(str(tmp_path / "cache"), PARSER_VERSION)
+
+    first = CountingParser(cache).parse(str(tmp_path / "a.pdf"))
+    parser = CountingParser(cache)
+    assert parser.parse(str(tmp_path / "a.pdf")) == first
+    assert parser.extracted == 0
+
+    # New chunk settings re-chunk cached page text without re-extracting
+    rechunked = CountingParser(cache, chunk_size=10, chunk_overlap=2)
+    assert len(rechunked.parse(str(tmp_path / "a.pdf"))) > 1
+    assert rechunked.extracted == 0
+
+    refreshed = CountingParser(ParseCache(str(tmp_path / "cache"), PARSER_VERSION, refresh=True))
+    refreshed.parse(str(tmp_path / "a.pdf"))
+    assert refreshed.extracted == 1
+
+
+def test_gc_drops_orphaned_entries(tmp_path):
+    write_pdf(tmp_path / "a.pdf", ["kept"])
+    write_pdf(tmp_path / "b.pdf", ["removed"])
+    cache = ParseCache(str(tmp_path / "cache"), PARSER_VERSION)
+    parser = CountingParser(cache)
+    parser.parse(str(tmp_path / "a.pdf"))
+    parser.parse(str(tmp_path / "b.pdf"))
+
+    assert cache.gc([file_sha256(str(tmp_path / "a.pdf"))]) == 2
+    assert CountingParser(cache).parse(str(tmp_path / "a.pdf"))[0]["text"] == "kept"
+    assert len(list((tmp_path / "cache").glob("*/*.json"))) == 2
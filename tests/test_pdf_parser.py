@@ -0,0 +1,69 @@
+import pytest
+
+from parsers.pdf_parser import PDFParser
+
+
+def write_pdf(path, pages):
+    """Write a minimal single-font PDF with one text line per page."""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None,
+               "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in pages:
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>"
+        )
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode()
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += "".join(f"{o:010d} 00000 n \n" for o in offsets).encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    path.write_bytes(out)
+
+
+def test_parse_keeps_page_numbers(tmp_path):
+    write_pdf(tmp_path / "a.pdf", ["Section 18-123 sidewalk cafes", "Noise ordinance"])
+    chunks = PDFParser(workers=1).parse(str(tmp_path / "a.pdf"))
+
+    assert [(c["page"], c["text"]) for c in chunks] == [
+        (1, "Section 18-123 sidewalk cafes"),
+        (2, "Noise ordinance"),
+    ]
+    assert chunks[1]["pdf_file"] == "a.pdf"
+    assert chunks[1]["chunk_index"] == 1
+
+
+def test_split_text_overlaps_on_word_boundaries():
+    parser = PDFParser(chunk_size=20, chunk_overlap=8, workers=1)
+    text = "the city shall issue a building permit before work"
+    windows = parser.split_text(text)
+
+    assert all(len(chunk) <= 20 for _, _, chunk in windows)
+    assert all(text[s:e] == chunk for s, e, chunk in windows)
+    assert windows[-1][1] == len(text)
+    for (_, prev_end, _), (start, _, chunk) in zip(windows, windows[1:]):
+        assert start < prev_end
+        assert text[start - 1] == " "
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_parse_directory_skips_corrupt_files_in_order(tmp_path, workers):
+    for i in range(5):
+        write_pdf(tmp_path / f"{i}.pdf", [f"ordinance {i}"])
+    (tmp_path / "2.pdf").write_bytes(b"not a pdf")
+
+    parser = PDFParser(workers=workers, max_in_flight=2)
+    texts = [c["text"] for c in parser.parse_directory(str(tmp_path))]
+
+    assert texts == ["ordinance 0", "ordinance 1", "ordinance 3", "ordinance 4"]
+    assert list(parser.failures) == [str(tmp_path / "2.pdf")]
+    assert len(parser.timings) == 4
@@ -0,0 +1,59 @@
+import pytest
+
+from retrieval.bm25 import BM25Retrieval
+from retrieval.encoders import HashingEncoder, get_encoder
+from retrieval.faiss_store import FaissRetrieval
+from retrieval.shared import ChunkStore
+
+
+TEXTS = [
+    "Section 18-123 governs sidewalk cafe permits and permit fees.",
+    "Fences shall not exceed six feet in height in residential districts.",
+    "No amplified sound after 10 p.m. within city limits.",
+]
+
+
+def test_chunk_store_matches_list():
+    documents = [{"text": "a", "page": 1}, None, {"text": "ção", "pdf_file": "b.pdf"}]
+    store = ChunkStore.from_list(documents)
+
+    assert len(store) == 3
+    assert list(store) == documents
+    assert store[-1] == documents[-1]
+    assert store[1:] == documents[1:]
+    with pytest.raises(IndexError):
+        store[3]
+
+
+def test_shared_retrievers_attach_to_loaded_generation(tmp_path):
+    encoder = HashingEncoder(dim=32)
+    documents = [{"text": t, "pdf_file": "a.pdf", "page": 1} for t in TEXTS]
+    FaissRetrieval(str(tmp_path / "faiss"), encoder=encoder).build_index(
+        encoder.encode(TEXTS), documents, str(tmp_path / "faiss")
+    )
+    BM25Retrieval(str(tmp_path / "bm25")).build_index(TEXTS, str(tmp_path / "bm25"))
+
+    first = FaissRetrieval(str(tmp_path / "faiss"), encoder=encoder, shared=True)
+    second = FaissRetrieval(str(tmp_path / "faiss"), encoder=encoder, shared=True)
+    private = FaissRetrieval(str(tmp_path / "faiss"), encoder=encoder)
+    assert second.index is first.index and second.documents is first.documents
+    assert private.index is not first.index
+    assert second.retrieve("sidewalk cafe permit", top_k=1)[0]["text"] == TEXTS[0]
+
+    bm25 = BM25Retrieval(str(tmp_path / "bm25"), shared=True)
+    attached = BM25Retrieval(str(tmp_path / "bm25"), shared=True)
+    assert attached.vocab is bm25.vocab and attached._norms is bm25._norms
+    assert attached.search("fences")[0].tolist() == [1]
+
+    # Closing releases the registration, later retrievers load again
+    index = first.index
+    first.close()
+    assert FaissRetrieval(str(tmp_path / "faiss"), encoder=encoder, shared=True).index is not index
+    bm25.close()
+    assert BM25Retrieval(str(tmp_path / "bm25"), shared=True).vocab is not attached.vocab
+
+
+def test_encoder_is_reused_per_settings():
+    config = {"embedding_encoder": "hashing", "embedding_dim": 16}
+    assert get_encoder(config) is get_encoder(dict(config))
+    assert get_encoder({**config, "embedding_dim": 32}) is not get_encoder(config)
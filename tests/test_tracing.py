@@ -0,0 +1,57 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.metrics import MetricsRegistry
+from utils.tracing import STAGE_DURATION, current_trace, propagate, record, span, trace
+
+
+def test_spans_breakdown():
+    """Test spans of a trace are summed per stage."""
+    with trace("req-1") as t:
+        with span("retrieval"):
+            pass
+        record("generation", 2_000_000)
+        record("generation", 3_000_000)
+    assert current_trace() is None
+    stages = t.breakdown()
+    assert set(stages) == {"retrieval", "generation"}
+    assert stages["generation"] == 5.0
+    assert t.elapsed_ms() >= stages["retrieval"]
+
+
+def test_span_without_trace():
+    """Test spans outside a request still feed the stage histogram."""
+    span_count = lambda: STAGE_DURATION._series.get(("test.untraced",), [None, 0.0, 0])[2]
+    before = span_count()
+    with span("test.untraced"):
+        pass
+    assert span_count() == before + 1
+
+
+def test_propagate_to_thread():
+    """Test spans from pool threads land in the request's trace."""
+    def work():
+        with span("retrieval.bm25"):
+            current = current_trace()
+            return current.request_id if current is not None else None
+
+    with trace("req-2") as t:
+        with ThreadPoolExecutor(1) as pool:
+            assert pool.submit(propagate(work)).result() == "req-2"
+            assert pool.submit(work).result() is None
+    assert "retrieval.bm25" in t.breakdown()
+
+
+def test_registry_render():
+    """Test Prometheus text format of histograms, counters and collectors."""
+    registry = MetricsRegistry()
+    histogram = registry.histogram("test_seconds", "Test latency", ("stage",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, "a")
+    histogram.observe(0.5, "a")
+    registry.counter("test_total", "Test count", ("route",)).inc("/q", amount=2)
+    registry.add_collector(lambda: [("test_size", "gauge", "Test size", [({"cache": 'x"y'}, 3)])])
+    text = registry.render()
+    assert 'test_seconds_bucket{stage="a",le="0.1"} 1' in text
+    assert 'test_seconds_bucket{stage="a",le="+Inf"} 2' in text
+    assert 'test_seconds_count{stage="a"} 2' in text
+    assert 'test_total{route="/q"} 2' in text
+    assert '# TYPE test_size gauge\ntest_size{cache="x\\"y"} 3' in text
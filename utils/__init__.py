@@ -1,3 +1,3 @@
-from .logger import get_logger, generate_request_id
+from .logger import configure_logging, get_logger, generate_request_id, logging_stats
 
-__all__ = ["get_logger", "generate_request_id"]
+__all__ = ["configure_logging", "get_logger", "generate_request_id", "logging_stats"]
@@ -1,76 +1,330 @@
+import atexit
+import contextvars
 import logging
+import logging.handlers
 import json
+import os
+import queue
+import random
 import sys
-from datetime import datetime
+import threading
+import time
 from typing import Any, Dict, Optional
 import uuid
 
+# Campos extras copiados do record para o JSON, na ordem de saída
+EXTRA_FIELDS = ("request_id", "query", "retrieved_chunks", "latency_ms", "ttft_ms", "stages")
+
+# request_id da requisição em andamento, aplicado a records sem request_id
+request_id_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("request_id", default=None)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_json_encode = json.JSONEncoder(separators=(",", ":"), default=str).encode
+
+
+def _encode(log_data: Dict[str, Any]) -> str:
+    """Serializa com orjson quando instalado, senão com um encoder json reutilizado."""
+    if orjson is not None:
+        return orjson.dumps(log_data, default=str).decode()
+    return _json_encode(log_data)
+
 
 class JSONFormatter(logging.Formatter):
     """Formata logs como JSON por linha."""
-    
+
+    def __init__(self):
+        super().__init__()
+        # Prefixo "YYYY-MM-DDTHH:MM:SS" do último segundo formatado
+        self._second = None
+        self._prefix = ""
+
+    def _timestamp(self, created: float) -> str:
+        """Timestamp UTC ISO 8601 com microssegundos, sem criar datetime."""
+        second = int(created)
+        if second != self._second:
+            self._second = second
+            self._prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(second))
+        return f"{self._prefix}.{int((created - second) * 1_000_000):06d}"
+
     def format(self, record: logging.LogRecord) -> str:
         log_data = {
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": self._timestamp(record.created),
             "level": record.levelname,
             "logger": record.name,
             "message": record.getMessage(),
         }
-        
+
         # Adiciona campos extras se existirem
-        if hasattr(record, "request_id"):
-            log_data["request_id"] = record.request_id
-        if hasattr(record, "query"):
-            log_data["query"] = record.query
-        if hasattr(record, "retrieved_chunks"):
-            log_data["retrieved_chunks"] = record.retrieved_chunks
-        if hasattr(record, "latency_ms"):
-            log_data["latency_ms"] = record.latency_ms
-        
+        fields = record.__dict__
+        for field in EXTRA_FIELDS:
+            if field in fields:
+                log_data[field] = fields[field]
+
         # Adiciona exception info se existir
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            log_data["exception"] = record.exc_text
+
+        return _encode(log_data)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Mantém só uma fração dos logs abaixo de WARNING de um logger.
+
+    Warnings e erros nunca são descartados.
+    """
+
+    def __init__(self, rate: float):
+        """
+        Args:
+            rate: Fração mantida, entre 0 e 1
+        """
+        super().__init__()
+        self.rate = rate
+        self.sampled_out = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or random.random() < self.rate:
+            return True
+        self.sampled_out += 1
+        return False
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler que nunca bloqueia a thread da requisição.
+
+    Com a fila cheia o record é descartado e contado; o writer registra um
+    aviso com o total descartado assim que volta a ter espaço. O record
+    não é formatado aqui: a mensagem e os argumentos são renderizados na
+    thread do writer, então passe argumentos imutáveis (formatação lazy
+    com %s em vez de f-strings).
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # O contexto da requisição só existe na thread que loga
+        if "request_id" not in record.__dict__:
+            request_id = request_id_var.get()
+            if request_id is not None:
+                record.request_id = request_id
+        # Tracebacks referenciam frames vivos, formata já
         if record.exc_info:
-            log_data["exception"] = self.formatException(record.exc_info)
-        
-        return json.dumps(log_data)
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+
+class _DropReportingHandler(logging.StreamHandler):
+    """StreamHandler do writer que relata descartes antes do próximo record."""
+
+    def __init__(self, stream, source: DroppingQueueHandler):
+        super().__init__(stream)
+        self.source = source
+        self.reported = 0
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        dropped = self.source.dropped
+        if dropped != self.reported:
+            notice = logging.LogRecord(
+                "utils.logger", logging.WARNING, __file__, 0,
+                "Dropped %d log records, the log queue was full", (dropped - self.reported,), None
+            )
+            self.reported = dropped
+            super().handle(notice)
+        return super().handle(record)
+
+
+class _Pipeline:
+    """Fila limitada, handler da fila e writer em background do processo."""
+
+    def __init__(self, queue_size: int):
+        self.queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.handler = DroppingQueueHandler(self.queue)
+        writer = _DropReportingHandler(sys.stdout, self.handler)
+        writer.setFormatter(JSONFormatter())
+        self.listener = logging.handlers.QueueListener(self.queue, writer)
+        self.listener.start()
+
+    def stop(self, timeout_s: float = 5.0):
+        """Esvazia a fila e para o writer, esperando no máximo timeout_s por etapa."""
+        thread = self.listener._thread
+        if thread is None:
+            return
+        try:
+            # Com a fila cheia, espera o writer abrir espaço para o sentinela
+            self.queue.put(self.listener._sentinel, timeout=timeout_s)
+        except queue.Full:
+            return
+        thread.join(timeout_s)
+        self.listener._thread = None
+
+
+_settings: Dict[str, Any] = {"queue_size": 10000, "sample_rates": {}, "level": None}
+_pipeline: Optional[_Pipeline] = None
+_pipeline_lock = threading.Lock()
+_samplers: Dict[str, SamplingFilter] = {}
+
+
+def _get_pipeline() -> _Pipeline:
+    global _pipeline
+    with _pipeline_lock:
+        if _pipeline is None:
+            _pipeline = _Pipeline(_settings["queue_size"])
+        return _pipeline
+
+
+def _stop_pipeline():
+    if _pipeline is not None:
+        _pipeline.stop()
+
+
+def _our_loggers(handler: logging.Handler):
+    """Loggers criados por get_logger com o handler da fila dado."""
+    for name in list(logging.root.manager.loggerDict):
+        logger = logging.getLogger(name)
+        if handler in logger.handlers:
+            yield logger
+
+
+def _replace_pipeline():
+    """Cria fila e writer novos e move os loggers existentes para eles."""
+    global _pipeline
+    old = _pipeline
+    _pipeline = None
+    pipeline = _get_pipeline()
+    if old is not None:
+        for logger in _our_loggers(old.handler):
+            logger.removeHandler(old.handler)
+            logger.addHandler(pipeline.handler)
+    return old
+
+
+def _restart_after_fork():
+    """O writer não sobrevive a um fork: o filho ganha fila e writer próprios."""
+    global _pipeline_lock
+    _pipeline_lock = threading.Lock()
+    if _pipeline is not None:
+        _replace_pipeline()
+
+
+atexit.register(_stop_pipeline)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_after_fork)
+
+
+def _apply_sampling(logger: logging.Logger):
+    rate = _settings["sample_rates"].get(logger.name)
+    old = _samplers.pop(logger.name, None)
+    if old is not None:
+        logger.removeFilter(old)
+    if rate is not None and rate < 1:
+        _samplers[logger.name] = SamplingFilter(rate)
+        logger.addFilter(_samplers[logger.name])
+
+
+def configure_logging(config: Dict[str, Any]):
+    """
+    Aplica as opções de logging da configuração.
+
+    Chame uma vez na inicialização. Loggers já criados recebem o nível,
+    a amostragem e, se o tamanho mudou, a fila novos.
+
+    Args:
+        config: Dict de configuração com log_level, log_queue_size e
+            log_sample_rates (nome do logger -> fração de logs abaixo de
+            WARNING mantida)
+    """
+    queue_size = config.get("log_queue_size", _settings["queue_size"])
+    _settings["sample_rates"] = dict(config.get("log_sample_rates") or {})
+    level = config.get("log_level")
+    _settings["level"] = logging.getLevelName(level.upper()) if isinstance(level, str) else level
+    if queue_size != _settings["queue_size"]:
+        _settings["queue_size"] = queue_size
+        if _pipeline is not None:
+            old = _replace_pipeline()
+            old.stop()
+    if _pipeline is None:
+        return
+    for logger in _our_loggers(_pipeline.handler):
+        if _settings["level"] is not None:
+            logger.setLevel(_settings["level"])
+        _apply_sampling(logger)
+
+
+def logging_stats() -> Dict[str, Any]:
+    """
+    Contadores do pipeline de logging.
+
+    Returns:
+        Dict com queued (na fila agora), dropped (fila cheia) e sampled_out
+        por logger
+    """
+    pipeline = _pipeline
+    return {
+        "queued": pipeline.queue.qsize() if pipeline is not None else 0,
+        "dropped": pipeline.handler.dropped if pipeline is not None else 0,
+        "sampled_out": {name: f.sampled_out for name, f in _samplers.items()},
+    }
 
 
 def get_logger(name: str, level: int = logging.INFO) -> logging.Logger:
     """
     Retorna logger configurado com formato JSON.
-    
+
+    Os records vão para uma fila limitada e são formatados e escritos em
+    stdout por uma thread em background, então logar não bloqueia a
+    requisição; com a fila cheia o record é descartado e contado.
+
     Args:
         name: Nome do logger (geralmente __name__ do módulo)
-        level: Nível de logging (default: INFO)
-    
+        level: Nível de logging (default: INFO, ou log_level de configure_logging)
+
     Returns:
         Logger configurado
-    
+
     Example:
         >>> logger = get_logger(__name__)
         >>> logger.info("Query received", extra={"request_id": "123", "query": "test"})
+        >>> logger.info("Retrieved %d chunks", n)  # formatado só no writer
     """
     logger = logging.getLogger(name)
-    
+
     # Evita duplicar handlers
     if logger.handlers:
         return logger
-    
-    logger.setLevel(level)
-    
-    handler = logging.StreamHandler(sys.stdout)
-    handler.setFormatter(JSONFormatter())
-    logger.addHandler(handler)
-    
+
+    logger.setLevel(_settings["level"] if _settings["level"] is not None else level)
+    logger.addHandler(_get_pipeline().handler)
+    _apply_sampling(logger)
+
     return logger
 
 
 def generate_request_id(header_value: Optional[str] = None) -> str:
     """
     Gera ou retorna request_id.
-    
+
     Args:
         header_value: Valor do header X-Request-ID (se fornecido)
-    
+
     Returns:
         request_id (do header ou UUID gerado)
     """
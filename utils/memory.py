@@ -0,0 +1,66 @@
+"""Resident memory of API processes, split into shared and unique pages."""
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# smaps_rollup fields, reported in kB
+_FIELDS = {
+    "Rss": "rss",
+    "Pss": "pss",
+    "Shared_Clean": "shared_clean",
+    "Shared_Dirty": "shared_dirty",
+    "Private_Clean": "private_clean",
+    "Private_Dirty": "private_dirty",
+    "Anonymous": "anonymous",
+}
+
+
+def process_memory(pid: Optional[int] = None) -> Dict[str, int]:
+    """
+    Memory of a process in bytes, from /proc/<pid>/smaps_rollup.
+
+    uss (unique set size, the private pages) is what one more worker
+    costs; pss splits every shared page evenly between the processes
+    mapping it, so summing pss over workers gives their real total.
+
+    Args:
+        pid: Process id, this process when omitted
+
+    Returns:
+        Dict with rss, pss, uss, the shared/private breakdown and
+        anonymous (heap, not file-backed) memory, or an empty dict where
+        smaps_rollup is not available (non-Linux)
+    """
+    path = Path(f"/proc/{pid or os.getpid()}/smaps_rollup")
+    try:
+        lines = path.read_text().splitlines()
+    except OSError:
+        return {}
+    memory: Dict[str, int] = {}
+    for line in lines:
+        field, _, value = line.partition(":")
+        if field in _FIELDS:
+            memory[_FIELDS[field]] = int(value.split()[0]) * 1024
+    if "private_clean" in memory and "private_dirty" in memory:
+        memory["uss"] = memory["private_clean"] + memory["private_dirty"]
+    return memory
+
+
+def child_pids(pid: Optional[int] = None) -> List[int]:
+    """
+    Direct children of a process, e.g. the workers of a uvicorn master.
+
+    Args:
+        pid: Parent process id, this process when omitted
+
+    Returns:
+        Child process ids, empty where /proc is not available
+    """
+    pid = pid or os.getpid()
+    children: List[int] = []
+    try:
+        for task in Path(f"/proc/{pid}/task").iterdir():
+            children.extend(int(c) for c in (task / "children").read_text().split())
+    except OSError:
+        return []
+    return children
@@ -0,0 +1,234 @@
+"""In-process Prometheus metrics: histograms, counters and scrape-time gauges."""
+import bisect
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Tuple
+
+# Seconds, from sub-millisecond cache hits to slow LLM answers
+LATENCY_BUCKETS_S = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+
+# A collector returns (name, type, help, [(labels, value), ...]) families at scrape time
+Family = Tuple[str, str, str, List[Tuple[Dict[str, Any], float]]]
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Sequence[str], values: Sequence[Any], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Histogram:
+    """
+    Thread-safe histogram with fixed buckets per label set.
+
+    Observing is a bisect and three additions under a lock; cumulative
+    bucket counts are only computed when rendered.
+    """
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS_S):
+        """
+        Initialize histogram.
+
+        Args:
+            name: Metric name
+            help: Help text
+            labelnames: Label names, values are passed to observe()
+            buckets: Upper bounds, ascending; +Inf is implied
+        """
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple, List] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: Any):
+        """
+        Record one observation.
+
+        Args:
+            value: Observed value
+            labels: Label values in labelnames order
+        """
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        """Prometheus text exposition lines."""
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {labels: (list(counts), total, count) for labels, (counts, total, count) in self._series.items()}
+        for labels, (counts, total, count) in sorted(series.items()):
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+class Counter:
+    """Thread-safe monotonically increasing counter per label set."""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        """
+        Initialize counter.
+
+        Args:
+            name: Metric name, conventionally ending in _total
+            help: Help text
+            labelnames: Label names, values are passed to inc()
+        """
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: Any, amount: float = 1):
+        """
+        Increase the counter.
+
+        Args:
+            labels: Label values in labelnames order
+            amount: Increment
+        """
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        """Prometheus text exposition lines."""
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = dict(self._values)
+        for labels, value in sorted(values.items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Metrics of this process, rendered in Prometheus text format.
+
+    Each API worker process keeps its own registry; Prometheus sums
+    workers when scraping them separately, or scrape a single worker.
+    """
+
+    def __init__(self):
+        """Initialize empty registry."""
+        self._metrics: Dict[str, Any] = {}
+        self._collectors: List[Callable[[], Iterable[Family]]] = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS_S) -> Histogram:
+        """Return the histogram with this name, creating it on first use."""
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        """Return the counter with this name, creating it on first use."""
+        return self._register(Counter(name, help, labelnames))
+
+    def add_collector(self, collector: Callable[[], Iterable[Family]]):
+        """
+        Register a callable producing metric families at scrape time.
+
+        Used for values that already live elsewhere, such as cache counters.
+
+        Args:
+            collector: Returns (name, type, help, [(labels, value), ...]) tuples
+        """
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        """
+        Render every metric.
+
+        Returns:
+            Prometheus text exposition format, version 0.0.4
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        for collector in collectors:
+            for name, kind, help, samples in collector():
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_labels(list(labels), list(labels.values()))} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUESTS = REGISTRY.counter(
+    "rag_http_requests_total", "HTTP requests by route, method and status", ("route", "method", "status")
+)
+HTTP_DURATION = REGISTRY.histogram(
+    "rag_http_request_duration_seconds", "HTTP request latency until the response is fully sent", ("route",)
+)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware counting requests and timing them per route template.
+
+    Unmatched paths are reported as "unmatched" so arbitrary URLs cannot
+    grow the label set.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter_ns()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            HTTP_REQUESTS.inc(route, scope["method"], status)
+            HTTP_DURATION.observe((time.perf_counter_ns() - start) / 1e9, route)
@@ -0,0 +1,168 @@
+"""Per-request span tracing of the RAG pipeline stages."""
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .logger import request_id_var
+from .metrics import REGISTRY
+
+STAGE_DURATION = REGISTRY.histogram(
+    "rag_stage_duration_seconds", "Latency of RAG pipeline stages", ("stage",)
+)
+
+_current: contextvars.ContextVar[Optional["Trace"]] = contextvars.ContextVar("trace", default=None)
+
+
+class Trace:
+    """
+    Spans recorded while serving one request.
+
+    Spans may be added from worker threads (retrievers run concurrently),
+    so appends are locked.
+    """
+
+    def __init__(self, request_id: Optional[str] = None):
+        """
+        Initialize trace.
+
+        Args:
+            request_id: Request the spans belong to
+        """
+        self.request_id = request_id
+        self.start_ns = time.perf_counter_ns()
+        self.spans: List[Tuple[str, int, int]] = []
+        self._lock = threading.Lock()
+
+    def add(self, name: str, start_ns: int, duration_ns: int):
+        """
+        Record a finished span.
+
+        Args:
+            name: Stage name
+            start_ns: perf_counter_ns() at the start
+            duration_ns: Span duration
+        """
+        with self._lock:
+            self.spans.append((name, start_ns, duration_ns))
+
+    def elapsed_ms(self) -> float:
+        """Milliseconds since the trace started."""
+        return (time.perf_counter_ns() - self.start_ns) / 1e6
+
+    def breakdown(self) -> Dict[str, float]:
+        """
+        Milliseconds per stage.
+
+        Spans of the same stage are summed, so stages that ran concurrently
+        (the two retrievers, or the answers of a batch) can add up to more
+        than the wall-clock latency.
+
+        Returns:
+            Stage name to milliseconds, in order of first start
+        """
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s[1])
+        totals: Dict[str, float] = {}
+        for name, _, duration_ns in spans:
+            totals[name] = totals.get(name, 0.0) + duration_ns / 1e6
+        return {name: round(ms, 3) for name, ms in totals.items()}
+
+
+@contextmanager
+def trace(request_id: Optional[str] = None) -> Iterator[Trace]:
+    """
+    Collect the spans of one request and tag its logs with the request id.
+
+    Args:
+        request_id: Request id
+
+    Yields:
+        The active Trace
+    """
+    current = Trace(request_id)
+    trace_token = _current.set(current)
+    request_token = request_id_var.set(request_id)
+    try:
+        yield current
+    finally:
+        request_id_var.reset(request_token)
+        _current.reset(trace_token)
+
+
+@contextmanager
+def use_trace(current: Optional[Trace]) -> Iterator[Optional[Trace]]:
+    """
+    Make an existing trace active again, e.g. inside a streaming body.
+
+    Args:
+        current: Trace to activate
+
+    Yields:
+        The same Trace
+    """
+    trace_token = _current.set(current)
+    request_token = request_id_var.set(current.request_id if current is not None else None)
+    try:
+        yield current
+    finally:
+        request_id_var.reset(request_token)
+        _current.reset(trace_token)
+
+
+def current_trace() -> Optional[Trace]:
+    """The trace of the request being served, if any."""
+    return _current.get()
+
+
+def record(name: str, duration_ns: int, start_ns: Optional[int] = None):
+    """
+    Record a span measured elsewhere.
+
+    Args:
+        name: Stage name
+        duration_ns: Span duration
+        start_ns: perf_counter_ns() at the start, derived from now when omitted
+    """
+    STAGE_DURATION.observe(duration_ns / 1e9, name)
+    current = _current.get()
+    if current is not None:
+        if start_ns is None:
+            start_ns = time.perf_counter_ns() - duration_ns
+        current.add(name, start_ns, duration_ns)
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """
+    Time a pipeline stage.
+
+    Every span feeds the rag_stage_duration_seconds histogram; inside a
+    trace() it is also added to the request's breakdown.
+
+    Args:
+        name: Stage name, e.g. "retrieval.bm25"
+    """
+    start_ns = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter_ns() - start_ns, start_ns)
+
+
+def propagate(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Bind a callable to the current context for use on another thread.
+
+    Thread pools do not carry context variables over, so spans and log
+    request ids inside fn would otherwise be lost.
+
+    Args:
+        fn: Callable to run on a worker thread
+
+    Returns:
+        Callable running fn in a copy of the current context
+    """
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.run(fn, *args, **kwargs)
@@ -1,59 +1,412 @@
-from typing import Dict, Any, List
+import hashlib
+import re
+from typing import Dict, Any, List, Optional, Tuple
 
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+_WORD_RE = re.compile(r"\w+")
+_CITATION_RE = re.compile(r"\[\d+(?:\s*,\s*\d+)*\]")
+# A sentence ends at terminal punctuation or after the citation markers
+# following it, before an uppercase start
+_SENTENCE_RE = re.compile(r"(?<=[.!?\]])\s+(?=[A-Z(\"'])|\n+")
+
+
+def _words(sentence: str) -> List[str]:
+    """Lowercase words of a sentence without its citation markers."""
+    return _WORD_RE.findall(_CITATION_RE.sub(" ", sentence).lower())
+
+
+def split_sentences(answer: str) -> List[str]:
+    """
+    Split an answer into sentences.
+
+    Args:
+        answer: Generated answer
+
+    Returns:
+        Non-empty sentences, citation markers included
+    """
+    return [s.strip() for s in _SENTENCE_RE.split(answer) if s.strip()]
+
+
+class ShingleIndex:
+    """
+    Hashed word n-gram (shingle) index over retrieved chunks.
+
+    Built once per request in time linear in the context length. Looking
+    up a sentence costs one hash probe per word, so checking a whole
+    answer is linear in its length instead of substring-searching every
+    sentence in the whole context.
+
+    Packed passages with spans are indexed per span, so support resolves
+    to the original chunk ids.
+    """
+
+    def __init__(self, n: int = 3):
+        """
+        Initialize empty index.
+
+        Args:
+            n: Words per shingle
+        """
+        self.n = n
+        # Shingle -> bitmask of the chunks containing it; bit i is _ids[i]
+        self._postings: Dict[Tuple[str, ...], int] = {}
+        self._ids: List[Any] = []
+        self._bits: Dict[Any, int] = {}
+
+    @classmethod
+    def from_chunks(cls, chunks: List[Dict[str, Any]], n: int = 3) -> "ShingleIndex":
+        """
+        Index retrieved chunks or packed passages.
+
+        Args:
+            chunks: Chunks with text and chunk_id
+            n: Words per shingle
+
+        Returns:
+            Populated ShingleIndex
+        """
+        index = cls(n)
+        for chunk in chunks:
+            spans = chunk.get("spans")
+            if spans:
+                for span in spans:
+                    index.add(span["chunk_id"], chunk["text"][span["start"]:span["end"]])
+            else:
+                index.add(chunk.get("chunk_id"), chunk["text"])
+        return index
+
+    def _shingles(self, words: List[str]):
+        return zip(*(words[i:] for i in range(self.n)))
+
+    def add(self, chunk_id: Any, text: str):
+        """
+        Add one chunk's shingles.
+
+        Args:
+            chunk_id: Id reported as support
+            text: Chunk text
+        """
+        bit = self._bits.get(chunk_id)
+        if bit is None:
+            bit = self._bits[chunk_id] = 1 << len(self._ids)
+            self._ids.append(chunk_id)
+        postings = self._postings
+        for shingle in set(self._shingles(_WORD_RE.findall(text.lower()))):
+            postings[shingle] = postings.get(shingle, 0) | bit
+
+    def support(self, sentence: str, max_chunks: int = 3) -> Tuple[Optional[float], List[Any]]:
+        """
+        How much of a sentence the indexed chunks support.
+
+        Args:
+            sentence: Answer sentence, citation markers are ignored
+            max_chunks: Most supporting chunk ids returned
+
+        Returns:
+            Tuple of (share of the sentence's words covered by a shingle
+            found in some chunk, ids of the chunks sharing the most
+            shingles with it). Support is None for sentences shorter than
+            one shingle.
+        """
+        return self.support_words(_words(sentence), max_chunks)
+
+    def support_words(self, words: List[str], max_chunks: int = 3) -> Tuple[Optional[float], List[Any]]:
+        """support() for a sentence already split into lowercase words."""
+        if len(words) < self.n:
+            return None, []
+
+        n = self.n
+        postings = self._postings
+        covered = 0
+        covered_until = 0
+        mask_counts: Dict[int, int] = {}
+        for i, shingle in enumerate(self._shingles(words)):
+            mask = postings.get(shingle)
+            if not mask:
+                continue
+            # Words i..i+n-1 are covered; count only those not counted yet
+            covered += n - (covered_until - i if covered_until > i else 0)
+            covered_until = i + n
+            mask_counts[mask] = mask_counts.get(mask, 0) + 1
+
+        # Few distinct masks per sentence, expand them to per-chunk counts once
+        counts: Dict[int, int] = {}
+        for mask, count in mask_counts.items():
+            while mask:
+                low = mask & -mask
+                counts[low] = counts.get(low, 0) + count
+                mask ^= low
+        best = sorted(counts, key=counts.get, reverse=True)[:max_chunks]
+        if best:
+            # Chunks contributing less than half the best one's overlap are incidental
+            top = counts[best[0]]
+            best = [bit for bit in best if counts[bit] * 2 >= top]
+        return covered / len(words), [self._ids[bit.bit_length() - 1] for bit in best]
+
 
 def validate_answer(
     answer: str,
     context: str,
-    chunks: List[Dict[str, Any]]
+    chunks: List[Dict[str, Any]],
+    min_support: float = 0.5,
+    index: Optional[ShingleIndex] = None
 ) -> Dict[str, Any]:
     """
     Validate that answer is grounded in context.
-    
+
+    Each sentence's support is the share of its words covered by word
+    3-grams that also occur in a retrieved chunk. A sentence below
+    min_support is reported as an issue.
+
     Args:
         answer: Generated answer
-        context: Retrieved context
-        chunks: Retrieved chunks with metadata
-    
+        context: Retrieved context, only indexed when there are no chunks
+        chunks: Retrieved chunks (or packed passages) with metadata
+        min_support: Lowest support of a grounded sentence
+        index: Shingle index of the chunks, built here when omitted
+
     Returns:
-        Validation result with is_valid flag and details
-    
-    TODO: Implement grounding validation logic.
-    """
-    logger.info("Validating answer grounding")
-    
-    # TODO: Check if answer content appears in context
-    # TODO: Verify citations are valid
-    # TODO: Detect hallucinations
-    
+        Validation result with is_valid flag, confidence (word-weighted
+        mean support), issues, and per-sentence text, support and
+        supporting chunk_ids
+    """
+    if index is None:
+        if chunks:
+            index = ShingleIndex.from_chunks(chunks)
+        else:
+            index = ShingleIndex()
+            index.add(None, context)
+
+    sentences = []
+    issues = []
+    weighted = 0.0
+    total_words = 0
+    for n, sentence in enumerate(split_sentences(answer), start=1):
+        words = _words(sentence)
+        support, chunk_ids = index.support_words(words)
+        sentences.append({"text": sentence, "support": support, "chunk_ids": chunk_ids})
+        if support is None:
+            continue
+        weighted += support * len(words)
+        total_words += len(words)
+        if support < min_support:
+            issues.append(f"Sentence {n} is not supported by the context (support {support:.2f}): {sentence}")
+
+    confidence = weighted / total_words if total_words else 0.0
+    logger.info("Validated answer grounding: %d sentences, %d issues", len(sentences), len(issues))
+
     return {
-        "is_valid": True,
-        "confidence": 0.0,
-        "issues": []
+        "is_valid": not issues,
+        "confidence": confidence,
+        "issues": issues,
+        "sentences": sentences
     }
 
 
+def _normalize(text: str) -> str:
+    """Case- and whitespace-folded text for quote comparison."""
+    return " ".join(text.lower().split())
+
+
+def fingerprint(text: str) -> str:
+    """
+    Fingerprint of a text that ignores case and whitespace.
+
+    Args:
+        text: Chunk or quote text
+
+    Returns:
+        16 hex character digest
+    """
+    return _digest(_normalize(text))
+
+
+def _digest(normalized: str) -> str:
+    return hashlib.blake2b(normalized.encode(), digest_size=8).hexdigest()
+
+
+class CitationTable:
+    """
+    Per-request lookup table of retrieved chunks for citation checks.
+
+    Maps chunk id to its pdf_file, page, character offsets, normalized
+    text and text fingerprint. Built once from the retrieved chunks (or
+    packed passages, resolved to their chunks through the spans), so
+    checking a citation is a dict lookup per cited chunk plus a comparison
+    bounded by the chunk's length, however many chunks were retrieved.
+    """
+
+    def __init__(self):
+        """Initialize empty table."""
+        self.entries: Dict[Any, Dict[str, Any]] = {}
+
+    @classmethod
+    def from_chunks(cls, chunks: List[Dict[str, Any]]) -> "CitationTable":
+        """
+        Tabulate retrieved chunks or packed passages.
+
+        Args:
+            chunks: Chunks with text, chunk_id, pdf_file, page and offsets
+
+        Returns:
+            Populated CitationTable
+        """
+        table = cls()
+        for chunk_id, chunk in cls._chunk_entries(chunks):
+            table.add(chunk_id, chunk)
+        return table
+
+    @staticmethod
+    def _chunk_entries(chunks: List[Dict[str, Any]]):
+        """Yield (chunk_id, chunk) pairs, splitting packed passages into their chunks."""
+        for chunk in chunks:
+            spans = chunk.get("spans")
+            if not spans:
+                yield chunk.get("chunk_id"), chunk
+                continue
+            base = chunk.get("char_start")
+            for span in spans:
+                yield span["chunk_id"], {
+                    "text": chunk["text"][span["start"]:span["end"]],
+                    "pdf_file": chunk.get("pdf_file"),
+                    "page": chunk.get("page"),
+                    "char_start": base + span["start"] if base is not None else None,
+                    "char_end": base + span["end"] if base is not None else None,
+                }
+
+    def add(self, chunk_id: Any, chunk: Dict[str, Any]):
+        """
+        Add one chunk, once per id.
+
+        Args:
+            chunk_id: Chunk id
+            chunk: Chunk with text and location metadata
+        """
+        if chunk_id is None or chunk_id in self.entries:
+            return
+        text = _normalize(chunk["text"])
+        self.entries[chunk_id] = {
+            "pdf_file": chunk.get("pdf_file"),
+            "page": chunk.get("page"),
+            "char_start": chunk.get("char_start"),
+            "char_end": chunk.get("char_end"),
+            "text": text,
+            "fingerprint": _digest(text),
+        }
+
+    def check(self, citation: Dict[str, Any], allowed: Optional[set] = None) -> List[str]:
+        """
+        Check one citation against the table.
+
+        A citation is valid when every chunk it names was retrieved, its
+        pdf_file and page match those chunks, its char_start/char_end lie
+        within their offsets, and an optional 'quote' appears in their
+        text (or an optional 'fingerprint' matches one of them).
+
+        Args:
+            citation: Citation as produced by format_citations()
+            allowed: Chunk ids retrieved for this request, all table
+                entries when omitted
+
+        Returns:
+            Issues found, empty when the citation is valid
+        """
+        label = f"Citation [{citation.get('id', '?')}]"
+        chunk_ids = citation.get("chunk_ids") or [citation.get("chunk_id")]
+        entries = []
+        for chunk_id in chunk_ids:
+            entry = self.entries.get(chunk_id)
+            if entry is None or (allowed is not None and chunk_id not in allowed):
+                return [f"{label} references chunk {chunk_id}, which was not retrieved"]
+            entries.append(entry)
+
+        issues = []
+        for key in ("pdf_file", "page"):
+            value = citation.get(key)
+            if value is not None and any(entry[key] != value for entry in entries):
+                issues.append(f"{label} {key} {value} does not match chunk {chunk_ids[0]}")
+
+        start, end = citation.get("char_start"), citation.get("char_end")
+        starts = [entry["char_start"] for entry in entries if entry["char_start"] is not None]
+        ends = [entry["char_end"] for entry in entries if entry["char_end"] is not None]
+        if start is not None and starts and start < min(starts):
+            issues.append(f"{label} starts at {start}, before its chunks")
+        if end is not None and ends and end > max(ends):
+            issues.append(f"{label} ends at {end}, after its chunks")
+
+        if citation.get("fingerprint") is not None:
+            if all(entry["fingerprint"] != citation["fingerprint"] for entry in entries):
+                issues.append(f"{label} fingerprint does not match its chunks")
+        if citation.get("quote"):
+            quote = _normalize(citation["quote"])
+            if all(quote not in entry["text"] for entry in entries):
+                issues.append(f"{label} quote is not in its chunks")
+        return issues
+
+
 def validate_citations(
     citations: List[Dict[str, Any]],
-    chunks: List[Dict[str, Any]]
+    chunks: List[Dict[str, Any]],
+    table: Optional[CitationTable] = None
 ) -> bool:
     """
     Validate that all citations reference actual chunks.
-    
+
+    See CitationTable.check() for what makes a citation valid.
+
     Args:
         citations: List of citations
-        chunks: Retrieved chunks
-    
+        chunks: Retrieved chunks (or packed passages)
+        table: Citation table of the chunks, built here when omitted
+
     Returns:
         True if all citations are valid
-    
-    TODO: Implement citation validation.
-    """
-    logger.info(f"Validating {len(citations)} citations")
-    
-    # TODO: Check each citation against chunks
-    
-    return True
+    """
+    if table is None:
+        table = CitationTable.from_chunks(chunks)
+    issues = [issue for citation in citations for issue in table.check(citation)]
+    for issue in issues:
+        logger.warning(issue)
+    return not issues
+
+
+def validate_citations_batch(
+    citation_lists: List[List[Dict[str, Any]]],
+    chunk_lists: List[List[Dict[str, Any]]]
+) -> List[bool]:
+    """
+    Validate the citations of many answers, as from /query/batch.
+
+    Queries of a batch retrieve overlapping chunks, so one table is
+    shared: each distinct chunk is normalized and fingerprinted once.
+    Citations are still only accepted for chunks retrieved for their own
+    query.
+
+    Args:
+        citation_lists: Citations per answer
+        chunk_lists: Retrieved chunks (or packed passages) per answer
+
+    Returns:
+        Per answer, True if all its citations are valid
+    """
+    table = CitationTable()
+    allowed_sets = []
+    for chunks in chunk_lists:
+        allowed = set()
+        for chunk_id, entry in CitationTable._chunk_entries(chunks):
+            table.add(chunk_id, entry)
+            allowed.add(chunk_id)
+        allowed_sets.append(allowed)
+
+    results = []
+    for citations, allowed in zip(citation_lists, allowed_sets):
+        issues = [issue for citation in citations for issue in table.check(citation, allowed)]
+        for issue in issues:
+            logger.warning(issue)
+        results.append(not issues)
+    logger.info("Validated citations of %d answers, %d invalid", len(results), results.count(False))
+    return results